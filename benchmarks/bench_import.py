@@ -0,0 +1,75 @@
+"""Время холодного импорта пакета
+
+Каждый замер выполняется в новом процессе интерпретатора, поэтому
+учитывается вся цепочка импорта, как при запуске CLI или serverless
+функции::
+
+    python benchmarks/bench_import.py --repeat 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Название замера -> код, выполняемый в новом процессе
+CASES = {
+    "python": "pass",
+    "import metallum": "import metallum",
+    "metallum.band_search": "import metallum; metallum.band_search",
+    "import metallum.operations": "import metallum.operations",
+}
+
+
+def _run(code: str) -> float:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], check=True, env=env)
+    return time.perf_counter() - start
+
+
+def bench_import(repeat: int = 10) -> Dict[str, Dict[str, float]]:
+    """
+    Измерить время импорта в новых процессах
+
+    Args:
+        repeat: Количество процессов на каждый замер
+
+    Returns:
+        dict: Название замера -> минимальное и медианное время, мс
+    """
+    for code in CASES.values():
+        # Прогрев: байт-код и кеш файловой системы
+        _run(code)
+    results = {}
+    for name, code in CASES.items():
+        times: List[float] = [_run(code) * 1000 for _ in range(repeat)]
+        results[name] = {
+            "min_ms": round(min(times), 2),
+            "median_ms": round(statistics.median(times), 2),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="вывести JSON")
+    args = parser.parse_args()
+    results = bench_import(args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for name, result in results.items():
+        print(f"{name:<30} {result['min_ms']:>8.1f} ms  {result['median_ms']:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
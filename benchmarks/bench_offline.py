@@ -0,0 +1,508 @@
+"""Офлайн-бенчмарки разбора страниц, коллекций, кешей и памяти
+
+Все страницы берутся из записанных фикстур ``tests/fixtures`` (страницы
+групп, дискография, альбомы - в том числе split и многодисковый, ответы
+расширенного поиска, текст песни и похожие группы). Транспорт заменён
+заглушкой, которая запрещает сетевые запросы, а кеши - временными,
+поэтому результаты воспроизводимы. Результаты можно сохранить в JSON и
+сравнить с прошлым запуском::
+
+    python benchmarks/bench_offline.py --json before.json
+    python benchmarks/bench_offline.py --json after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import gc
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import timeit
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+ROOT = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = ROOT / "tests" / "fixtures"
+sys.path.insert(0, str(ROOT))
+
+# pylint: disable=wrong-import-position
+from metallum.cache import (  # noqa: E402
+    FileCache,
+    MemoryCache,
+    SQLiteCache,
+    set_cache,
+    set_memory_cache,
+)
+from metallum.models import (  # noqa: E402
+    Album,
+    AlbumCollection,
+    AlbumWrapper,
+    Band,
+    SimilarArtistsResult,
+)
+from metallum.models.identity import identity_scope  # noqa: E402
+from metallum.models.lyrics import Lyrics  # noqa: E402
+from metallum.models.results import AlbumResult, BandResult, SongResult  # noqa: E402
+from metallum.models.search import Search  # noqa: E402
+from metallum.models.similar_artists import SimilarArtists  # noqa: E402
+from metallum.transport import Transport, set_transport  # noqa: E402
+
+GROUPS = ("parse", "properties", "search", "cache", "memory", "import")
+DEFAULT_GROUPS = GROUPS[:-1]
+
+# Метрики, у которых больше - лучше (для сравнения запусков)
+HIGHER_IS_BETTER = {"ops_per_sec", "mb_per_sec"}
+
+
+class OfflineTransport(Transport):
+    """Транспорт, который не выполняет запросов: всё должно быть в фикстурах"""
+
+    def __init__(self):
+        super().__init__(headers={})
+
+    def get(self, url):
+        raise RuntimeError(f"network access during offline benchmark: {url}")
+
+
+def _fixture(name: str) -> str:
+    return (FIXTURES_DIR / name).read_text(encoding="utf-8")
+
+
+def measure(func: Callable[[], Any], repeat: int = 5, min_time: float = 0.2) -> dict:
+    """
+    Измерить время вызова функции
+
+    Первый вызов не учитывается (прогрев: ленивые поля, индексы). Количество
+    вызовов в серии подбирается так, чтобы серия длилась не меньше
+    ``min_time``; из ``repeat`` серий берётся лучшая.
+
+    Args:
+        func: Измеряемая функция без аргументов
+        repeat: Количество серий
+        min_time: Минимальная длительность серии, в секундах
+
+    Returns:
+        dict: ops_per_sec, best_us и mean_us (среднее по сериям)
+    """
+    func()
+    timer = timeit.Timer(func)
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = [elapsed / number] + [
+        timer.timeit(number) / number for _ in range(repeat - 1)
+    ]
+    best = min(times)
+    return {
+        "ops_per_sec": round(1 / best, 1) if best else None,
+        "best_us": round(best * 1e6, 2),
+        "mean_us": round(sum(times) / len(times) * 1e6, 2),
+    }
+
+
+def _album(album_id: str, content: str) -> AlbumWrapper:
+    # Своя карта идентичности на каждый вызов: иначе обёртка получит уже
+    # разобранный альбом из карты и разбор не будет измерен
+    with identity_scope():
+        return AlbumWrapper(Album.url_for_id(album_id), content=content)
+
+
+def _record(group: str, name: str, **metrics) -> dict:
+    return {"group": group, "name": name, **metrics}
+
+
+def bench_parse(repeat: int, min_time: float) -> List[dict]:
+    """Пропускная способность разбора страниц по моделям"""
+    cases = {
+        "band": ("band_125.html", lambda c: Band("bands/_/125", c).load()),
+        "discography": (
+            "discography_125.html",
+            lambda c: AlbumCollection("band/discography/id/125/tab/all", c),
+        ),
+        "album": ("album_547.html", lambda c: Album("albums/_/_/547", c).load()),
+        "album_tracks": (
+            "album_547.html",
+            lambda c: _album("547", c).tracks,
+        ),
+        "album_split_tracks": (
+            "album_42682.html",
+            lambda c: _album("42682", c).tracks,
+        ),
+        "album_multi_disc_tracks": (
+            "album_338756.html",
+            lambda c: _album("338756", c).tracks,
+        ),
+        "band_search": (
+            "band_search.json",
+            lambda c: Search("search/ajax-advanced/searching/bands/", BandResult, c),
+        ),
+        "album_search": (
+            "album_search.json",
+            lambda c: Search("search/ajax-advanced/searching/albums/", AlbumResult, c),
+        ),
+        "song_search": (
+            "song_search.json",
+            lambda c: Search("search/ajax-advanced/searching/songs/", SongResult, c),
+        ),
+        "lyrics": ("lyrics_5018A.html", lambda c: str(Lyrics("5018A", c))),
+        "similar_artists": (
+            "similar_125.html",
+            lambda c: SimilarArtists(
+                "band/ajax-recommendations/id/125/showMoreSimilar/1",
+                SimilarArtistsResult,
+                c,
+            ),
+        ),
+    }
+    results = []
+    for name, (fixture, factory) in cases.items():
+        content = _fixture(fixture)
+        size = len(content.encode("utf-8"))
+        timing = measure(lambda: factory(content), repeat, min_time)
+        ops_per_sec = timing["ops_per_sec"]
+        mb_per_sec = round(ops_per_sec * size / 1e6, 2) if ops_per_sec else None
+        results.append(
+            _record("parse", name, bytes=size, mb_per_sec=mb_per_sec, **timing)
+        )
+    return results
+
+
+def bench_properties(repeat: int, min_time: float) -> List[dict]:
+    """Стоимость обращения к полям уже разобранных сущностей"""
+    band = Band("bands/_/125", _fixture("band_125.html")).load()
+    album = AlbumWrapper("albums/_/_/547", content=_fixture("album_547.html"))
+    album.load()
+    tracks = album.tracks
+    cases = {
+        **{
+            f"band.{name}": (band, name)
+            for name in ("name", "country", "genres", "status", "label", "added")
+        },
+        **{
+            f"album.{name}": (album, name)
+            for name in ("title", "type", "date", "label", "score", "duration")
+        },
+        **{f"track.{name}": (tracks[0], name) for name in ("title", "duration")},
+    }
+    funcs = {
+        name: (lambda obj=obj, attr=attr: getattr(obj, attr))
+        for name, (obj, attr) in cases.items()
+    }
+    funcs["band.to_record"] = band.to_record
+    funcs["album.to_record"] = album.to_record
+    return [
+        _record("properties", name, **measure(func, repeat, min_time))
+        for name, func in funcs.items()
+    ]
+
+
+def bench_search(repeat: int, min_time: float, sizes: Iterable[int]) -> List[dict]:
+    """Масштабирование ``MetallumCollection.search`` с размером коллекции"""
+    base = AlbumCollection(
+        "band/discography/id/125/tab/all", _fixture("discography_125.html")
+    )
+    results = []
+    for size in sizes:
+        items = (list(base) * (size // len(base) + 1))[:size]
+        collection = base._derived(items)  # pylint: disable=protected-access
+        cases = {
+            # Первый запрос строит индекс по атрибуту
+            "exact_cold": lambda: base._derived(items).search(  # pylint: disable=W0212
+                type="Demo"
+            ),
+            "exact_indexed": lambda: collection.search(type="Demo"),
+            "in_indexed": lambda: collection.search(type__in=["EP", "Single"]),
+            "range": lambda: collection.search(year__gte=1990),
+            "icontains": lambda: collection.search(title__icontains="master"),
+        }
+        for name, func in cases.items():
+            timing = measure(func, repeat, min_time)
+            results.append(_record("search", f"{name}[{size}]", size=size, **timing))
+    return results
+
+
+def bench_cache(repeat: int, min_time: float) -> List[dict]:
+    """Задержка чтения и записи страниц в кеши разных уровней"""
+    content = _fixture("band_125.html")
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        caches = {
+            "memory": MemoryCache(),
+            "sqlite": SQLiteCache(str(Path(directory) / "cache.sqlite3")),
+            "file": FileCache(str(Path(directory) / "files")),
+        }
+        for name, cache in caches.items():
+            counter = iter(range(10**9))
+            results.append(
+                _record(
+                    "cache",
+                    f"{name}.set",
+                    **measure(
+                        lambda cache=cache: cache.set(
+                            f"https://example/{next(counter)}", content, 3600
+                        ),
+                        repeat,
+                        min_time,
+                    ),
+                )
+            )
+            cache.set("https://example/hit", content, 3600)
+            results.append(
+                _record(
+                    "cache",
+                    f"{name}.get_hit",
+                    **measure(
+                        lambda cache=cache: cache.get("https://example/hit"),
+                        repeat,
+                        min_time,
+                    ),
+                )
+            )
+            results.append(
+                _record(
+                    "cache",
+                    f"{name}.get_miss",
+                    **measure(
+                        lambda cache=cache: cache.get("https://example/missing"),
+                        repeat,
+                        min_time,
+                    ),
+                )
+            )
+    return results
+
+
+def _memory_per_item(factory: Callable[[], Any], count: int) -> dict:
+    """Память, которую удерживают ``count`` объектов, в пересчёте на объект"""
+    # Прогрев: однократные кеши (скомпилированные выражения и т. п.) не
+    # должны попасть в замер
+    factory()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        items = [factory() for _ in range(count)]
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+    retained = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del items
+    return {"count": count, "bytes_per_item": round(retained / count)}
+
+
+def bench_memory(count: int) -> List[dict]:
+    """Память на сущность (tracemalloc)"""
+    band_page = _fixture("band_125.html")
+    album_page = _fixture("album_547.html")
+    search_page = _fixture("album_search.json")
+    discography_page = _fixture("discography_125.html")
+
+    def album_with_tracks():
+        album = _album("547", album_page)
+        album.tracks  # pylint: disable=pointless-statement
+        return album
+
+    def search_rows():
+        url = "search/ajax-advanced/searching/albums/"
+        return list(Search(url, AlbumResult, search_page))
+
+    def discography_rows():
+        url = "band/discography/id/125/tab/all"
+        return AlbumCollection(url, discography_page)
+
+    cases = {
+        "band_loaded": lambda: Band("bands/_/125", band_page).load(),
+        "band_record": lambda: Band("bands/_/125", band_page).to_record(),
+        "album_with_tracks": album_with_tracks,
+        "album_record": lambda: Album("albums/_/_/547", album_page).to_record(),
+    }
+    results = [
+        _record("memory", name, **_memory_per_item(factory, count))
+        for name, factory in cases.items()
+    ]
+    # Строки создаются разбором целой страницы: память страницы делится на
+    # количество строк на ней
+    for name, factory in (
+        ("discography_row", discography_rows),
+        ("album_search_row", search_rows),
+    ):
+        rows_per_page = len(factory())
+        rows = _memory_per_item(factory, count)
+        rows["bytes_per_item"] = round(rows["bytes_per_item"] / rows_per_page)
+        results.append(_record("memory", name, rows_per_page=rows_per_page, **rows))
+    return results
+
+
+def bench_imports(repeat: int) -> List[dict]:
+    """Время холодного импорта (см. ``bench_import.py``)"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from bench_import import bench_import  # pylint: disable=C0415
+
+    return [
+        _record("import", name, **result)
+        for name, result in bench_import(repeat).items()
+    ]
+
+
+def _metadata() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from importlib.metadata import version  # pylint: disable=C0415
+
+        package_version = version("metallumapi")
+    except Exception:  # pylint: disable=broad-exception-caught
+        package_version = None
+    return {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "package_version": package_version,
+        "commit": commit,
+    }
+
+
+def run(
+    groups: Iterable[str] = DEFAULT_GROUPS,
+    quick: bool = False,
+) -> Dict[str, Any]:
+    """
+    Выполнить бенчмарки
+
+    Args:
+        groups: Группы бенчмарков (``GROUPS``)
+        quick: Короткий прогон для проверки, что бенчмарки работают
+            (результаты неточны)
+
+    Returns:
+        dict: ``meta`` (окружение) и ``results`` (по записи на замер)
+    """
+    repeat, min_time = (1, 0.0) if quick else (5, 0.2)
+    sizes = (100,) if quick else (100, 1_000, 10_000)
+    groups = tuple(groups)
+    unknown = set(groups) - set(GROUPS)
+    if unknown:
+        raise ValueError(f"unknown groups: {', '.join(sorted(unknown))}")
+
+    previous_transport = set_transport(OfflineTransport())
+    with tempfile.TemporaryDirectory() as directory:
+        previous_cache = set_cache(SQLiteCache(str(Path(directory) / "cache.sqlite3")))
+        previous_memory = set_memory_cache(MemoryCache())
+        try:
+            results = []
+            if "parse" in groups:
+                results.extend(bench_parse(repeat, min_time))
+            if "properties" in groups:
+                results.extend(bench_properties(repeat, min_time))
+            if "search" in groups:
+                results.extend(bench_search(repeat, min_time, sizes))
+            if "cache" in groups:
+                results.extend(bench_cache(repeat, min_time))
+            if "memory" in groups:
+                results.extend(bench_memory(5 if quick else 50))
+            if "import" in groups:
+                results.extend(bench_imports(2 if quick else 10))
+        finally:
+            set_transport(previous_transport)
+            set_cache(previous_cache)
+            set_memory_cache(previous_memory)
+    return {"meta": _metadata(), "results": results}
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[dict]:
+    """
+    Сравнить два запуска
+
+    Args:
+        current: Результат ``run``
+        baseline: Результат ``run`` для сравнения (например, прошлый
+            выпуск)
+
+    Returns:
+        List[dict]: group, name, metric, baseline, current и ratio (> 1 -
+        стало лучше)
+    """
+    previous = {(r["group"], r["name"]): r for r in baseline["results"]}
+    rows = []
+    for record in current["results"]:
+        old = previous.get((record["group"], record["name"]))
+        if old is None:
+            continue
+        for metric in ("ops_per_sec", "best_us", "bytes_per_item", "min_ms"):
+            new_value, old_value = record.get(metric), old.get(metric)
+            if not new_value or not old_value:
+                continue
+            ratio = (
+                new_value / old_value
+                if metric in HIGHER_IS_BETTER
+                else old_value / new_value
+            )
+            rows.append(
+                {
+                    "group": record["group"],
+                    "name": record["name"],
+                    "metric": metric,
+                    "baseline": old_value,
+                    "current": new_value,
+                    "ratio": round(ratio, 3),
+                }
+            )
+            break
+    return rows
+
+
+def _print_results(results: List[dict]) -> None:
+    for record in results:
+        values = ", ".join(
+            f"{key}={value}"
+            for key, value in record.items()
+            if key not in ("group", "name")
+        )
+        print(f"{record['group']:<11} {record['name']:<32} {values}")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--groups",
+        default=",".join(DEFAULT_GROUPS),
+        help=f"группы через запятую: {', '.join(GROUPS)}",
+    )
+    parser.add_argument("--quick", action="store_true", help="короткий прогон")
+    parser.add_argument("--json", metavar="FILE", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="FILE", help="сравнить с прошлым JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.groups.split(","), args.quick)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2), encoding="utf-8")
+    _print_results(report["results"])
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        print()
+        for row in compare(report, baseline):
+            print(
+                f"{row['group']:<11} {row['name']:<32} {row['metric']:<14} "
+                f"{row['baseline']} -> {row['current']} (x{row['ratio']})"
+            )
+
+
+if __name__ == "__main__":
+    main()
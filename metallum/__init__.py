@@ -1,13 +1,102 @@
 #!/usr/bin/env python
 # encoding: utf-8
-"""Python-интерфейс для metal-archives.com"""
+"""Python-интерфейс для metal-archives.com
+
+Функции пакета импортируются при первом обращении (PEP 562), поэтому
+``import metallum`` не загружает curl_cffi, pyquery/lxml и остальные
+зависимости, пока они не понадобятся.
+"""
+
+import importlib
+from typing import TYPE_CHECKING
+
+# Имя -> модуль, из которого оно импортируется при первом обращении
+_LAZY = {
+    "AlbumTypes": "metallum.models.album_types",
+    "set_user_agent": "metallum.utils",
+    **dict.fromkeys(
+        (
+            "band_for_id",
+            "band_record_for_id",
+            "band_search",
+            "album_for_id",
+            "album_record_for_id",
+            "album_search",
+            "song_search",
+            "lyrics_for_id",
+            "iter_band_search",
+            "iter_album_search",
+            "iter_song_search",
+            "bands_for_ids",
+            "albums_for_ids",
+            "lyrics_for_ids",
+        ),
+        "metallum.operations",
+    ),
+    **dict.fromkeys(
+        (
+            "aband_for_id",
+            "aband_search",
+            "aalbum_for_id",
+            "aalbum_search",
+            "asong_search",
+            "alyrics_for_id",
+        ),
+        "metallum.async_operations",
+    ),
+}
+
+__all__ = sorted(_LAZY)
+
+if TYPE_CHECKING:
+    from metallum.async_operations import (
+        aalbum_for_id,
+        aalbum_search,
+        aband_for_id,
+        aband_search,
+        alyrics_for_id,
+        asong_search,
+    )
+    from metallum.models.album_types import AlbumTypes
+    from metallum.operations import (
+        album_for_id,
+        album_record_for_id,
+        album_search,
+        albums_for_ids,
+        band_for_id,
+        band_record_for_id,
+        band_search,
+        bands_for_ids,
+        iter_album_search,
+        iter_band_search,
+        iter_song_search,
+        lyrics_for_id,
+        lyrics_for_ids,
+        song_search,
+    )
+    from metallum.utils import set_user_agent
+
+
+def __getattr__(name: str):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    # Следующие обращения не проходят через __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
 
-from metallum.models.album_types import AlbumTypes
-from metallum.operations import album_for_id, band_search, song_search
 
 if __name__ == "__main__":
     import doctest
 
+    from metallum.models.album_types import AlbumTypes
+    from metallum.operations import album_for_id, band_search, song_search
+
     # Тестовые объекты
     search_results = band_search("metallica")
     band = search_results[0].get()
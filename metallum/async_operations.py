@@ -0,0 +1,91 @@
+"""Асинхронные операции API Metallum
+
+Функции повторяют ``metallum.operations`` и принимают те же аргументы, но
+загружают страницы через общий ``AsyncTransport``, поэтому в одном цикле
+событий можно выполнять несколько запросов одновременно.
+"""
+
+from metallum import operations
+from metallum.models import AlbumWrapper, Band
+from metallum.models.lyrics import Lyrics
+from metallum.models.metallum import Metallum
+from metallum.models.results import AlbumResult, BandResult, SongResult
+from metallum.models.search import Search
+from metallum.utils import bind_arguments
+
+
+async def _search(url, result_handler) -> "Search":
+    content = await Metallum._afetch_page_content(url)
+    return Search(url, result_handler, content)
+
+
+async def aband_for_id(band_id: str) -> "Band":
+    """
+    Асинхронный вариант ``band_for_id``
+
+    Args:
+        band_id: ID группы.
+
+    Returns:
+        Band: Группа с указанным ID.
+    """
+    return await Band.for_id(band_id).aload()
+
+
+async def aband_search(*args, **kwargs) -> "Search":
+    """
+    Асинхронный вариант ``band_search``, принимает те же аргументы.
+
+    Returns:
+        Search: Результаты поиска.
+    """
+    params = bind_arguments(operations.band_search, args, kwargs)
+    return await _search(operations.band_search_url(params), BandResult)
+
+
+async def aalbum_for_id(album_id: str) -> "AlbumWrapper":
+    """
+    Асинхронный вариант ``album_for_id``
+
+    Args:
+        album_id: ID альбома.
+
+    Returns:
+        AlbumWrapper: Альбом с указанным ID.
+    """
+    return await AlbumWrapper.for_id(album_id).aload()
+
+
+async def aalbum_search(*args, **kwargs) -> "Search":
+    """
+    Асинхронный вариант ``album_search``, принимает те же аргументы.
+
+    Returns:
+        Search: Результаты поиска.
+    """
+    params = bind_arguments(operations.album_search, args, kwargs)
+    return await _search(operations.album_search_url(params), AlbumResult)
+
+
+async def asong_search(*args, **kwargs) -> "Search":
+    """
+    Асинхронный вариант ``song_search``, принимает те же аргументы.
+
+    Returns:
+        Search: Результаты поиска.
+    """
+    params = bind_arguments(operations.song_search, args, kwargs)
+    return await _search(operations.song_search_url(params), SongResult)
+
+
+async def alyrics_for_id(lyrics_id: int) -> "Lyrics":
+    """
+    Асинхронный вариант ``lyrics_for_id``
+
+    Args:
+        lyrics_id: ID текста песни.
+
+    Returns:
+        Lyrics: Текст песни с указанным ID.
+    """
+    return await Lyrics(lyrics_id).aload()
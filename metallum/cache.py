@@ -0,0 +1,397 @@
+"""Кеш загруженных страниц"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from metallum.consts import (
+    CACHE_DB,
+    CACHE_FILE,
+    MEMORY_CACHE_BYTES,
+    MEMORY_CACHE_ENTRIES,
+    MEMORY_CACHE_TTL,
+)
+
+# Как часто (в количестве записей) SQLite-кеш удаляет просроченные страницы
+PURGE_INTERVAL = 1000
+
+
+class BaseCache:
+    """Интерфейс кеша страниц: ключ - абсолютный URL, значение - тело ответа"""
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Получить страницу из кеша
+
+        Args:
+            key: Ключ (абсолютный URL-адрес)
+
+        Returns:
+            str: Содержимое страницы или None, если её нет или она устарела
+        """
+        raise NotImplementedError
+
+    def get_with_expiry(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        """
+        Получить страницу из кеша вместе с моментом, когда она устареет.
+        Кеши, которые не хранят срок жизни, возвращают None вместо него.
+
+        Args:
+            key: Ключ (абсолютный URL-адрес)
+
+        Returns:
+            tuple: Содержимое страницы и время устаревания (``time.time()``)
+            или None, если страницы нет или она устарела
+        """
+        content = self.get(key)
+        return None if content is None else (content, None)
+
+    def set(self, key: str, content: str, ttl: float) -> None:
+        """
+        Сохранить страницу в кеш
+
+        Args:
+            key: Ключ (абсолютный URL-адрес)
+            content: Содержимое страницы
+            ttl: Время жизни записи, в секундах
+        """
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        """
+        Удалить страницу из кеша
+
+        Args:
+            key: Ключ (абсолютный URL-адрес)
+        """
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        """Удалить все страницы"""
+        raise NotImplementedError
+
+
+class FileCache(BaseCache):
+    """Кеш, хранящий каждую страницу в отдельном JSON-файле"""
+
+    def __init__(self, directory: str = CACHE_FILE):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        digest = hashlib.sha256(key.encode("utf-8")).hexdigest()
+        return self.directory / f"{digest}.cache"
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_with_expiry(key)
+        return entry[0] if entry else None
+
+    def get_with_expiry(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        cache_file = self._path(key)
+        try:
+            with cache_file.open("r", encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, OSError):
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        expires = data.get("expires", 0)
+        if time.time() > expires or data.get("content") is None:
+            cache_file.unlink(missing_ok=True)
+            return None
+
+        return data["content"], expires
+
+    def set(self, key: str, content: str, ttl: float) -> None:
+        now = time.time()
+        payload = {"timestamp": now, "expires": now + ttl, "content": content}
+        with self._path(key).open("w", encoding="utf-8") as file:
+            json.dump(payload, file)
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        for cache_file in self.directory.glob("*.cache"):
+            cache_file.unlink(missing_ok=True)
+
+
+class SQLiteCache(BaseCache):
+    """
+    Кеш в одном файле SQLite.
+
+    База работает в режиме WAL, поэтому читатели не блокируют писателя, и
+    её можно одновременно использовать из нескольких потоков (у каждого
+    потока своё соединение) и процессов. Просроченные записи удаляются
+    одним запросом по индексу ``expires`` каждые ``PURGE_INTERVAL`` записей.
+    """
+
+    def __init__(self, path: str = CACHE_DB, timeout: float = 30.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._writes = 0
+        self._lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                "key TEXT PRIMARY KEY, "
+                "content TEXT NOT NULL, "
+                "expires REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS pages_expires ON pages (expires)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        # Соединение SQLite нельзя переиспользовать ни в другом потоке,
+        # ни в дочернем процессе после fork
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_with_expiry(key)
+        return entry[0] if entry else None
+
+    def get_with_expiry(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        row = (
+            self._connection()
+            .execute(
+                "SELECT content, expires FROM pages WHERE key = ? AND expires > ?",
+                (key, time.time()),
+            )
+            .fetchone()
+        )
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, content: str, ttl: float) -> None:
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO pages (key, content, expires) "
+                "VALUES (?, ?, ?)",
+                (key, content, time.time() + ttl),
+            )
+        with self._lock:
+            self._writes += 1
+            purge = self._writes % PURGE_INTERVAL == 0
+        if purge:
+            self.purge_expired()
+
+    def delete(self, key: str) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM pages WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._connection() as connection:
+            connection.execute("DELETE FROM pages")
+
+    def purge_expired(self) -> int:
+        """
+        Удалить все просроченные записи
+
+        Returns:
+            int: Количество удалённых записей
+        """
+        with self._connection() as connection:
+            cursor = connection.execute(
+                "DELETE FROM pages WHERE expires <= ?", (time.time(),)
+            )
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Закрыть соединение текущего потока"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+class MemoryCache(BaseCache):
+    """
+    LRU-кеш в памяти процесса, который стоит перед постоянным кешем.
+
+    Размер ограничен как количеством записей, так и их суммарным объёмом;
+    при переполнении вытесняются давно не использованные страницы. Время
+    жизни записи - меньшее из собственного ``ttl`` и переданного при записи.
+
+    Атрибуты:
+        max_entries: Максимальное количество записей (0 отключает кеш)
+        max_bytes: Максимальный суммарный размер записей, в байтах
+        ttl: Максимальное время жизни записи, в секундах
+        hits: Количество попаданий
+        misses: Количество промахов
+        evictions: Количество вытесненных записей
+    """
+
+    def __init__(
+        self,
+        max_entries: int = MEMORY_CACHE_ENTRIES,
+        max_bytes: int = MEMORY_CACHE_BYTES,
+        ttl: float = MEMORY_CACHE_TTL,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def size(self) -> int:
+        """Суммарный размер записей, в байтах"""
+        return self._size
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self.get_with_expiry(key)
+        return entry[0] if entry else None
+
+    def get_with_expiry(self, key: str) -> Optional[Tuple[str, Optional[float]]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            content, expires, size = entry
+            now = time.monotonic()
+            if now > expires:
+                del self._entries[key]
+                self._size -= size
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            # Срок хранится по монотонным часам, наружу - по time.time()
+            return content, time.time() + (expires - now)
+
+    def set(self, key: str, content: str, ttl: float) -> None:
+        size = sys.getsizeof(content)
+        if self.max_entries <= 0 or size > self.max_bytes:
+            return
+        expires = time.monotonic() + min(ttl, self.ttl)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[2]
+            self._entries[key] = (content, expires, size)
+            self._size += size
+            while (
+                len(self._entries) > self.max_entries or self._size > self.max_bytes
+            ):
+                _, (_, _, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+                self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._size -= entry[2]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Статистика кеша
+
+        Returns:
+            dict: Попадания, промахи, вытеснения, количество и размер записей
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._size,
+        }
+
+
+_cache: Optional[BaseCache] = None
+_memory_cache: Optional[MemoryCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> BaseCache:
+    """
+    Получить общий для процесса кеш страниц (по умолчанию - файловый).
+
+    Returns:
+        BaseCache: Текущий кеш
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = FileCache()
+    return _cache
+
+
+def set_cache(cache: Optional[BaseCache]) -> Optional[BaseCache]:
+    """
+    Заменить общий кеш страниц, например на ``SQLiteCache()``.
+
+    Args:
+        cache: Новый кеш или None, чтобы вернуться к кешу по умолчанию
+
+    Returns:
+        BaseCache: Предыдущий кеш
+    """
+    global _cache
+    with _cache_lock:
+        previous, _cache = _cache, cache
+    return previous
+
+
+def get_memory_cache() -> MemoryCache:
+    """
+    Получить общий для процесса кеш в памяти.
+
+    Returns:
+        MemoryCache: Текущий кеш в памяти
+    """
+    global _memory_cache
+    if _memory_cache is None:
+        with _cache_lock:
+            if _memory_cache is None:
+                _memory_cache = MemoryCache()
+    return _memory_cache
+
+
+def set_memory_cache(cache: Optional[MemoryCache]) -> Optional[MemoryCache]:
+    """
+    Заменить кеш в памяти, например, чтобы изменить его размер или
+    отключить его с помощью ``MemoryCache(max_entries=0)``.
+
+    Args:
+        cache: Новый кеш или None, чтобы вернуться к кешу по умолчанию
+
+    Returns:
+        MemoryCache: Предыдущий кеш
+    """
+    global _memory_cache
+    with _cache_lock:
+        previous, _memory_cache = _memory_cache, cache
+    return previous
@@ -5,16 +5,40 @@ import tempfile
 
 
 CACHE_FILE = os.path.join(tempfile.gettempdir(), "metallum_cache")
+CACHE_DB = os.path.join(tempfile.gettempdir(), "metallum_cache.sqlite3")
+CRAWL_DB = os.path.join(tempfile.gettempdir(), "metallum_crawl.sqlite3")
+SYNC_DB = os.path.join(tempfile.gettempdir(), "metallum_sync.sqlite3")
+STORE_DB = os.path.join(tempfile.gettempdir(), "metallum_store.sqlite3")
+
+# Ограничения кеша страниц в памяти процесса
+MEMORY_CACHE_ENTRIES = 512
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+MEMORY_CACHE_TTL = 300
 
 # Детали сайта
 BASE_URL = "https://www.metal-archives.com"
 
+# User-Agent, если fake_useragent не установлен или не смог выбрать браузер
+DEFAULT_USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_5) AppleWebKit/605.1.15 "
+    "(KHTML, like Gecko) Version/17.5 Safari/605.1.15"
+)
+
 # HTML-сущности
 BR = "<br/>"
 CR = "&#13;"
 
-# Тайм-аут между запросами к страницам, в секундах
+# Средний интервал между запросами к страницам, в секундах
 REQUEST_TIMEOUT = 1.0
 
+# Сколько запросов подряд можно выполнить без ожидания
+RATE_LIMIT_BURST = 2
+
+# Сколько раз повторять запрос после ответа 429/503
+MAX_RETRIES = 3
+
+# Количество HTTP-сессий в общем пуле транспорта
+POOL_SIZE = 4
+
 # Смещение UTC
 UTC_OFFSET = 3
@@ -0,0 +1,341 @@
+"""Обход связанных страниц Metal Archives с сохранением прогресса
+
+Обходчик идёт по графу группа -> альбомы -> треки -> тексты песен (и,
+при желании, похожие группы). Очередь работ хранится в SQLite: каждая
+страница попадает в неё один раз, а состояние обработки записывается
+сразу после завершения, поэтому после сбоя или перезапуска обход
+продолжается с того же места. Страницы загружаются несколькими рабочими
+потоками через общий транспорт, поэтому ограничение частоты запросов
+соблюдается. Например::
+
+    crawler = Crawler("thrash.sqlite3", follow=(ALBUMS, TRACKS))
+    crawler.add_band("125")
+    crawler.run(on_entity=lambda kind, entity: print(kind, entity))
+"""
+
+import contextvars
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from metallum.consts import CRAWL_DB, MAX_RETRIES, POOL_SIZE
+from metallum.models import AlbumWrapper, Band
+from metallum.models.lyrics import Lyrics
+
+# Виды страниц в очереди
+BAND = "band"
+ALBUM = "album"
+LYRICS = "lyrics"
+TRACK = "track"
+
+# Связи, по которым может идти обход
+ALBUMS = "albums"
+TRACKS = "tracks"
+SIMILAR_ARTISTS = "similar_artists"
+EDGES = (ALBUMS, TRACKS, LYRICS, SIMILAR_ARTISTS)
+
+# Состояния работ в очереди
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+# (вид, ID, глубина)
+Job = Tuple[str, str, int]
+
+
+class Crawler:
+    """
+    Возобновляемый обходчик с очередью в SQLite.
+
+    Атрибуты:
+        path: Путь к базе очереди
+        follow: Связи, по которым идёт обход (``EDGES``)
+        max_workers: Количество одновременно загружаемых страниц
+        max_depth: Максимальное расстояние от начальных страниц
+            (None - без ограничения)
+        max_attempts: Сколько раз пытаться загрузить страницу, прежде чем
+            пометить её как ошибочную
+    """
+
+    def __init__(
+        self,
+        path: str = CRAWL_DB,
+        follow: Iterable[str] = (ALBUMS, TRACKS),
+        max_workers: int = POOL_SIZE,
+        max_depth: Optional[int] = None,
+        max_attempts: int = MAX_RETRIES,
+    ):
+        self.follow = frozenset(follow)
+        unknown = self.follow - set(EDGES)
+        if unknown:
+            raise ValueError(f"unknown edges: {', '.join(sorted(unknown))}")
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.path = str(path)
+        self.max_workers = max_workers
+        self.max_depth = max_depth
+        self.max_attempts = max_attempts
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                "kind TEXT NOT NULL, "
+                "id TEXT NOT NULL, "
+                "depth INTEGER NOT NULL, "
+                "status TEXT NOT NULL, "
+                "attempts INTEGER NOT NULL DEFAULT 0, "
+                "error TEXT, "
+                "updated REAL NOT NULL, "
+                "PRIMARY KEY (kind, id))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, depth)"
+            )
+            # Работы, прерванные сбоем, выполняются заново
+            self._connection.execute(
+                "UPDATE jobs SET status = ? WHERE status = ?", (PENDING, RUNNING)
+            )
+
+    def close(self) -> None:
+        """Закрыть базу очереди"""
+        self._connection.close()
+
+    def __enter__(self) -> "Crawler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _enqueue(self, jobs: Iterable[Job]) -> None:
+        # Уже известные страницы (в любом состоянии) повторно не добавляются
+        now = time.time()
+        self._connection.executemany(
+            "INSERT OR IGNORE INTO jobs (kind, id, depth, status, updated) "
+            "VALUES (?, ?, ?, ?, ?)",
+            [
+                (kind, str(entity_id), depth, PENDING, now)
+                for kind, entity_id, depth in jobs
+            ],
+        )
+
+    def add_band(self, band_id: str) -> None:
+        """
+        Добавить группу в качестве начальной страницы
+
+        Args:
+            band_id: ID группы
+        """
+        with self._connection:
+            self._enqueue([(BAND, band_id, 0)])
+
+    def add_album(self, album_id: str) -> None:
+        """
+        Добавить альбом в качестве начальной страницы
+
+        Args:
+            album_id: ID альбома
+        """
+        with self._connection:
+            self._enqueue([(ALBUM, album_id, 0)])
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Количество работ в каждом состоянии
+
+        Returns:
+            dict: Состояние -> количество работ
+        """
+        counts = dict.fromkeys((PENDING, RUNNING, DONE, FAILED), 0)
+        counts.update(
+            self._connection.execute(
+                "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+            ).fetchall()
+        )
+        return counts
+
+    def failures(self) -> List[Tuple[str, str, str]]:
+        """
+        Страницы, которые не удалось загрузить
+
+        Returns:
+            List[Tuple[str, str, str]]: Вид, ID и текст последней ошибки
+        """
+        return self._connection.execute(
+            "SELECT kind, id, error FROM jobs WHERE status = ? ORDER BY kind, id",
+            (FAILED,),
+        ).fetchall()
+
+    def retry_failed(self) -> int:
+        """
+        Вернуть ошибочные страницы в очередь
+
+        Returns:
+            int: Количество возвращённых страниц
+        """
+        with self._connection:
+            cursor = self._connection.execute(
+                "UPDATE jobs SET status = ?, attempts = 0 WHERE status = ?",
+                (PENDING, FAILED),
+            )
+        return cursor.rowcount
+
+    def _claim(self, count: int) -> List[Job]:
+        """
+        Забрать из очереди до ``count`` работ, ближайших к начальным
+        страницам, и пометить их как выполняемые
+        """
+        with self._connection:
+            jobs = self._connection.execute(
+                "SELECT kind, id, depth FROM jobs WHERE status = ? "
+                "ORDER BY depth LIMIT ?",
+                (PENDING, count),
+            ).fetchall()
+            self._connection.executemany(
+                "UPDATE jobs SET status = ? WHERE kind = ? AND id = ?",
+                [(RUNNING, kind, entity_id) for kind, entity_id, _ in jobs],
+            )
+        return jobs
+
+    def _visit(self, job: Job) -> Tuple[List[Tuple[str, Any]], List[Job]]:
+        """
+        Загрузить страницу работы (выполняется в рабочем потоке)
+
+        Args:
+            job: Вид, ID и глубина
+
+        Returns:
+            Найденные сущности (вид, объект) и новые работы
+        """
+        kind, entity_id, depth = job
+        entities: List[Tuple[str, Any]] = []
+        edges: List[Job] = []
+        follow = self.max_depth is None or depth < self.max_depth
+
+        if kind == BAND:
+            band = Band.for_id(entity_id).load()
+            entities.append((BAND, band))
+            if follow and ALBUMS in self.follow:
+                edges.extend((ALBUM, album.id, depth + 1) for album in band.albums)
+            if follow and SIMILAR_ARTISTS in self.follow:
+                similar_artists = band.similar_artists
+                entities.append((SIMILAR_ARTISTS, similar_artists))
+                edges.extend(
+                    (BAND, similar.id, depth + 1) for similar in similar_artists
+                )
+        elif kind == ALBUM:
+            album = AlbumWrapper.for_id(entity_id).load()
+            entities.append((ALBUM, album))
+            if TRACKS in self.follow or LYRICS in self.follow:
+                # Треки находятся на странице альбома, отдельного запроса нет
+                tracks = album.tracks
+                if TRACKS in self.follow:
+                    entities.extend((TRACK, track) for track in tracks)
+                if follow and LYRICS in self.follow:
+                    edges.extend((LYRICS, track.id, depth + 1) for track in tracks)
+        elif kind == LYRICS:
+            entities.append((LYRICS, Lyrics(entity_id).load()))
+        return entities, edges
+
+    def _finish(self, job: Job, edges: List[Job]) -> None:
+        kind, entity_id, _ = job
+        with self._connection:
+            self._enqueue(edges)
+            self._connection.execute(
+                "UPDATE jobs SET status = ?, error = NULL, updated = ? "
+                "WHERE kind = ? AND id = ?",
+                (DONE, time.time(), kind, entity_id),
+            )
+
+    def _fail(self, job: Job, error: BaseException) -> None:
+        kind, entity_id, _ = job
+        with self._connection:
+            self._connection.execute(
+                "UPDATE jobs SET attempts = attempts + 1, error = ?, updated = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END "
+                "WHERE kind = ? AND id = ?",
+                (
+                    f"{type(error).__name__}: {error}",
+                    time.time(),
+                    self.max_attempts,
+                    FAILED,
+                    PENDING,
+                    kind,
+                    entity_id,
+                ),
+            )
+
+    def run(
+        self,
+        on_entity: Optional[Callable[[str, Any], None]] = None,
+        limit: Optional[int] = None,
+    ) -> Dict[str, int]:
+        """
+        Обходить страницы, пока очередь не опустеет.
+
+        Результат каждой страницы (её состояние и найденные ссылки)
+        сохраняется сразу, поэтому обход можно прервать в любой момент и
+        продолжить новым вызовом ``run`` - в том числе в другом процессе.
+
+        Args:
+            on_entity: Функция, которая получает вид (``BAND``, ``ALBUM``,
+                ``TRACK``, ``LYRICS``, ``SIMILAR_ARTISTS``) и объект каждой
+                найденной сущности (для ``SIMILAR_ARTISTS`` - список похожих
+                групп); вызывается в потоке, запустившем обход
+            limit: Максимальное количество страниц за этот запуск
+
+        Returns:
+            dict: Количество работ в каждом состоянии после обхода
+        """
+        processed = 0
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                while True:
+                    free = self.max_workers - len(running)
+                    if limit is not None:
+                        free = min(free, limit - processed - len(running))
+                    if free > 0:
+                        for job in self._claim(free):
+                            # Рабочие потоки используют карту идентичности
+                            # вызывающего кода
+                            context = contextvars.copy_context()
+                            future = executor.submit(context.run, self._visit, job)
+                            running[future] = job
+                    if not running:
+                        break
+
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        # Работа остаётся в running, пока её результат не
+                        # сохранён: если обработчик упадёт, блок finally
+                        # вернёт её в очередь и страница будет загружена
+                        # снова при следующем запуске
+                        job = running[future]
+                        processed += 1
+                        error = future.exception()
+                        if error is not None:
+                            self._fail(job, error)
+                        else:
+                            entities, edges = future.result()
+                            if on_entity is not None:
+                                for kind, entity in entities:
+                                    on_entity(kind, entity)
+                            self._finish(job, edges)
+                        del running[future]
+            finally:
+                for future in running:
+                    future.cancel()
+                # Невыполненные работы вернутся в очередь при следующем запуске
+                with self._connection:
+                    self._connection.executemany(
+                        "UPDATE jobs SET status = ? "
+                        "WHERE kind = ? AND id = ? AND status = ?",
+                        [
+                            (PENDING, kind, entity_id, RUNNING)
+                            for kind, entity_id, _ in running.values()
+                        ],
+                    )
+        return self.stats()
@@ -0,0 +1,465 @@
+"""Выгрузка результатов поиска и коллекций в колоночном виде
+
+Строки страниц расширенного поиска разбираются прямо из ``aaData`` и
+сразу раскладываются по столбцам, без создания объекта результата на
+каждую строку. Числовые поля (ID, год, длительность...) хранятся в
+массивах ``array('q')`` с маской пропущенных значений, остальные - в
+списках строк. Готовую таблицу можно записать в CSV или NDJSON, а при
+установленных NumPy и pyarrow - получить массивы NumPy или таблицу Arrow:
+``export_album_search('Tuonela').to_csv(file)``.
+"""
+
+import array
+import csv
+import json
+import re
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from metallum import operations
+from metallum.models.fragments import parse_cell
+from metallum.models.metallum import Metallum
+from metallum.utils import bind_arguments, import_optional
+
+INT = "int"
+STR = "str"
+
+# Дата выпуска в комментарии ячейки: "March 29th, 1999 <!-- 1999-03-29 -->"
+_COMMENT_DATE = re.compile(r"<!--\s*(\d{4})-(\d{2})-(\d{2})\s*-->")
+_COMMENT = re.compile(r"\s*<!--.*?-->\s*", re.S)
+
+
+def _int(value) -> Optional[int]:
+    """
+    >>> _int('125'), _int(''), _int(None), _int(1986)
+    (125, None, None, 1986)
+    """
+    if isinstance(value, int):
+        return value
+    if value and value.isdigit():
+        return int(value)
+    return None
+
+
+class IntColumn:
+    """Столбец целых чисел с пропусками: массив int64 и байтовая маска"""
+
+    __slots__ = ("values", "valid")
+
+    def __init__(self):
+        self.values = array.array("q")
+        self.valid = bytearray()
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def __getitem__(self, index: int) -> Optional[int]:
+        return self.values[index] if self.valid[index] else None
+
+    def append(self, value: Optional[int]) -> None:
+        """
+        Добавить значение
+
+        Args:
+            value: Число или None для пропуска
+        """
+        if value is None:
+            self.values.append(0)
+            self.valid.append(0)
+        else:
+            self.values.append(value)
+            self.valid.append(1)
+
+    def to_numpy(self):
+        """
+        Массив NumPy int64; при наличии пропусков - маскированный массив
+
+        Returns:
+            numpy.ndarray
+        """
+        numpy = import_optional("numpy")
+        data = numpy.array(self.values, dtype=numpy.int64)
+        if all(self.valid):
+            return data
+        mask = numpy.frombuffer(bytes(self.valid), dtype=numpy.uint8) == 0
+        return numpy.ma.MaskedArray(data, mask=mask)
+
+    def to_arrow(self):
+        """
+        Массив Arrow int64 из буфера значений, без преобразования по элементам
+
+        Returns:
+            pyarrow.Array
+        """
+        pyarrow = import_optional("pyarrow")
+        bitmap = None
+        if not all(self.valid):
+            packed = bytearray((len(self.valid) + 7) // 8)
+            for index, valid in enumerate(self.valid):
+                if valid:
+                    packed[index >> 3] |= 1 << (index & 7)
+            bitmap = pyarrow.py_buffer(bytes(packed))
+        return pyarrow.Array.from_buffers(
+            pyarrow.int64(),
+            len(self.values),
+            [bitmap, pyarrow.py_buffer(self.values.tobytes())],
+        )
+
+
+class Table:
+    """
+    Колоночная таблица выгрузки
+
+    Атрибуты:
+        columns: Столбцы по именам, в порядке схемы
+    """
+
+    def __init__(self, schema: Iterable[Tuple[str, str]]):
+        self.columns: Dict[str, Any] = {
+            name: IntColumn() if kind == INT else [] for name, kind in schema
+        }
+
+    def __len__(self) -> int:
+        return len(next(iter(self.columns.values()), ()))
+
+    def __getitem__(self, name: str):
+        return self.columns[name]
+
+    def rows(self) -> Iterator[Tuple]:
+        """
+        Перебрать строки таблицы (для построчных форматов)
+
+        Returns:
+            Iterator[Tuple]: Значения строки в порядке столбцов
+        """
+        columns = list(self.columns.values())
+        for index in range(len(self)):
+            yield tuple(column[index] for column in columns)
+
+    def to_csv(self, file: IO[str]) -> None:
+        """
+        Записать таблицу в CSV с заголовком; пропуски - пустые строки
+
+        Args:
+            file: Текстовый файл, открытый с ``newline=''``
+        """
+        writer = csv.writer(file)
+        writer.writerow(self.columns)
+        writer.writerows(
+            ("" if value is None else value for value in row) for row in self.rows()
+        )
+
+    def to_ndjson(self, file: IO[str]) -> None:
+        """
+        Записать таблицу в NDJSON: по одному JSON-объекту на строку
+
+        Args:
+            file: Текстовый файл
+        """
+        names = list(self.columns)
+        for row in self.rows():
+            file.write(json.dumps(dict(zip(names, row)), ensure_ascii=False))
+            file.write("\n")
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Столбцы в виде массивов NumPy (строки - массивы объектов)
+
+        Returns:
+            dict: Массивы по именам столбцов
+        """
+        numpy = import_optional("numpy")
+        return {
+            name: (
+                column.to_numpy()
+                if isinstance(column, IntColumn)
+                else numpy.array(column, dtype=object)
+            )
+            for name, column in self.columns.items()
+        }
+
+    def to_arrow(self):
+        """
+        Таблица Arrow (требуется pyarrow)
+
+        Returns:
+            pyarrow.Table
+        """
+        pyarrow = import_optional("pyarrow")
+        return pyarrow.table(
+            {
+                name: (
+                    column.to_arrow()
+                    if isinstance(column, IntColumn)
+                    else pyarrow.array(column, type=pyarrow.string())
+                )
+                for name, column in self.columns.items()
+            }
+        )
+
+    def write_arrow(self, file) -> None:
+        """
+        Записать таблицу в файл Arrow IPC (Feather v2)
+
+        Args:
+            file: Путь или бинарный файл
+        """
+        ipc = import_optional("pyarrow.ipc")
+        table = self.to_arrow()
+        with ipc.new_file(file, table.schema) as writer:
+            writer.write_table(table)
+
+
+class _RawPage(list):
+    """Страница расширенного поиска без разбора строк: ячейки ``aaData``"""
+
+    result_count = 0
+
+
+def _raw_search(search, url_builder):
+    """
+    Функция поиска с той же сигнатурой, что ``search``, возвращающая
+    необработанные строки страницы
+
+    Args:
+        search: Функция поиска из ``metallum.operations``
+        url_builder: Функция, строящая URL поиска по аргументам
+
+    Returns:
+        Callable: Функция, возвращающая _RawPage
+    """
+
+    def fetch(*args, **kwargs) -> _RawPage:
+        url = url_builder(bind_arguments(search, args, kwargs))
+        data = json.loads(Metallum(url).content)
+        page = _RawPage(data["aaData"])
+        page.result_count = int(data["iTotalRecords"])
+        return page
+
+    return fetch
+
+
+def _export_search(search, url_builder, schema, add_row, args, kwargs) -> Table:
+    limit = kwargs.pop("limit", None)
+    prefetch = kwargs.pop("prefetch", True)
+    table = Table(schema)
+    columns = table.columns
+    rows = operations.iter_search(
+        _raw_search(search, url_builder), args, kwargs, limit, prefetch
+    )
+    for cells in rows:
+        add_row(columns, cells)
+    return table
+
+
+def _release_date(cell: str) -> Tuple[str, Optional[int]]:
+    """
+    >>> _release_date('March 29th, 1999 <!-- 1999-03-29 -->')
+    ('1999-03-29', 1999)
+    """
+    match = _COMMENT_DATE.search(cell)
+    if match is None:
+        return _COMMENT.sub("", cell).strip(), None
+    return "-".join(match.groups()), int(match[1])
+
+
+BAND_SEARCH_SCHEMA = (("id", INT), ("name", STR), ("genre", STR), ("country", STR))
+
+
+def _add_band_row(columns, cells: List[str]) -> None:
+    band = parse_cell(cells[0])
+    columns["id"].append(_int(band.id))
+    columns["name"].append(band.text)
+    columns["genre"].append(cells[1])
+    columns["country"].append(cells[2])
+
+
+def export_band_search(name, *args, **kwargs) -> Table:
+    """
+    Выгрузить все результаты поиска группы в колоночную таблицу
+
+    Args:
+        name: Название группы
+        *args: Остальные аргументы ``band_search``
+        **kwargs: Аргументы ``band_search``, а также ``limit`` и ``prefetch``
+            как у ``iter_band_search``
+
+    Returns:
+        Table: Столбцы id, name, genre, country
+    """
+    return _export_search(
+        operations.band_search,
+        operations.band_search_url,
+        BAND_SEARCH_SCHEMA,
+        _add_band_row,
+        (name, *args),
+        kwargs,
+    )
+
+
+ALBUM_SEARCH_SCHEMA = (
+    ("id", INT),
+    ("title", STR),
+    ("band_id", INT),
+    ("band", STR),
+    ("type", STR),
+    ("date", STR),
+    ("year", INT),
+)
+
+
+def _add_album_row(columns, cells: List[str]) -> None:
+    band = parse_cell(cells[0])
+    album = parse_cell(cells[1])
+    date, year = _release_date(cells[3]) if len(cells) > 3 else ("", None)
+    columns["id"].append(_int(album.id))
+    columns["title"].append(album.text)
+    columns["band_id"].append(_int(band.id))
+    columns["band"].append(band.text)
+    columns["type"].append(cells[2])
+    columns["date"].append(date)
+    columns["year"].append(year)
+
+
+def export_album_search(title, *args, **kwargs) -> Table:
+    """
+    Выгрузить все результаты поиска альбома в колоночную таблицу
+
+    Args:
+        title: Название альбома
+        *args: Остальные аргументы ``album_search``
+        **kwargs: Аргументы ``album_search``, а также ``limit`` и
+            ``prefetch`` как у ``iter_album_search``
+
+    Returns:
+        Table: Столбцы id, title, band_id, band, type, date, year
+    """
+    return _export_search(
+        operations.album_search,
+        operations.album_search_url,
+        ALBUM_SEARCH_SCHEMA,
+        _add_album_row,
+        (title, *args),
+        kwargs,
+    )
+
+
+SONG_SEARCH_SCHEMA = (
+    ("lyrics_id", INT),
+    ("title", STR),
+    ("band_id", INT),
+    ("band", STR),
+    ("album_id", INT),
+    ("album", STR),
+    ("type", STR),
+    ("genre", STR),
+)
+
+
+def _add_song_row(columns, cells: List[str]) -> None:
+    band = parse_cell(cells[0])
+    album = parse_cell(cells[1])
+    lyrics = parse_cell(cells[5]) if len(cells) > 5 else None
+    columns["lyrics_id"].append(_int(lyrics.text) if lyrics else None)
+    columns["title"].append(cells[3])
+    columns["band_id"].append(_int(band.id))
+    columns["band"].append(band.text)
+    columns["album_id"].append(_int(album.id))
+    columns["album"].append(album.text)
+    columns["type"].append(cells[2])
+    columns["genre"].append(cells[4])
+
+
+def export_song_search(title, *args, **kwargs) -> Table:
+    """
+    Выгрузить все результаты поиска песни в колоночную таблицу
+
+    Args:
+        title: Название песни
+        *args: Остальные аргументы ``song_search``
+        **kwargs: Аргументы ``song_search``, а также ``limit`` и ``prefetch``
+            как у ``iter_song_search``
+
+    Returns:
+        Table: Столбцы lyrics_id, title, band_id, band, album_id, album,
+        type, genre
+    """
+    return _export_search(
+        operations.song_search,
+        operations.song_search_url,
+        SONG_SEARCH_SCHEMA,
+        _add_song_row,
+        (title, *args),
+        kwargs,
+    )
+
+
+ALBUMS_SCHEMA = (
+    ("id", INT),
+    ("title", STR),
+    ("type", STR),
+    ("year", INT),
+    ("score", INT),
+    ("review_count", INT),
+)
+
+
+def export_albums(albums: Iterable) -> Table:
+    """
+    Выгрузить альбомы (например, ``band.albums`` или результат его
+    ``search``) в колоночную таблицу. Используются только поля строки
+    дискографии, страницы альбомов не загружаются.
+
+    Args:
+        albums: Альбомы
+
+    Returns:
+        Table: Столбцы id, title, type, year, score, review_count
+    """
+    table = Table(ALBUMS_SCHEMA)
+    columns = table.columns
+    for album in albums:
+        columns["id"].append(_int(album.id))
+        columns["title"].append(album.title)
+        columns["type"].append(album.type)
+        columns["year"].append(album.year)
+        columns["score"].append(album.score)
+        columns["review_count"].append(album.review_count)
+    return table
+
+
+TRACKS_SCHEMA = (
+    ("id", STR),
+    ("number", INT),
+    ("overall_number", INT),
+    ("disc_number", INT),
+    ("title", STR),
+    ("full_title", STR),
+    ("duration", INT),
+    ("band_id", INT),
+)
+
+
+def export_tracks(tracks: Iterable) -> Table:
+    """
+    Выгрузить треки (например, ``album.tracks``) в колоночную таблицу
+
+    Args:
+        tracks: Треки
+
+    Returns:
+        Table: Столбцы id, number, overall_number, disc_number, title,
+        full_title, duration, band_id
+    """
+    table = Table(TRACKS_SCHEMA)
+    columns = table.columns
+    for track in tracks:
+        band = track.band
+        columns["id"].append(track.id)
+        columns["number"].append(track.number)
+        columns["overall_number"].append(track.overall_number)
+        columns["disc_number"].append(track.disc_number)
+        columns["title"].append(track.title)
+        columns["full_title"].append(track.full_title)
+        columns["duration"].append(track.duration)
+        columns["band_id"].append(_int(band.id) if band is not None else None)
+    return table
@@ -0,0 +1,288 @@
+"""Граф похожих групп
+
+Граф строится обходом в ширину от начальных групп: каждый уровень
+загружается параллельно через общий транспорт (с его ограничением
+частоты запросов), каждая группа загружается один раз. Для построения
+графа нужны только вкладки похожих групп, страницы самих групп не
+загружаются. Рёбра с оценками хранятся в сжатом виде CSR - три массива
+``array('q')``::
+
+    graph = build_similar_artists_graph(["125"], max_depth=2, max_nodes=5000)
+    graph.top_k("125", 5)
+    graph.to_table().to_csv(file)
+"""
+
+import array
+import contextvars
+import json
+from concurrent.futures import ThreadPoolExecutor
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from metallum.consts import POOL_SIZE
+from metallum.export import INT, Table
+from metallum.models import Band
+from metallum.utils import import_optional
+
+EDGES_SCHEMA = (("source", INT), ("target", INT), ("score", INT))
+
+
+class SimilarArtistsGraph:
+    """
+    Взвешенный ориентированный граф похожих групп в формате CSR.
+
+    Соседи вершины ``i`` - ``indices[indptr[i]:indptr[i + 1]]`` с оценками
+    ``weights[...]`` в том же диапазоне, по убыванию оценки.
+
+    Атрибуты:
+        ids: ID групп по номерам вершин
+        names: Названия групп (None, если группа встречалась только как
+            начальная)
+        indptr: Начало списка соседей каждой вершины (длина - вершин + 1)
+        indices: Номера вершин-соседей
+        weights: Оценки рёбер
+        failures: Группы, похожих которых не удалось загрузить: (ID,
+            исключение)
+    """
+
+    def __init__(
+        self,
+        ids: Sequence[str],
+        names: Sequence[Optional[str]],
+        indptr: Iterable[int],
+        indices: Iterable[int],
+        weights: Iterable[int],
+    ):
+        self.ids = list(ids)
+        self.names = list(names)
+        self.indptr = array.array("q", indptr)
+        self.indices = array.array("q", indices)
+        self.weights = array.array("q", weights)
+        self.failures: List[Tuple[str, BaseException]] = []
+        self._index = {band_id: i for i, band_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_adjacency(
+        cls,
+        adjacency: Dict[str, List[Tuple[str, int]]],
+        names: Dict[str, Optional[str]],
+    ) -> "SimilarArtistsGraph":
+        """
+        Построить граф из списков смежности
+
+        Args:
+            adjacency: ID группы -> пары (ID похожей группы, оценка)
+            names: ID группы -> название; порядок ключей задаёт номера
+                вершин и должен включать все группы из ``adjacency``
+
+        Returns:
+            SimilarArtistsGraph: Граф
+        """
+        index = {band_id: i for i, band_id in enumerate(names)}
+        indptr, indices, weights = [0], [], []
+        for band_id in names:
+            edges = sorted(adjacency.get(band_id, ()), key=lambda e: -e[1])
+            indices.extend(index[target] for target, _ in edges)
+            weights.extend(score for _, score in edges)
+            indptr.append(len(indices))
+        return cls(list(names), list(names.values()), indptr, indices, weights)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, band_id) -> bool:
+        return str(band_id) in self._index
+
+    def __repr__(self):
+        return f"<SimilarArtistsGraph: {len(self)} bands, {self.edge_count} edges>"
+
+    @property
+    def edge_count(self) -> int:
+        """Количество рёбер"""
+        return len(self.indices)
+
+    def neighbours(self, band_id: str) -> List[Tuple[str, int]]:
+        """
+        Похожие группы по убыванию оценки
+
+        Args:
+            band_id: ID группы
+
+        Returns:
+            List[Tuple[str, int]]: ID похожей группы и оценка
+        """
+        return self.top_k(band_id, None)
+
+    def top_k(self, band_id: str, k: Optional[int]) -> List[Tuple[str, int]]:
+        """
+        ``k`` самых похожих групп
+
+        Args:
+            band_id: ID группы
+            k: Количество групп (None - все)
+
+        Returns:
+            List[Tuple[str, int]]: ID похожей группы и оценка
+        """
+        node = self._index[str(band_id)]
+        start, end = self.indptr[node], self.indptr[node + 1]
+        if k is not None:
+            end = min(end, start + k)
+        return [
+            (self.ids[self.indices[i]], self.weights[i]) for i in range(start, end)
+        ]
+
+    def edges(self) -> Iterator[Tuple[str, str, int]]:
+        """
+        Перебрать рёбра
+
+        Returns:
+            Iterator[Tuple[str, str, int]]: ID группы, ID похожей группы и
+            оценка
+        """
+        for node, band_id in enumerate(self.ids):
+            for i in range(self.indptr[node], self.indptr[node + 1]):
+                yield band_id, self.ids[self.indices[i]], self.weights[i]
+
+    def to_table(self) -> Table:
+        """
+        Рёбра в колоночной таблице (CSV, NDJSON, NumPy, Arrow)
+
+        Returns:
+            Table: Столбцы source, target, score
+        """
+        table = Table(EDGES_SCHEMA)
+        columns = table.columns
+        for source, target, score in self.edges():
+            columns["source"].append(int(source))
+            columns["target"].append(int(target))
+            columns["score"].append(score)
+        return table
+
+    def to_numpy(self) -> Dict[str, object]:
+        """
+        Массивы CSR в виде массивов NumPy без копирования
+
+        Returns:
+            dict: indptr, indices, weights
+        """
+        numpy = import_optional("numpy")
+        return {
+            name: numpy.frombuffer(getattr(self, name), dtype=numpy.int64)
+            for name in ("indptr", "indices", "weights")
+        }
+
+    def to_scipy(self):
+        """
+        Разреженная матрица смежности (требуется SciPy)
+
+        Returns:
+            scipy.sparse.csr_matrix: Оценки рёбер; строки и столбцы -
+            вершины в порядке ``ids``
+        """
+        sparse = import_optional("scipy.sparse")
+        arrays = self.to_numpy()
+        return sparse.csr_matrix(
+            (arrays["weights"], arrays["indices"], arrays["indptr"]),
+            shape=(len(self), len(self)),
+        )
+
+    def save(self, file: IO[str]) -> None:
+        """
+        Записать граф в JSON
+
+        Args:
+            file: Текстовый файл
+        """
+        json.dump(
+            {
+                "ids": self.ids,
+                "names": self.names,
+                "indptr": self.indptr.tolist(),
+                "indices": self.indices.tolist(),
+                "weights": self.weights.tolist(),
+            },
+            file,
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def load(cls, file: IO[str]) -> "SimilarArtistsGraph":
+        """
+        Прочитать граф, записанный ``save``
+
+        Args:
+            file: Текстовый файл
+
+        Returns:
+            SimilarArtistsGraph: Граф
+        """
+        data = json.load(file)
+        return cls(
+            data["ids"], data["names"], data["indptr"], data["indices"], data["weights"]
+        )
+
+
+def _similar(band_id: str) -> List[Tuple[str, str, int]]:
+    """Похожие группы одной группы: ID, название и оценка"""
+    return [
+        (similar.id, similar.name, similar.score)
+        for similar in Band.for_id(band_id).similar_artists
+    ]
+
+
+def build_similar_artists_graph(
+    seeds: Iterable[str],
+    max_depth: Optional[int] = None,
+    max_nodes: Optional[int] = None,
+    max_workers: int = POOL_SIZE,
+) -> SimilarArtistsGraph:
+    """
+    Построить граф похожих групп обходом в ширину
+
+    Args:
+        seeds: ID начальных групп
+        max_depth: Максимальное расстояние от начальных групп, на котором
+            ещё загружаются похожие (None - без ограничения)
+        max_nodes: Максимальное количество групп, похожие которых
+            загружаются (None - без ограничения). Группы, найденные сверх
+            этого количества, остаются в графе вершинами без рёбер.
+        max_workers: Максимальное количество одновременных загрузок
+
+    Returns:
+        SimilarArtistsGraph: Граф; ошибки загрузки - в ``failures``
+    """
+    names: Dict[str, Optional[str]] = dict.fromkeys(map(str, seeds))
+    adjacency: Dict[str, List[Tuple[str, int]]] = {}
+    failures = []
+    frontier = list(names)
+    depth = 0
+
+    def submit(executor, band_id):
+        # Рабочие потоки используют карту идентичности вызывающего кода
+        return executor.submit(contextvars.copy_context().run, _similar, band_id)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while frontier:
+            if max_nodes is not None:
+                frontier = frontier[: max(max_nodes - len(adjacency), 0)]
+            futures = [(band_id, submit(executor, band_id)) for band_id in frontier]
+            frontier = []
+            for band_id, future in futures:
+                try:
+                    similar = future.result()
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    failures.append((band_id, error))
+                    similar = []
+                adjacency[band_id] = [(target, score) for target, _, score in similar]
+                for target, name, _ in similar:
+                    if target not in names:
+                        frontier.append(target)
+                    if names.get(target) is None:
+                        names[target] = name
+            depth += 1
+            if max_depth is not None and depth > max_depth:
+                break
+
+    graph = SimilarArtistsGraph.from_adjacency(adjacency, names)
+    graph.failures = failures
+    return graph
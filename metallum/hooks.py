@@ -0,0 +1,472 @@
+"""События жизненного цикла запросов и замеры времени
+
+Загрузка каждой страницы сопровождается событиями: попадание или промах
+кеша, начало и конец запроса, ожидание ограничителя частоты, каждый
+HTTP-ответ и разбор HTML. Обработчики подключаются через ``Hooks`` и ``set_hooks``; пока
+обработчиков нет, события не создаются. ``LatencyAggregator`` собирает
+перцентили длительностей по видам страниц::
+
+    aggregator = LatencyAggregator()
+    set_hooks(Hooks(on_event=aggregator, on_cache_miss=print))
+    ...
+    aggregator.summary()
+"""
+
+import random
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from metallum.consts import BASE_URL
+
+# Виды событий
+REQUEST_START = "request_start"
+REQUEST_END = "request_end"
+CACHE_HIT = "cache_hit"
+CACHE_MISS = "cache_miss"
+RATE_LIMIT_WAIT = "rate_limit_wait"
+PARSE = "parse"
+RESPONSE = "response"
+EVENTS = (
+    REQUEST_START,
+    REQUEST_END,
+    CACHE_HIT,
+    CACHE_MISS,
+    RATE_LIMIT_WAIT,
+    PARSE,
+    RESPONSE,
+)
+
+# Уровни кеша, из которых может быть получена страница
+MEMORY = "memory"
+PERSISTENT = "persistent"
+
+# Вид страницы: первый сегмент для страниц сущностей ("bands/_/125"),
+# два сегмента для остальных ("band/discography/id/125/tab/all"), тип
+# поиска для расширенного поиска
+_ENDPOINT = re.compile(
+    r"^(?:bands|albums|songs)(?=/|$)|^[^/?]+(?:/[^/?]+)?(?:/searching/[^/?]+)?"
+)
+
+
+def endpoint(url: str) -> str:
+    """
+    Вид страницы по её URL-адресу, без ID и параметров запроса
+
+    Args:
+        url: Абсолютный или относительный URL-адрес
+
+    Returns:
+        str: Вид страницы
+
+    Examples:
+        >>> endpoint('https://www.metal-archives.com/bands/_/125')
+        'bands'
+        >>> endpoint('band/discography/id/125/tab/all')
+        'band/discography'
+        >>> endpoint('search/ajax-advanced/searching/albums/?bandName=Amorphis')
+        'search/ajax-advanced/searching/albums'
+    """
+    if url.startswith(BASE_URL):
+        url = url[len(BASE_URL) + 1 :]
+    match = _ENDPOINT.match(url)
+    return match[0] if match else url
+
+
+class Event:
+    """
+    Событие загрузки страницы
+
+    Атрибуты:
+        name: Вид события (``EVENTS``)
+        url: Абсолютный URL-адрес страницы
+        entity: Класс сущности, загружающей страницу (например, ``Band``)
+        size: Размер страницы в байтах (UTF-8), если он известен; у
+            ``RESPONSE`` - размер тела ответа, как он получен с сайта.
+            Если событие создано по содержимому страницы, размер
+            вычисляется при первом обращении
+        duration: Длительность в секундах; у ``REQUEST_END`` она включает
+            ожидание ограничителя и повторы после 429/503, у ``RESPONSE`` -
+            только HTTP-запрос
+        error: Исключение, если запрос завершился ошибкой
+        status: HTTP-статус (``RESPONSE``)
+        tier: Уровень кеша, вернувший страницу (``CACHE_HIT``):
+            ``MEMORY`` или ``PERSISTENT``
+    """
+
+    __slots__ = (
+        "name",
+        "url",
+        "entity",
+        "duration",
+        "error",
+        "status",
+        "tier",
+        "_size",
+        "_content",
+    )
+
+    def __init__(
+        self,
+        name: str,
+        url: str,
+        entity: Optional[str] = None,
+        size: Optional[int] = None,
+        duration: Optional[float] = None,
+        error: Optional[BaseException] = None,
+        status: Optional[int] = None,
+        tier: Optional[str] = None,
+        *,
+        content: Optional[str] = None,
+    ):
+        self.name = name
+        self.url = url
+        self.entity = entity
+        self.duration = duration
+        self.error = error
+        self.status = status
+        self.tier = tier
+        self._size = size
+        self._content = content
+
+    @property
+    def size(self) -> Optional[int]:
+        """Размер страницы в байтах (UTF-8) или None, если он неизвестен"""
+        if self._content is not None:
+            self._size = len(self._content.encode("utf-8"))
+            # Содержимое больше не нужно событию, даже если его сохранили
+            self._content = None
+        return self._size
+
+    @property
+    def endpoint(self) -> str:
+        """Вид страницы (см. ``endpoint``)"""
+        return endpoint(self.url)
+
+    def __repr__(self) -> str:
+        return (
+            f"Event(name={self.name!r}, url={self.url!r}, entity={self.entity!r}, "
+            f"duration={self.duration!r}, error={self.error!r}, "
+            f"status={self.status!r}, tier={self.tier!r})"
+        )
+
+
+Callback = Callable[[Event], None]
+
+
+class Hooks:
+    """
+    Обработчики событий загрузки страниц.
+
+    Обработчики вызываются синхронно в потоке, который загружает
+    страницу, поэтому они должны быть быстрыми и потокобезопасными.
+    Исключения обработчиков не перехватываются.
+
+    Args:
+        on_request_start: Перед запросом к сайту
+        on_request_end: После запроса к сайту (в том числе неудачного)
+        on_cache_hit: Страница найдена в кеше
+        on_cache_miss: Страницы нет в кеше
+        on_rate_limit_wait: Запрос ждал ограничителя частоты
+        on_parse: Страница разобрана в дерево документа
+        on_response: Транспорт получил HTTP-ответ (на каждую попытку)
+        on_event: Для всех событий
+    """
+
+    def __init__(
+        self,
+        on_request_start: Optional[Callback] = None,
+        on_request_end: Optional[Callback] = None,
+        on_cache_hit: Optional[Callback] = None,
+        on_cache_miss: Optional[Callback] = None,
+        on_rate_limit_wait: Optional[Callback] = None,
+        on_parse: Optional[Callback] = None,
+        on_response: Optional[Callback] = None,
+        on_event: Optional[Callback] = None,
+    ):
+        self._callbacks: Dict[str, List[Callback]] = {name: [] for name in EVENTS}
+        for name, callback in zip(
+            EVENTS,
+            (
+                on_request_start,
+                on_request_end,
+                on_cache_hit,
+                on_cache_miss,
+                on_rate_limit_wait,
+                on_parse,
+                on_response,
+            ),
+        ):
+            if callback is not None:
+                self.add(name, callback)
+        if on_event is not None:
+            self.add_all(on_event)
+
+    def add(self, name: str, callback: Callback) -> Callback:
+        """
+        Подключить обработчик события
+
+        Args:
+            name: Вид события
+            callback: Функция, получающая ``Event``
+
+        Returns:
+            Этот же обработчик
+        """
+        if name not in self._callbacks:
+            raise ValueError(f"unknown event: {name}")
+        self._callbacks[name].append(callback)
+        return callback
+
+    def add_all(self, callback: Callback, names: Iterable[str] = EVENTS) -> Callback:
+        """
+        Подключить обработчик нескольких событий
+
+        Args:
+            callback: Функция, получающая ``Event``
+            names: Виды событий (по умолчанию - все)
+
+        Returns:
+            Этот же обработчик
+        """
+        for name in names:
+            self.add(name, callback)
+        return callback
+
+    def remove(self, name: str, callback: Callback) -> None:
+        """
+        Отключить обработчик события
+
+        Args:
+            name: Вид события
+            callback: Обработчик
+        """
+        self._callbacks[name].remove(callback)
+
+    @property
+    def empty(self) -> bool:
+        """Нет ни одного обработчика"""
+        return not any(self._callbacks.values())
+
+    def emit(self, event: Event) -> None:
+        """
+        Передать событие обработчикам
+
+        Args:
+            event: Событие
+        """
+        for callback in self._callbacks[event.name]:
+            callback(event)
+
+
+_hooks: Optional[Hooks] = None
+
+
+def get_hooks() -> Optional[Hooks]:
+    """
+    Получить подключённые обработчики событий
+
+    Returns:
+        Hooks: Обработчики или None, если события отключены
+    """
+    return _hooks
+
+
+def set_hooks(hooks: Optional[Hooks]) -> Optional[Hooks]:
+    """
+    Подключить обработчики событий для всего процесса
+
+    Args:
+        hooks: Обработчики или None, чтобы отключить события
+
+    Returns:
+        Hooks: Предыдущие обработчики
+    """
+    global _hooks
+    previous, _hooks = _hooks, hooks
+    return previous
+
+
+def emit(
+    name: str,
+    url: str,
+    entity: Optional[str] = None,
+    content: Optional[str] = None,
+    duration: Optional[float] = None,
+    error: Optional[BaseException] = None,
+    status: Optional[int] = None,
+    tier: Optional[str] = None,
+    size: Optional[int] = None,
+) -> None:
+    """
+    Создать событие и передать его обработчикам, если они подключены.
+    Размер страницы по ``content`` вычисляется, только если обработчик
+    читает ``Event.size``.
+
+    Args:
+        name: Вид события
+        url: Абсолютный URL-адрес
+        entity: Класс сущности
+        content: Содержимое страницы
+        duration: Длительность в секундах
+        error: Исключение
+        status: HTTP-статус
+        tier: Уровень кеша
+        size: Размер в байтах, если он уже известен (вместо ``content``)
+    """
+    hooks = _hooks
+    if hooks is None:
+        return
+    hooks.emit(
+        Event(name, url, entity, size, duration, error, status, tier, content=content)
+    )
+
+
+def _percentile(ordered: List[float], q: float) -> float:
+    """
+    Перцентиль по методу ближайшего ранга
+
+    >>> _percentile([1.0, 2.0, 3.0, 4.0], 50), _percentile([1.0, 2.0], 99)
+    (2.0, 2.0)
+    """
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class LatencyAggregator:
+    """
+    Сбор длительностей событий по видам страниц для расчёта перцентилей.
+
+    Подключается как обработчик всех событий (``Hooks(on_event=...)``).
+    Для каждой пары (событие, вид страницы) хранится не больше
+    ``max_samples`` длительностей - равномерная выборка (reservoir
+    sampling), поэтому память не растёт при долгом обходе; количество
+    событий и суммарный размер страниц считаются точно.
+
+    Атрибуты:
+        max_samples: Размер выборки на каждую пару
+    """
+
+    def __init__(self, max_samples: int = 10000):
+        self.max_samples = max_samples
+        self._samples: Dict[Tuple[str, str], List[float]] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._sizes: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+        self._random = random.Random()
+
+    def __call__(self, event: Event) -> None:
+        key = (event.name, event.endpoint)
+        with self._lock:
+            count = self._counts.get(key, 0) + 1
+            self._counts[key] = count
+            if event.size is not None:
+                self._sizes[key] = self._sizes.get(key, 0) + event.size
+            if event.duration is None:
+                return
+            samples = self._samples.setdefault(key, [])
+            if len(samples) < self.max_samples:
+                samples.append(event.duration)
+            else:
+                index = self._random.randrange(count)
+                if index < self.max_samples:
+                    samples[index] = event.duration
+
+    def reset(self) -> None:
+        """Забыть собранные данные"""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._sizes.clear()
+
+    def count(self, name: str, endpoint_name: Optional[str] = None) -> int:
+        """
+        Количество событий
+
+        Args:
+            name: Вид события
+            endpoint_name: Вид страницы (None - все)
+
+        Returns:
+            int: Количество событий
+        """
+        with self._lock:
+            return sum(
+                count
+                for (event, page), count in self._counts.items()
+                if event == name and endpoint_name in (None, page)
+            )
+
+    def percentiles(
+        self,
+        name: str,
+        endpoint_name: str,
+        quantiles: Iterable[float] = (50, 90, 99),
+    ) -> Dict[float, float]:
+        """
+        Перцентили длительности событий
+
+        Args:
+            name: Вид события
+            endpoint_name: Вид страницы
+            quantiles: Перцентили (0-100)
+
+        Returns:
+            dict: Перцентиль -> длительность в секундах (пустой, если
+            событий не было)
+        """
+        with self._lock:
+            ordered = sorted(self._samples.get((name, endpoint_name), ()))
+        if not ordered:
+            return {}
+        return {q: _percentile(ordered, q) for q in quantiles}
+
+    def summary(self, quantiles: Iterable[float] = (50, 90, 99)) -> List[dict]:
+        """
+        Сводка по всем событиям и видам страниц, по убыванию суммарной
+        длительности: какие страницы больше всего замедляют обход
+
+        Args:
+            quantiles: Перцентили (0-100)
+
+        Returns:
+            List[dict]: event, endpoint, count, bytes, total (оценка
+            суммарной длительности) и ``p<перцентиль>`` в секундах
+        """
+        quantiles = tuple(quantiles)
+        with self._lock:
+            keys = list(self._counts)
+            snapshot = {key: sorted(self._samples.get(key, ())) for key in keys}
+            counts = dict(self._counts)
+            sizes = dict(self._sizes)
+        rows = []
+        for key in keys:
+            ordered = snapshot[key]
+            row = {
+                "event": key[0],
+                "endpoint": key[1],
+                "count": counts[key],
+                "bytes": sizes.get(key, 0),
+                "total": (
+                    sum(ordered) / len(ordered) * counts[key] if ordered else 0.0
+                ),
+            }
+            for q in quantiles:
+                row[f"p{q:g}"] = _percentile(ordered, q) if ordered else None
+            rows.append(row)
+        rows.sort(key=lambda row: row["total"], reverse=True)
+        return rows
+
+    def cache_hit_ratio(self, endpoint_name: Optional[str] = None) -> Optional[float]:
+        """
+        Доля попаданий в кеш
+
+        Args:
+            endpoint_name: Вид страницы (None - все)
+
+        Returns:
+            float: Доля попаданий или None, если обращений к кешу не было
+        """
+        hits = self.count(CACHE_HIT, endpoint_name)
+        total = hits + self.count(CACHE_MISS, endpoint_name)
+        return hits / total if total else None
@@ -0,0 +1,425 @@
+"""Метрики загрузки страниц в формате Prometheus
+
+Счётчики и гистограммы строятся из событий ``metallum.hooks``: запросы и
+HTTP-статусы по типам страниц, попадания в кеш по уровням, объём
+загруженных данных, ожидание ограничителя частоты и время разбора
+страниц по классам моделей. Пока метрики не включены, обработчик
+событий не подключён и загрузка страниц ничего на них не тратит::
+
+    metrics = enable_metrics()
+    start_http_server(9464)          # или metrics.render() в своём сервере
+"""
+
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from metallum import hooks
+from metallum.hooks import Event
+
+# Границы корзин гистограмм по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Вид страницы (``hooks.endpoint``) -> тип страницы в метках
+_ENDPOINT_TYPES = {
+    "bands": "bands",
+    "albums": "albums",
+    "band/discography": "discography",
+    "band/ajax-recommendations": "recommendations",
+    "release/ajax-view-lyrics": "lyrics",
+}
+
+
+def endpoint_type(url: str) -> str:
+    """
+    Тип страницы для меток метрик
+
+    Args:
+        url: URL-адрес страницы
+
+    Returns:
+        str: bands, albums, discography, recommendations, lyrics, search
+        или other
+
+    Examples:
+        >>> endpoint_type('https://www.metal-archives.com/albums/_/_/547')
+        'albums'
+        >>> endpoint_type('search/ajax-advanced/searching/songs/?songTitle=Orion')
+        'search'
+    """
+    name = hooks.endpoint(url)
+    if name.startswith("search/"):
+        return "search"
+    return _ENDPOINT_TYPES.get(name, "other")
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    """
+    >>> _number(3), _number(0.25), _number(float('inf'))
+    ('3', '0.25', '+Inf')
+    """
+    if value == float("inf"):
+        return "+Inf"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    Счётчик с метками
+
+    Атрибуты:
+        name: Имя метрики
+        help: Описание
+        labelnames: Имена меток
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1) -> None:
+        """
+        Увеличить счётчик
+
+        Args:
+            labels: Значения меток в порядке ``labelnames``
+            amount: Приращение
+        """
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, labels: Tuple[str, ...] = ()) -> float:
+        """Текущее значение счётчика"""
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def items(self) -> List[Tuple[Tuple[str, ...], float]]:
+        """Значения меток и счётчика"""
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self) -> List[str]:
+        """Строки значений в текстовом формате Prometheus"""
+        return [
+            f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"
+            for labels, value in sorted(self.items())
+        ]
+
+
+class Histogram:
+    """
+    Гистограмма с метками
+
+    Атрибуты:
+        name: Имя метрики
+        help: Описание
+        labelnames: Имена меток
+        buckets: Верхние границы корзин
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Метки -> (количество в каждой корзине и сверх последней, сумма)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        """
+        Добавить наблюдение
+
+        Args:
+            value: Значение
+            labels: Значения меток в порядке ``labelnames``
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(
+                labels, ([0] * (len(self.buckets) + 1), [0.0])
+            )
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        """Количество наблюдений"""
+        with self._lock:
+            entry = self._values.get(labels)
+            return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        """Строки значений в текстовом формате Prometheus"""
+        with self._lock:
+            values = sorted(
+                (labels, list(counts), total[0])
+                for labels, (counts, total) in self._values.items()
+            )
+        lines = []
+        for labels, counts, total in values:
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = f'le="{_number(float(bound))}"'
+                lines.append(
+                    f"{self.name}_bucket{_labels(self.labelnames, labels, le)} "
+                    f"{cumulative}"
+                )
+            suffix = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_number(total)}")
+            lines.append(f"{self.name}_count{suffix} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    Метрики загрузки страниц; подключается как обработчик всех событий
+    ``metallum.hooks`` (см. ``enable_metrics``).
+
+    Атрибуты:
+        requests: Загрузки страниц с сайта (type, outcome)
+        responses: HTTP-ответы (type, status), включая повторы после 429/503
+        cache_lookups: Обращения к кешу (type, result, tier)
+        response_bytes: Объём тел HTTP-ответов в байтах (type)
+        request_duration: Длительность загрузки страницы (type), включая
+            ожидание ограничителя
+        rate_limit_wait: Ожидание ограничителя частоты
+        parse_duration: Разбор HTML (model)
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.requests = Counter(
+            "metallum_requests_total",
+            "Pages requested from the site",
+            ("type", "outcome"),
+        )
+        self.responses = Counter(
+            "metallum_http_responses_total",
+            "HTTP responses received, including retried ones",
+            ("type", "status"),
+        )
+        self.cache_lookups = Counter(
+            "metallum_cache_lookups_total",
+            "Page cache lookups by result and the tier that answered",
+            ("type", "result", "tier"),
+        )
+        self.response_bytes = Counter(
+            "metallum_response_bytes_total",
+            "Bytes of response bodies received from the site",
+            ("type",),
+        )
+        self.request_duration = Histogram(
+            "metallum_request_duration_seconds",
+            "Page download time, including rate limiter waits and retries",
+            ("type",),
+            buckets,
+        )
+        self.rate_limit_wait = Histogram(
+            "metallum_rate_limit_wait_seconds",
+            "Time requests spent waiting for the rate limiter",
+            (),
+            buckets,
+        )
+        self.parse_duration = Histogram(
+            "metallum_parse_duration_seconds",
+            "HTML parse time by model class",
+            ("model",),
+            buckets,
+        )
+
+    @property
+    def _metrics(self):
+        return (
+            self.requests,
+            self.responses,
+            self.cache_lookups,
+            self.response_bytes,
+            self.request_duration,
+            self.rate_limit_wait,
+            self.parse_duration,
+        )
+
+    def __call__(self, event: Event) -> None:
+        name = event.name
+        if name == hooks.CACHE_HIT:
+            self.cache_lookups.inc((endpoint_type(event.url), "hit", event.tier))
+        elif name == hooks.CACHE_MISS:
+            self.cache_lookups.inc((endpoint_type(event.url), "miss", ""))
+        elif name == hooks.REQUEST_END:
+            page_type = endpoint_type(event.url)
+            outcome = "error" if event.error is not None else "ok"
+            self.requests.inc((page_type, outcome))
+            self.request_duration.observe(event.duration, (page_type,))
+        elif name == hooks.RESPONSE:
+            page_type = endpoint_type(event.url)
+            self.responses.inc((page_type, str(event.status)))
+            if event.size:
+                self.response_bytes.inc((page_type,), event.size)
+        elif name == hooks.RATE_LIMIT_WAIT:
+            self.rate_limit_wait.observe(event.duration)
+        elif name == hooks.PARSE:
+            self.parse_duration.observe(event.duration, (event.entity,))
+
+    def cache_hit_ratio(self, tier: str = hooks.MEMORY) -> Optional[float]:
+        """
+        Доля обращений, на которые ответил уровень кеша
+
+        Для постоянного кеша доля считается от обращений, которые дошли до
+        него (то есть не нашлись в памяти).
+
+        Args:
+            tier: ``hooks.MEMORY`` или ``hooks.PERSISTENT``
+
+        Returns:
+            float: Доля попаданий или None, если обращений не было
+        """
+        hits = {hooks.MEMORY: 0, hooks.PERSISTENT: 0}
+        misses = 0
+        for (_, result, hit_tier), value in self.cache_lookups.items():
+            if result == "hit":
+                hits[hit_tier] += value
+            else:
+                misses += value
+        lookups = hits[hooks.PERSISTENT] + misses
+        if tier == hooks.MEMORY:
+            lookups += hits[hooks.MEMORY]
+        return hits[tier] / lookups if lookups else None
+
+    def render(self) -> str:
+        """
+        Все метрики в текстовом формате Prometheus
+
+        Returns:
+            str: Текст для ответа на ``/metrics``
+        """
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+_metrics: Optional[Metrics] = None
+_metrics_hooks: Optional[hooks.Hooks] = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Optional[Metrics]:
+    """
+    Получить включённые метрики
+
+    Returns:
+        Metrics: Метрики или None, если они выключены
+    """
+    return _metrics
+
+
+def enable_metrics(metrics: Optional[Metrics] = None) -> Metrics:
+    """
+    Включить сбор метрик: подключить их к обработчикам событий процесса
+    (если обработчиков нет, они создаются)
+
+    Args:
+        metrics: Метрики (по умолчанию - новые)
+
+    Returns:
+        Metrics: Включённые метрики
+    """
+    global _metrics, _metrics_hooks
+    with _metrics_lock:
+        _disable()
+        _metrics = metrics if metrics is not None else Metrics()
+        _metrics_hooks = hooks.get_hooks()
+        if _metrics_hooks is None:
+            _metrics_hooks = hooks.Hooks()
+            hooks.set_hooks(_metrics_hooks)
+        _metrics_hooks.add_all(_metrics)
+        return _metrics
+
+
+def disable_metrics() -> Optional[Metrics]:
+    """
+    Выключить сбор метрик
+
+    Returns:
+        Metrics: Метрики, которые были включены
+    """
+    with _metrics_lock:
+        return _disable()
+
+
+def _disable() -> Optional[Metrics]:
+    global _metrics, _metrics_hooks
+    metrics, current = _metrics, _metrics_hooks
+    if metrics is not None:
+        for name in hooks.EVENTS:
+            current.remove(name, metrics)
+        # Пустые обработчики, созданные для метрик, отключаются совсем
+        if hooks.get_hooks() is current and current.empty:
+            hooks.set_hooks(None)
+    _metrics, _metrics_hooks = None, None
+    return metrics
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):  # pylint: disable=invalid-name
+        """Отдать метрики по ``/metrics``"""
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        metrics = get_metrics()
+        body = (metrics.render() if metrics is not None else "").encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+        pass
+
+
+def start_http_server(port: int, addr: str = "") -> ThreadingHTTPServer:
+    """
+    Запустить в фоновом потоке HTTP-сервер, отдающий включённые метрики по
+    адресу ``/metrics``
+
+    Args:
+        port: Порт (0 - любой свободный)
+        addr: Адрес, на котором слушает сервер
+
+    Returns:
+        ThreadingHTTPServer: Сервер; остановить - ``shutdown()``
+    """
+    server = ThreadingHTTPServer((addr, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
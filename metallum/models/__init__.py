@@ -2,43 +2,65 @@
 
 import datetime
 import re
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from dateutil import parser as date_parser
 from pyquery import PyQuery
 
 from metallum.models.album_types import AlbumTypes
+from metallum.models.fragments import ResultRow
+from metallum.models.identity import get_identity_map
 from metallum.models.lyrics import Lyrics
 from metallum.models.metallum import Metallum
 from metallum.models.metallum_collection import MetallumCollection
 from metallum.models.metallum_entity import MetallumEntity
+from metallum.models.records import AlbumRecord, BandRecord, TrackRecord
 from metallum.models.similar_artists import SimilarArtists
 from metallum.utils import offset_time, parse_duration, split_genres
 
 
-def _get_bands_list(page) -> List["Band"]:
+def _get_bands_list(page) -> List["BandRef"]:
     """
-    Получить список групп из страницы
+    Получить список групп из страницы. Страницы самих групп не
+    загружаются, пока не понадобится поле, которого нет в ссылке.
 
     Args:
         page: PyQuery object
 
     Returns:
-        List[Band]
+        List[BandRef]
     """
-    bands = []
+    return [BandRef(band_id, name) for band_id, name in _get_band_anchors(page)]
+
+
+def _get_band_anchors(page) -> List[Tuple[str, str]]:
+    """
+    Получить ID и названия групп из ссылок на странице без загрузки
+    страниц самих групп
+
+    Args:
+        page: PyQuery object
+
+    Returns:
+        List[Tuple[str, str]]: Пары (ID, название)
+    """
+    anchors = []
     for a in page.find("a"):
-        url = PyQuery(a).attr("href")
-        band_id = re.search(r"\d+$", url).group(0)
-        bands.append(Band(f"bands/_/{band_id}"))
-    return bands
+        band_id = re.search(r"\d+$", a.get("href")).group(0)
+        anchors.append((band_id, PyQuery(a).text()))
+    return anchors
 
 
 class TrackCollection(MetallumCollection):
     """Представляет коллекцию треков на Metal Archives"""
 
-    def __init__(self, url, album):
-        super().__init__(url)
+    def __init__(self, url, album, content=None, page=None):
+        super().__init__(url, content, page)
+
+        # Группы альбома определяются один раз по ссылкам на странице
+        # альбома, без загрузки страниц самих групп
+        bands = _get_bands_list(self._page(".band_name"))
+        is_split = album.type == AlbumTypes.SPLIT.value
 
         disc = 1
         overall_number = 1
@@ -52,22 +74,81 @@ class TrackCollection(MetallumCollection):
             if index != 0 and track.number == 1:
                 disc += 1
                 track._disc_number = disc
+            track._band, track._title = _attribute_track(
+                track.full_title, bands, is_split
+            )
             overall_number += 1
             self.append(track)
 
 
+def _attribute_track(
+    full_title: str, bands: List["BandRef"], is_split: bool
+) -> Tuple[Optional["BandRef"], str]:
+    """
+    Определить группу трека и его название без имени группы. На сплитах
+    название трека начинается с имени группы: "Группа - Трек".
+
+    Args:
+        full_title: Полное название трека
+        bands: Группы альбома
+        is_split: Является ли альбом сплитом
+
+    Returns:
+        Tuple[BandRef, str]: Группа (None, если на странице нет групп) и
+        название трека
+    """
+    if is_split:
+        for band in bands:
+            if full_title.startswith(band.name):
+                return band, full_title[len(band.name) + 3 :]
+    return (bands[0] if bands else None), full_title
+
+
 class Band(MetallumEntity):
     """Представляет группу на Metal Archives"""
 
     def __repr__(self):
         return f"<Band: {self.name}>"
 
+    @staticmethod
+    def url_for_id(band_id: str) -> str:
+        """
+        URL-адрес страницы группы
+
+        Args:
+            band_id: ID группы
+
+        Returns:
+            str: Относительный URL-адрес
+        """
+        return f"bands/_/{band_id}"
+
+    @classmethod
+    def for_id(cls, band_id: str, content: Optional[str] = None) -> "Band":
+        """
+        Получить группу по ID. Если группа уже загружена в текущей сессии,
+        возвращается существующий объект.
+
+        Args:
+            band_id: ID группы
+            content: Уже загруженное содержимое страницы
+
+        Returns:
+            Band
+        """
+        return get_identity_map().get_or_create(
+            cls, band_id, lambda: cls(cls.url_for_id(band_id), content)
+        )
+
     @property
     def id(self) -> str:
         """
         >>> band.id
         '125'
         """
+        entity_id = self._id_from_url()
+        if entity_id is not None:
+            return entity_id
         url = self._page(".band_name a").attr("href")
         return re.search(r"\d+$", url).group(0)
 
@@ -207,8 +288,26 @@ class Band(MetallumEntity):
         >>> type(band.albums[0])
         <class '__main__.AlbumWrapper'>
         """
-        url = f"band/discography/id/{self.id}/tab/all"
-        return AlbumCollection(url)
+        return self._memoized("albums", lambda: AlbumCollection(self._albums_url))
+
+    @property
+    def _albums_url(self) -> str:
+        return f"band/discography/id/{self.id}/tab/all"
+
+    async def aalbums(self) -> "AlbumCollection":
+        """
+        Асинхронный вариант ``albums``
+
+        Returns:
+            AlbumCollection: Дискография группы
+        """
+        albums = self._memo_get("albums")
+        if albums is None:
+            content = await self._afetch_page_content(self._albums_url)
+            albums = self._memo_set(
+                "albums", AlbumCollection(self._albums_url, content)
+            )
+        return albums
 
     @property
     def similar_artists(self) -> "SimilarArtists":
@@ -224,8 +323,115 @@ class Band(MetallumEntity):
             ...
         """
 
-        url = "band/ajax-recommendations/id/" + self.id + "/showMoreSimilar/1"
-        return SimilarArtists(url, SimilarArtistsResult)
+        return self._memoized(
+            "similar_artists",
+            lambda: SimilarArtists(self._similar_artists_url, SimilarArtistsResult),
+        )
+
+    @property
+    def _similar_artists_url(self) -> str:
+        return "band/ajax-recommendations/id/" + self.id + "/showMoreSimilar/1"
+
+    async def asimilar_artists(self) -> "SimilarArtists":
+        """
+        Асинхронный вариант ``similar_artists``
+
+        Returns:
+            SimilarArtists: Похожие группы
+        """
+        similar_artists = self._memo_get("similar_artists")
+        if similar_artists is None:
+            content = await self._afetch_page_content(self._similar_artists_url)
+            similar_artists = self._memo_set(
+                "similar_artists",
+                SimilarArtists(
+                    self._similar_artists_url, SimilarArtistsResult, content
+                ),
+            )
+        return similar_artists
+
+    def to_record(self) -> BandRecord:
+        """
+        Извлечь все поля группы в неизменяемую запись. Запись не ссылается
+        на страницу, поэтому сама группа после этого может быть удалена.
+
+        >>> band.to_record().name
+        'Metallica'
+
+        Returns:
+            BandRecord: Данные группы
+        """
+        return BandRecord(
+            id=self.id,
+            url=self.url,
+            name=self.name,
+            country=self.country,
+            location=self.location,
+            status=self.status,
+            formed_in=self.formed_in,
+            years_active=self.years_active,
+            genres=tuple(self.genres),
+            themes=tuple(self.themes),
+            label=self.label,
+            logo=self.logo,
+            photo=self.photo,
+            added=self.added,
+            modified=self.modified,
+        )
+
+
+class BandRef:
+    """
+    Ссылка на группу, взятая из страницы другой сущности.
+
+    ID, URL и название известны из самой ссылки; при обращении к любому
+    другому атрибуту группы загружается её страница, и дальше ссылка
+    ведёт себя как объект ``Band``.
+
+    >>> album.bands[0].name
+    'Metallica'
+    """
+
+    def __init__(self, band_id: str, name: str):
+        self.id = band_id
+        self.name = name
+        self._band: Optional[Band] = None
+
+    def __repr__(self):
+        return f"<Band: {self.name}>"
+
+    def __eq__(self, other):
+        if isinstance(other, (BandRef, Band)):
+            return self.id == other.id
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(("band", self.id))
+
+    def __getattr__(self, name):
+        # Служебные атрибуты (copy, pickle...) не должны загружать страницу
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(self.get(), name)
+
+    @property
+    def url(self) -> str:
+        """
+        >>> album.bands[0].url
+        'bands/_/125'
+        """
+        return f"bands/_/{self.id}"
+
+    def get(self) -> Band:
+        """
+        Загрузить страницу группы
+
+        Returns:
+            Band
+        """
+        if self._band is None:
+            self._band = Band.for_id(self.id)
+        return self._band
 
 
 class Track:
@@ -236,6 +442,9 @@ class Track:
         self.album = album
         self._disc_number = disc_number
         self._overall_number = overall_number
+        # Заполняются TrackCollection для всех треков альбома сразу
+        self._band = None
+        self._title = None
 
     def __repr__(self):
         return f"<Track: {self.title} ({self.duration})>"
@@ -310,11 +519,7 @@ class Track:
         >>> split_album_track.title
         'A haudiga Fluag'
         """
-        title = self.full_title
-        # Remove band name from split album track titles
-        if self.album.type == AlbumTypes.SPLIT:
-            title = title[len(self.band.name) + 3 :]
-        return title
+        return self._title if self._title is not None else self.full_title
 
     @property
     def duration(self) -> int:
@@ -330,7 +535,7 @@ class Track:
         return seconds
 
     @property
-    def band(self) -> Band:
+    def band(self) -> Optional["BandRef"]:
         """
         >>> track.band
         <Band: Metallica>
@@ -338,13 +543,7 @@ class Track:
         >>> split_album_track.band
         <Band: Lunar Aurora>
         """
-        if self.album.type == AlbumTypes.SPLIT:
-            for band in self.album.bands:
-                if self.full_title.startswith(band.name):
-                    break
-        else:
-            band = self.album.bands[0]
-        return band
+        return self._band
 
     @property
     def lyrics(self) -> "Lyrics":
@@ -354,6 +553,16 @@ class Track:
         """
         return Lyrics(self.id)
 
+    async def alyrics(self) -> "Lyrics":
+        """
+        Асинхронный вариант ``lyrics``
+
+        Returns:
+            Lyrics: Текст песни
+        """
+        content = await Lyrics._afetch_page_content(Lyrics.url_for_id(self.id))
+        return Lyrics(self.id, content)
+
 
 class Album(MetallumEntity):
     """Представляет альбом на Metal Archives"""
@@ -361,12 +570,45 @@ class Album(MetallumEntity):
     def __repr__(self):
         return f"<Album: {self.title}>"
 
+    @staticmethod
+    def url_for_id(album_id: str) -> str:
+        """
+        URL-адрес страницы альбома
+
+        Args:
+            album_id: ID альбома
+
+        Returns:
+            str: Относительный URL-адрес
+        """
+        return f"albums/_/_/{album_id}"
+
+    @classmethod
+    def for_id(cls, album_id: str, content: Optional[str] = None) -> "Album":
+        """
+        Получить альбом по ID. Если альбом уже загружен в текущей сессии,
+        возвращается существующий объект.
+
+        Args:
+            album_id: ID альбома
+            content: Уже загруженное содержимое страницы
+
+        Returns:
+            Album
+        """
+        return get_identity_map().get_or_create(
+            cls, album_id, lambda: cls(cls.url_for_id(album_id), content)
+        )
+
     @property
     def id(self) -> str:
         """
         >>> album.id
         '547'
         """
+        entity_id = self._id_from_url()
+        if entity_id is not None:
+            return entity_id
         url = self._page(".album_name a").attr("href")
         return re.search(r"\d+$", url).group(0)
 
@@ -379,8 +621,8 @@ class Album(MetallumEntity):
         return f"albums/_/_/{self.id}"
 
     @property
-    def bands(self) -> List[Band]:
-        """Возвращает список объектов группы. Список будет содержать
+    def bands(self) -> List[BandRef]:
+        """Возвращает список ссылок на группы. Список будет содержать
         несколько групп только в том случае, если альбом имеет тип 'Split'.
 
         >>> album.bands
@@ -537,12 +779,73 @@ class Album(MetallumEntity):
             return None
         return url.split("?")[0]
 
+    def to_record(self) -> AlbumRecord:
+        """
+        Извлечь все поля альбома вместе с треками в неизменяемую запись.
+        Треки берутся из уже разобранной страницы альбома, страницы групп
+        не загружаются.
+
+        >>> album.to_record().tracks[0].title
+        'Battery'
+
+        Returns:
+            AlbumRecord: Данные альбома
+        """
+        anchors = _get_band_anchors(self._page(".band_name"))
+        try:
+            date = self.date
+        except (ValueError, OverflowError):
+            date = None
+        tracks = TrackCollection(self.url, self, self.content, self._page)
+        return AlbumRecord(
+            id=self.id,
+            url=self.url,
+            title=self.title,
+            type=self.type,
+            band_ids=tuple(band_id for band_id, _ in anchors),
+            band_names=tuple(name for _, name in anchors),
+            added=self.added,
+            modified=self.modified,
+            duration=self.duration,
+            date=date,
+            year=date.year if date else None,
+            label=self.label,
+            score=self.score,
+            review_count=self.review_count,
+            cover=self.cover,
+            tracks=tuple(_track_record(track) for track in tracks),
+        )
+
+
+def _track_record(track) -> TrackRecord:
+    """
+    Собрать запись трека. Группа трека уже определена TrackCollection по
+    ссылкам на странице альбома.
+
+    Args:
+        track: Трек
+
+    Returns:
+        TrackRecord: Данные трека
+    """
+    band = track.band
+    return TrackRecord(
+        id=track.id,
+        number=track.number,
+        overall_number=track.overall_number,
+        disc_number=track.disc_number,
+        title=track.title,
+        full_title=track.full_title,
+        duration=track.duration,
+        band_id=band.id if band is not None else None,
+    )
+
 
 class AlbumCollection(MetallumCollection):
     """Представляет коллекцию альбомов Metal Archives"""
 
-    def __init__(self, url):
-        super().__init__(url)
+    def __init__(self, url, content=None):
+        super().__init__(url, content)
 
         rows = self._page("tr:gt(0)")
         for index in range(len(rows)):
@@ -566,28 +869,134 @@ class AlbumWrapper(Metallum):
     <class '__main__.Album'>
     """
 
-    def __init__(self, url=None, elem=None):
+    def __init__(self, url=None, elem=None, content=None):
+        super().__init__(url, content)
         if url:
-            super().__init__(url)
-            self._album = Album(url)
+            # Страница загружается и разбирается один раз - самим альбомом из
+            # карты идентичности, обёртка и список треков используют её же
+            match = re.search(r"\d+$", url)
+            if match:
+                self._album = Album.for_id(match.group(0), content)
+                if content is not None and not self._album.loaded:
+                    self._album._raw_content = content
+            else:
+                self._album = Album(url, content)
         elif elem:
             self._album = LazyAlbum(elem)
 
     def __repr__(self):
         return f"<Album: {self.title} ({self.type})>"
 
+    @classmethod
+    def for_id(cls, album_id: str, content: Optional[str] = None) -> "AlbumWrapper":
+        """
+        Получить альбом по ID. Если альбом уже загружен в текущей сессии,
+        возвращается существующий объект.
+
+        Args:
+            album_id: ID альбома
+            content: Уже загруженное содержимое страницы
+
+        Returns:
+            AlbumWrapper
+        """
+        return get_identity_map().get_or_create(
+            cls,
+            album_id,
+            lambda: cls(url=Album.url_for_id(album_id), content=content),
+        )
+
     def __getattr__(self, name):
         if not hasattr(self._album, name) and hasattr(Album, name):
-            self._album = Album(self._album.url)
+            self._album = Album.for_id(self._album.id)
         return getattr(self._album, name)
 
+    @property
+    def content(self) -> str:
+        return self._full_album().content
+
+    @property
+    def _page(self) -> PyQuery:
+        return self._full_album()._page
+
+    @property
+    def loaded(self) -> bool:
+        return isinstance(self._album, Album) and self._album.loaded
+
+    def _full_album(self) -> "Album":
+        """
+        Заменить LazyAlbum полноценным альбомом
+
+        Returns:
+            Album: Альбом
+        """
+        if not isinstance(self._album, Album):
+            self._album = Album.for_id(self._album.id)
+        return self._album
+
+    def load(self) -> "AlbumWrapper":
+        """
+        Загрузить и разобрать страницу альбома сейчас
+
+        Returns:
+            AlbumWrapper: Эта же обёртка
+        """
+        self._full_album().load()
+        return self
+
+    def refresh(self) -> "AlbumWrapper":
+        """
+        Забыть загруженную страницу альбома и список треков и удалить их из
+        кеша: при следующем обращении они будут загружены заново.
+
+        Returns:
+            AlbumWrapper: Эта же обёртка
+        """
+        if isinstance(self._album, Album):
+            self._album.refresh()
+        self._memo.clear()
+        return self
+
     @property
     def tracks(self):
         """
         >>> len(album.tracks)
         8
         """
-        return TrackCollection(self._album.url, self)
+        return self._memoized(
+            "tracks", lambda: TrackCollection(self._album.url, self, page=self._page)
+        )
+
+    def to_record(self) -> AlbumRecord:
+        """
+        Извлечь все поля альбома в неизменяемую запись
+        (при необходимости загружается страница альбома)
+
+        Returns:
+            AlbumRecord: Данные альбома
+        """
+        return self._full_album().to_record()
+
+    async def atracks(self) -> "TrackCollection":
+        """
+        Асинхронный вариант ``tracks``
+
+        Returns:
+            TrackCollection: Треки альбома
+        """
+        await self.aload()
+        return self.tracks
+
+    async def aload(self) -> "AlbumWrapper":
+        """
+        Асинхронно загрузить страницу альбома, если обёртка пока содержит
+        только данные из дискографии (LazyAlbum).
+
+        Returns:
+            AlbumWrapper: Эта же обёртка
+        """
+        await self._full_album().aload()
+        return self
 
     @property
     def disc_count(self):
@@ -652,17 +1061,38 @@ class LazyAlbum:
         """
         return int(self._elem("td").eq(2).text())
 
+    @property
+    def score(self) -> Optional[int]:
+        """
+        Средняя оценка рецензий из строки дискографии
+
+        >>> album.score
+        79
+        """
+        score = re.search(r"(\d{1,3})%", self._elem("td").eq(3).text())
+        return int(score.group(1)) if score else None
+
+    @property
+    def review_count(self) -> Optional[int]:
+        """
+        Количество рецензий из строки дискографии
 
-class SimilarArtistsResult(list):
+        >>> album.review_count
+        39
+        """
+        count = re.match(r"\s*(\d+)", self._elem("td").eq(3).text())
+        return int(count.group(1)) if count else None
+
+
+class SimilarArtistsResult(ResultRow):
     """Представляет собой запись на вкладке похожие исполнители"""
 
+    __slots__ = ()
+
     _resultType = Band
 
     def __init__(self, details):
-        super().__init__()
-        self._details = details
-        for d in details:
-            self.append(d)
+        super().__init__(details)
 
     def __repr__(self):
         s = " | ".join(self[1:])
@@ -674,7 +1104,6 @@ class SimilarArtistsResult(list):
         >>> search_results[0].id
         '125'
         """
-        # url = PyQuery(self._details[0])('a').attr('href')
         return re.search(r"\d+$", self[0]).group(0)
 
     @property
@@ -724,4 +1153,4 @@ class SimilarArtistsResult(list):
         Returns:
             Band
         """
-        return self._resultType(self.url)
+        return self._resultType.for_id(self.id)
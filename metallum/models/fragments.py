@@ -0,0 +1,158 @@
+"""Быстрый разбор HTML-фрагментов из ячеек расширенного поиска
+
+Ячейки ``aaData`` содержат либо простой текст, либо одну-две ссылки вида
+``<a href="...">Текст</a>``, поэтому вместо построения дерева документа
+на каждую ячейку ссылки извлекаются заранее скомпилированными регулярными
+выражениями - за один проход вместе с текстом и ID.
+
+Разобранные строки хранятся в компактных объектах ``ResultRow``: кортеж
+текстов ячеек и кортеж пар (ID, текст) ссылок, без исходного HTML.
+"""
+
+import html
+import re
+from typing import Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+_ANCHOR = re.compile(r"<a\s[^>]*?href=\"([^\"]*)\"[^>]*>(.*?)</a>", re.S)
+_TAG = re.compile(r"<[^>]+>")
+_LYRICS_LINK = re.compile(r'id="lyricsLink_(\d+)"')
+_TRAILING_ID = re.compile(r"\d+$")
+
+
+class Link(NamedTuple):
+    """Ссылка из ячейки"""
+
+    href: str
+    text: str
+    id: Optional[str]
+
+
+class Cell(NamedTuple):
+    """Разобранная ячейка: текст и ссылки"""
+
+    text: str
+    links: Tuple[Link, ...] = ()
+
+    @property
+    def id(self) -> Optional[str]:
+        """ID из первой ссылки ячейки"""
+        return self.links[0].id if self.links else None
+
+
+def fragment_text(fragment: str) -> str:
+    """
+    Текст HTML-фрагмента: без тегов, с раскодированными сущностями и
+    схлопнутыми пробелами
+
+    Args:
+        fragment: HTML-фрагмент
+
+    Returns:
+        str: Текст
+
+    Examples:
+        >>> fragment_text('<span id="score_138">488</span>  &amp; more')
+        '488 & more'
+    """
+    return " ".join(html.unescape(_TAG.sub("", fragment)).split())
+
+
+def parse_cell(cell: str) -> Cell:
+    """
+    Разобрать ячейку результата поиска
+
+    Текст ячейки со ссылками - тексты ссылок через пробел; для ссылки на
+    текст песни - ID текста. Остальные ячейки возвращаются без изменений.
+
+    Args:
+        cell: Содержимое ячейки
+
+    Returns:
+        Cell: Текст и ссылки ячейки
+
+    Examples:
+        >>> cell = parse_cell('<a href="bands/Metallica/125">Metallica</a> <!-- 6 -->')
+        >>> cell.text, cell.id
+        ('Metallica', '125')
+        >>> parse_cell('<a href="javascript:;" id="lyricsLink_3449">Edit</a>').text
+        '3449'
+        >>> parse_cell('Full-length')
+        Cell(text='Full-length', links=())
+    """
+    if not cell.startswith("<a href"):
+        return Cell(cell)
+    lyrics_link = _LYRICS_LINK.search(cell)
+    if lyrics_link is not None:
+        return Cell(lyrics_link[1])
+    links = []
+    for match in _ANCHOR.finditer(cell):
+        href = html.unescape(match[1])
+        link_id = _TRAILING_ID.search(href)
+        link_id = link_id[0] if link_id else None
+        links.append(Link(href, fragment_text(match[2]), link_id))
+    if not links:
+        return Cell(fragment_text(cell))
+    return Cell(" ".join(link.text for link in links if link.text), tuple(links))
+
+
+class ResultRow:
+    """
+    Строка результатов поиска: тексты ячеек и ссылки из них.
+
+    Строка занимает два кортежа и не имеет ``__dict__``; индексация,
+    срезы, итерация и сравнение со списком или кортежем работают как у
+    кортежа текстов ячеек. Строки между собой сравниваются и хешируются
+    вместе со ссылками: одноимённые группы с разными ID - разные строки.
+    """
+
+    __slots__ = ("_values", "_links")
+
+    def __init__(
+        self,
+        values: Iterable[str],
+        links: Sequence[Tuple[Tuple[Optional[str], str], ...]] = (),
+    ):
+        self._values = tuple(values)
+        self._links = tuple(links)
+
+    @classmethod
+    def _from_cells(cls, details: Iterable[str]) -> Tuple[tuple, tuple]:
+        """
+        Разобрать ячейки строки и вернуть аргументы конструктора
+
+        Args:
+            details: Содержимое ячеек
+
+        Returns:
+            Tuple[tuple, tuple]: Тексты ячеек и пары (ID, текст) их ссылок
+        """
+        cells = [parse_cell(detail) for detail in details]
+        values = tuple(cell.text for cell in cells)
+        links = tuple(
+            tuple((link.id, link.text) for link in cell.links) for cell in cells
+        )
+        return values, links
+
+    def __getitem__(self, index):
+        return self._values[index]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ResultRow):
+            return (self._values, self._links) == (other._values, other._links)
+        if isinstance(other, (list, tuple)):
+            return self._values == tuple(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash((self._values, self._links))
+
+    def _link_id(self, index: int) -> Optional[str]:
+        """ID из первой ссылки ячейки"""
+        links = self._links[index] if index < len(self._links) else ()
+        return links[0][0] if links else None
@@ -0,0 +1,124 @@
+"""Карта идентичности сущностей Metal Archives
+
+Карта хранит слабые ссылки на уже загруженные сущности по паре
+(тип сущности, ID), поэтому повторное обращение к той же группе или
+альбому возвращает существующий объект, а не загружает и не разбирает
+страницу заново. Объект удаляется из карты, как только на него не
+остаётся других ссылок.
+"""
+
+import contextvars
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional
+
+
+class IdentityMap:
+    """Слабая карта (тип сущности, ID) -> объект"""
+
+    def __init__(self):
+        self._entities: "weakref.WeakValueDictionary" = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entities)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entities
+
+    def get(self, entity_type: type, entity_id: str) -> Optional[Any]:
+        """
+        Получить уже загруженную сущность
+
+        Args:
+            entity_type: Класс сущности
+            entity_id: ID сущности
+
+        Returns:
+            Сущность или None, если она ещё не загружена
+        """
+        with self._lock:
+            return self._entities.get((entity_type, str(entity_id)))
+
+    def get_or_create(
+        self, entity_type: type, entity_id: str, factory: Callable[[], Any]
+    ) -> Any:
+        """
+        Получить сущность из карты или создать её и запомнить.
+
+        Фабрика вызывается вне блокировки, чтобы загрузка страницы не
+        задерживала другие потоки; если два потока создали одну и ту же
+        сущность одновременно, оба получат тот объект, что попал в карту
+        первым.
+
+        Args:
+            entity_type: Класс сущности
+            entity_id: ID сущности
+            factory: Функция, создающая сущность
+
+        Returns:
+            Сущность
+        """
+        key = (entity_type, str(entity_id))
+        with self._lock:
+            entity = self._entities.get(key)
+        if entity is not None:
+            return entity
+        entity = factory()
+        with self._lock:
+            return self._entities.setdefault(key, entity)
+
+    def discard(self, entity_type: type, entity_id: str) -> None:
+        """
+        Удалить сущность из карты
+
+        Args:
+            entity_type: Класс сущности
+            entity_id: ID сущности
+        """
+        with self._lock:
+            self._entities.pop((entity_type, str(entity_id)), None)
+
+    def clear(self) -> None:
+        """Удалить все сущности из карты"""
+        with self._lock:
+            self._entities.clear()
+
+
+_default_identity_map = IdentityMap()
+_current_identity_map: "contextvars.ContextVar[Optional[IdentityMap]]" = (
+    contextvars.ContextVar("metallum_identity_map", default=None)
+)
+
+
+def get_identity_map() -> IdentityMap:
+    """
+    Получить карту идентичности текущей сессии (по умолчанию - общую для
+    процесса).
+
+    Returns:
+        IdentityMap: Текущая карта
+    """
+    identity_map = _current_identity_map.get()
+    return _default_identity_map if identity_map is None else identity_map
+
+
+@contextmanager
+def identity_scope(identity_map: Optional[IdentityMap] = None) -> Iterator[IdentityMap]:
+    """
+    Использовать отдельную карту идентичности внутри блока ``with``,
+    например на время обработки одного запроса веб-сервиса.
+
+    Args:
+        identity_map: Карта для сессии; если не указана, создаётся новая
+
+    Returns:
+        IdentityMap: Карта сессии
+    """
+    identity_map = identity_map if identity_map is not None else IdentityMap()
+    token = _current_identity_map.set(identity_map)
+    try:
+        yield identity_map
+    finally:
+        _current_identity_map.reset(token)
@@ -7,8 +7,32 @@ from metallum.models.metallum import Metallum
 class Lyrics(Metallum):
     """Представляет страницу текста песни"""
 
-    def __init__(self, lyrics_id):
-        super().__init__(f"release/ajax-view-lyrics/id/{lyrics_id}")
+    def __init__(self, lyrics_id, content=None):
+        super().__init__(self.url_for_id(lyrics_id), content)
+
+    @staticmethod
+    def url_for_id(lyrics_id) -> str:
+        """
+        URL-адрес страницы текста песни
+
+        Args:
+            lyrics_id: ID текста песни
+
+        Returns:
+            str: Относительный URL-адрес
+        """
+        return f"release/ajax-view-lyrics/id/{lyrics_id}"
+
+    @property
+    def id(self) -> str:
+        """
+        ID текста песни (совпадает с ID трека)
+
+        Примеры:
+            >>> Lyrics('5018A').id
+            '5018A'
+        """
+        return self._url.rsplit("/", 1)[-1]
 
     def __str__(self):
         lyrics = self._page("p").html()
@@ -1,66 +1,188 @@
 """Базовый класс для всех классов Metallum"""
 
-import hashlib
-import json
 import time
-from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Optional
 
-from curl_cffi import requests as curl_requests
 from pyquery import PyQuery
 
-from metallum.consts import CACHE_FILE, REQUEST_TIMEOUT
-from metallum.utils import make_absolute, get_user_agent
+from metallum import hooks
+from metallum.cache import get_cache, get_memory_cache
+from metallum.transport import get_async_transport, get_transport
+from metallum.utils import make_absolute
 
 
 class Metallum:
-    """Базовый класс Metallum - представляет страницу Metallum"""
+    """
+    Базовый класс Metallum - представляет страницу Metallum.
+
+    Конструктор не выполняет запросов: страница загружается и разбирается
+    при первом обращении к её данным, после чего разобранный документ
+    переиспользуется всеми полями сущности.
+    """
 
     _CACHE_TTL = 300
 
-    def __init__(self, url):
-        self._cache_dir = Path(CACHE_FILE)
-        self._cache_dir.mkdir(parents=True, exist_ok=True)
-        self._session = curl_requests.Session()
-        self._session.headers = {
-            "User-Agent": get_user_agent(),
-            "Accept-Encoding": "gzip, deflate",
-            "Accept": "application/json, text/javascript, */*; q=0.01",
-            "Accept-Language": "en-US,en;q=0.9",
-            "Referer": "https://www.metal-archives.com/",
-            "X-Requested-With": "XMLHttpRequest",
-            "Connection": "keep-alive",
-        }
-
-        self._content = self._fetch_page_content(url)
-        self._page = PyQuery(self._content)
-
-    def _cache_path(self, url: str) -> Path:
-        digest = hashlib.sha256(url.encode("utf-8")).hexdigest()
-        return self._cache_dir / f"{digest}.cache"
-
-    def _load_from_cache(self, url: str) -> Optional[str]:
-        cache_file = self._cache_path(url)
-        if not cache_file.exists():
-            return None
-        try:
-            with cache_file.open("r", encoding="utf-8") as file:
-                data = json.load(file)
-        except (json.JSONDecodeError, OSError):
-            cache_file.unlink(missing_ok=True)
-            return None
+    def __init__(
+        self, url, content: Optional[str] = None, page: Optional[PyQuery] = None
+    ):
+        self._transport = get_transport()
+        self._url = url
+        self._raw_content = content
+        self._parsed_page = page
+        # Запомненные производные коллекции: ключ -> (значение, срок годности)
+        self._memo = {}
 
-        if time.time() - data.get("timestamp", 0) > self._CACHE_TTL:
-            cache_file.unlink(missing_ok=True)
+    @property
+    def content(self) -> str:
+        """Текст страницы (HTML или JSON) без разбора; загружается при первом
+        обращении"""
+        if self._raw_content is None:
+            self._raw_content = self._fetch_page_content(self._url)
+        return self._raw_content
+
+    @property
+    def _page(self) -> PyQuery:
+        return self.load()._parsed_page
+
+    @property
+    def loaded(self) -> bool:
+        """Загружена ли уже страница"""
+        return self._raw_content is not None or self._parsed_page is not None
+
+    def load(self) -> "Metallum":
+        """
+        Загрузить и разобрать страницу сейчас, а не при первом обращении
+        к данным (например, в рабочем потоке при массовой загрузке)
+
+        Returns:
+            Metallum: Этот же объект
+        """
+        if self._parsed_page is None:
+            content = self.content
+            start = time.perf_counter()
+            self._parsed_page = PyQuery(content)
+            hooks.emit(
+                hooks.PARSE,
+                make_absolute(self._url),
+                type(self).__name__,
+                content,
+                time.perf_counter() - start,
+            )
+        return self
+
+    async def aload(self) -> "Metallum":
+        """
+        Асинхронный вариант ``load``
+
+        Returns:
+            Metallum: Этот же объект
+        """
+        if not self.loaded:
+            self._raw_content = await self._afetch_page_content(self._url)
+        return self.load()
+
+    def _memo_get(self, key: str) -> Optional[Any]:
+        """
+        Получить запомненное значение, если оно ещё не устарело
+
+        Args:
+            key: Ключ значения
+
+        Returns:
+            Значение или None
+        """
+        entry = self._memo.get(key)
+        if entry is None or time.monotonic() > entry[1]:
             return None
+        return entry[0]
+
+    def _memo_set(self, key: str, value: Any) -> Any:
+        """
+        Запомнить значение на время ``_CACHE_TTL``
+
+        Args:
+            key: Ключ значения
+            value: Значение
+
+        Returns:
+            Это же значение
+        """
+        self._memo[key] = (value, time.monotonic() + self._CACHE_TTL)
+        return value
+
+    def _memoized(self, key: str, factory: Callable[[], Any]) -> Any:
+        """
+        Получить запомненное значение или построить и запомнить новое
+
+        Args:
+            key: Ключ значения
+            factory: Функция, строящая значение
 
-        return data.get("content")
+        Returns:
+            Значение
+        """
+        value = self._memo_get(key)
+        if value is None:
+            value = self._memo_set(key, factory())
+        return value
 
-    def _save_to_cache(self, url: str, content: str) -> None:
-        cache_file = self._cache_path(url)
-        payload = {"timestamp": time.time(), "content": content}
-        with cache_file.open("w", encoding="utf-8") as file:
-            json.dump(payload, file)
+    def refresh(self) -> "Metallum":
+        """
+        Забыть загруженную страницу и запомненные коллекции и удалить их из
+        кеша: при следующем обращении данные будут загружены с сайта заново.
+
+        Returns:
+            Metallum: Этот же объект
+        """
+        urls = [self._url]
+        urls.extend(
+            value._url
+            for value, _ in self._memo.values()
+            if isinstance(value, Metallum)
+        )
+        for url in urls:
+            if url:
+                self._invalidate_cache(make_absolute(url))
+        self._memo.clear()
+        self._raw_content = None
+        self._parsed_page = None
+        self.__dict__.pop("_dd_map", None)
+        self.__dict__.pop("_indexes", None)
+        return self
+
+    @classmethod
+    def _invalidate_cache(cls, url: str) -> None:
+        get_memory_cache().delete(url)
+        get_cache().delete(url)
+
+    @classmethod
+    def _load_from_cache(cls, url: str) -> Optional[str]:
+        start = time.perf_counter()
+        tier = hooks.MEMORY
+        memory_cache = get_memory_cache()
+        content = memory_cache.get(url)
+        if content is None:
+            tier = hooks.PERSISTENT
+            content, expires = get_cache().get_with_expiry(url) or (None, None)
+            if content is not None:
+                # Страница живёт в памяти не дольше, чем в постоянном кеше
+                ttl = cls._CACHE_TTL if expires is None else expires - time.time()
+                if ttl > 0:
+                    memory_cache.set(url, content, ttl)
+        hooks.emit(
+            hooks.CACHE_HIT if content else hooks.CACHE_MISS,
+            url,
+            cls.__name__,
+            content or None,
+            time.perf_counter() - start,
+            tier=tier if content else None,
+        )
+        return content
+
+    @classmethod
+    def _save_to_cache(cls, url: str, content: str) -> None:
+        get_memory_cache().set(url, content, cls._CACHE_TTL)
+        get_cache().set(url, content, cls._CACHE_TTL)
 
     def _fetch_page_content(self, url) -> str:
         """
@@ -77,8 +199,65 @@ class Metallum:
         if cached_content:
             return cached_content
 
-        response = self._session.get(absolute_url)
-        response.raise_for_status()
-        self._save_to_cache(absolute_url, response.text)
-        time.sleep(REQUEST_TIMEOUT)
-        return response.text
+        entity = type(self).__name__
+        hooks.emit(hooks.REQUEST_START, absolute_url, entity)
+        start = time.perf_counter()
+        try:
+            content = self._transport.get(absolute_url)
+        except Exception as error:
+            hooks.emit(
+                hooks.REQUEST_END,
+                absolute_url,
+                entity,
+                duration=time.perf_counter() - start,
+                error=error,
+            )
+            raise
+        hooks.emit(
+            hooks.REQUEST_END,
+            absolute_url,
+            entity,
+            content,
+            time.perf_counter() - start,
+        )
+        self._save_to_cache(absolute_url, content)
+        return content
+
+    @classmethod
+    async def _afetch_page_content(cls, url) -> str:
+        """
+        Асинхронно получить содержимое страницы
+
+        Args:
+            url: URL-адрес страницы для получения
+
+        Returns:
+            str: Содержимое страницы
+        """
+        absolute_url = make_absolute(url)
+        cached_content = cls._load_from_cache(absolute_url)
+        if cached_content:
+            return cached_content
+
+        hooks.emit(hooks.REQUEST_START, absolute_url, cls.__name__)
+        start = time.perf_counter()
+        try:
+            content = await get_async_transport().get(absolute_url)
+        except Exception as error:
+            hooks.emit(
+                hooks.REQUEST_END,
+                absolute_url,
+                cls.__name__,
+                duration=time.perf_counter() - start,
+                error=error,
+            )
+            raise
+        hooks.emit(
+            hooks.REQUEST_END,
+            absolute_url,
+            cls.__name__,
+            content,
+            time.perf_counter() - start,
+        )
+        cls._save_to_cache(absolute_url, content)
+        return content
@@ -1,15 +1,170 @@
 """Базовый класс Metallum для коллекций (например, альбомов)"""
 
+import functools
+import operator
+import re
+from typing import Any, Callable, Dict, List, Tuple
+
 from metallum.models.metallum import Metallum
 
+# Операции сравнения для поиска по диапазону: year__gte=1990
+_RANGE_LOOKUPS = {
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+_LOOKUPS = {"exact", "in", "contains", "icontains", "regex", *_RANGE_LOOKUPS}
+
+
+def _normalize(obj) -> str:
+    """
+    Привести значение к виду для сравнения без учёта регистра
+    (элементы перечислений сравниваются по значению)
+
+    >>> _normalize('Full-length')
+    'full-length'
+    """
+    if isinstance(obj, str):
+        return obj.lower()
+    if hasattr(obj, "value"):
+        return str(obj.value).lower()
+    return str(obj).lower()
+
+
+def _predicate(lookup: str, value) -> Callable[[Any], bool]:
+    """
+    Построить проверку значения атрибута для одного условия поиска
+
+    Args:
+        lookup: Вид условия (gte, contains, regex...); условия exact и in
+            проверяются по индексу и сюда попадают только с функцией
+        value: Значение из условия
+
+    Returns:
+        Callable: Функция, проверяющая значение атрибута
+    """
+    if callable(value):
+        return value
+    if lookup == "contains":
+        return lambda current: current is not None and value in str(current)
+    if lookup == "icontains":
+        expected = _normalize(value)
+        return lambda current: current is not None and expected in _normalize(current)
+    if lookup == "regex":
+        pattern = re.compile(value)
+        return lambda current: (
+            current is not None and pattern.search(str(current)) is not None
+        )
+    compare = _RANGE_LOOKUPS[lookup]
+
+    def in_range(current) -> bool:
+        if current is None:
+            return False
+        try:
+            return compare(current, value)
+        except TypeError as error:
+            # Например, year__gte="1990": строка не сравнивается с числом
+            raise ValueError(
+                f"{lookup} lookup cannot compare {current!r} with {value!r}"
+            ) from error
+
+    return in_range
+
+
+def _invalidates_indexes(method: Callable) -> Callable:
+    """
+    Обернуть метод list, меняющий коллекцию, так, чтобы он сбрасывал
+    индексы поиска
+
+    Args:
+        method: Метод list
+
+    Returns:
+        Callable: Обёрнутый метод
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self.__dict__.pop("_indexes", None)
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
 
 class MetallumCollection(Metallum, list):
     """Базовый класс Metallum для коллекций (например, альбомов)"""
 
+    # Любое изменение состава или порядка элементов сбрасывает индексы
+    __setitem__ = _invalidates_indexes(list.__setitem__)
+    __delitem__ = _invalidates_indexes(list.__delitem__)
+    __iadd__ = _invalidates_indexes(list.__iadd__)
+    __imul__ = _invalidates_indexes(list.__imul__)
+    append = _invalidates_indexes(list.append)
+    extend = _invalidates_indexes(list.extend)
+    insert = _invalidates_indexes(list.insert)
+    pop = _invalidates_indexes(list.pop)
+    remove = _invalidates_indexes(list.remove)
+    clear = _invalidates_indexes(list.clear)
+    sort = _invalidates_indexes(list.sort)
+    reverse = _invalidates_indexes(list.reverse)
+
+    def _derived(self, items) -> "MetallumCollection":
+        """
+        Новая коллекция того же типа для той же страницы, но с другими
+        элементами (конструктор не вызывается, страница не разбирается)
+
+        Args:
+            items: Элементы новой коллекции
+
+        Returns:
+            MetallumCollection: Новая коллекция
+        """
+        collection = self.__class__.__new__(self.__class__)
+        Metallum.__init__(collection, self._url, self._raw_content, self._parsed_page)
+        collection.extend(items)
+        return collection
+
+    def _index(self, attribute: str) -> Dict[str, List[int]]:
+        """
+        Индекс позиций элементов по нормализованному значению атрибута.
+
+        Индекс строится при первом поиске по атрибуту и сбрасывается
+        методами, меняющими коллекцию, и ``refresh()``. Изменения атрибутов
+        самих элементов индекс не отслеживает.
+
+        Args:
+            attribute: Имя атрибута
+
+        Returns:
+            dict: Позиции элементов по значению атрибута
+        """
+        indexes = self.__dict__.setdefault("_indexes", {})
+        index = indexes.get(attribute)
+        if index is None:
+            index = {}
+            for position, item in enumerate(self):
+                key = _normalize(getattr(item, attribute))
+                index.setdefault(key, []).append(position)
+            indexes[attribute] = index
+        return index
+
     def search(self, **kwargs) -> "MetallumCollection":
         """
         Запрос к коллекции на основе одной или нескольких пар ключ-значение, где
-        ключи являются атрибутами содержащихся объектов:
+        ключи являются атрибутами содержащихся объектов.
+
+        К имени атрибута можно добавить вид условия через ``__``:
+        ``exact`` (по умолчанию, без учёта регистра), ``in`` (одно из
+        значений), ``gt``, ``gte``, ``lt``, ``lte`` (диапазон; значение
+        должно сравниваться со значением атрибута, иначе ValueError),
+        ``contains``, ``icontains`` (подстрока) и ``regex``. Вместо значения
+        можно передать функцию, которая получает значение атрибута и
+        возвращает True для подходящих элементов.
+
+        Условия ``exact`` и ``in`` используют индексы по атрибутам, поэтому
+        повторные запросы к той же коллекции не перебирают все элементы.
 
         Args:
             **kwargs: Пары ключ-значение для фильтрации коллекции
@@ -24,21 +179,36 @@ class MetallumCollection(Metallum, list):
 
             >>> len(band.albums.search(title='master of puppets', type=AlbumTypes.FULL_LENGTH))
             1
+
+            >>> len(band.albums.search(type=AlbumTypes.FULL_LENGTH, year__lt=1987))
+            3
         """
-        def _normalize(obj):
-            if isinstance(obj, str):
-                return obj.lower()
-            if hasattr(obj, "value"):
-                return str(obj.value).lower()
-            return str(obj).lower()
-
-        collection = self[:]
+        positions = None
+        filters: List[Tuple[str, Callable[[Any], bool]]] = []
         for key, value in kwargs.items():
-            for item in collection[:]:
-                current = getattr(item, key)
-                if _normalize(value) != _normalize(current):
-                    try:
-                        collection.remove(item)
-                    except ValueError:
-                        continue
-        return collection
+            attribute, _, lookup = key.partition("__")
+            lookup = lookup or "exact"
+            if lookup not in _LOOKUPS:
+                raise ValueError(f"unknown lookup: {key}")
+
+            if lookup in ("exact", "in") and not callable(value):
+                if lookup == "in" and isinstance(value, (str, bytes)):
+                    raise ValueError(f"{key} expects a list of values, not a string")
+                index = self._index(attribute)
+                values = [value] if lookup == "exact" else value
+                matches = set()
+                for v in values:
+                    matches.update(index.get(_normalize(v), ()))
+                positions = matches if positions is None else positions & matches
+            else:
+                filters.append((attribute, _predicate(lookup, value)))
+
+        if positions is None:
+            candidates = iter(self)
+        else:
+            candidates = (self[position] for position in sorted(positions))
+        return self._derived(
+            item
+            for item in candidates
+            if all(check(getattr(item, attribute)) for attribute, check in filters)
+        )
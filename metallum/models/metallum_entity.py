@@ -1,6 +1,7 @@
 """Базовый класс для всех сущностей на Metal Archives"""
 
-from typing import Optional
+import re
+from typing import Dict, Optional
 
 from pyquery import PyQuery
 
@@ -10,6 +11,36 @@ from metallum.models.metallum import Metallum
 class MetallumEntity(Metallum):
     """Представляет сущность Metallum (артист, альбом...)"""
 
+    def _id_from_url(self) -> Optional[str]:
+        """
+        ID сущности из URL-адреса, по которому она создана: так ID и URL
+        известны без загрузки страницы
+
+        Returns:
+            str: ID или None, если URL-адрес не оканчивается на ID
+        """
+        match = re.search(r"\d+$", self._url or "")
+        return match.group(0) if match else None
+
+    def _dd_elements(self) -> Dict[str, PyQuery]:
+        """
+        Сопоставить метки <dt> с элементами <dd> за один проход по странице.
+        Результат сохраняется, поэтому повторные обращения к полям не
+        выполняют CSS-селекторы заново.
+
+        Returns:
+            dict: Элементы <dd> по тексту меток
+        """
+        elements = getattr(self, "_dd_map", None)
+        if elements is None:
+            elements = {}
+            dds = self._page("dd")
+            for index, dt in enumerate(self._page("dt")):
+                if dt.text is not None:
+                    elements.setdefault(dt.text, dds.eq(index))
+            self._dd_map = elements
+        return elements
+
     def _dd_element_for_label(self, label: str) -> Optional[PyQuery]:
         """
         Данные на страницах сущностей хранятся в парах <dt> / <dd>
@@ -20,14 +51,7 @@ class MetallumEntity(Metallum):
         Returns:
             PyQuery: Элемент <dd>, соответствующий метке
         """
-        labels = list(self._page("dt").contents())
-
-        try:
-            index = labels.index(label)
-        except ValueError:
-            return None
-
-        return self._page("dd").eq(index)
+        return self._dd_elements().get(label)
 
     def _dd_text_for_label(self, label: str) -> str:
         """
@@ -0,0 +1,81 @@
+"""Неизменяемые записи с данными сущностей Metal Archives
+
+Запись содержит все поля сущности, извлечённые из страницы за один проход,
+и не ссылается на дерево документа, поэтому после её создания страницу
+можно освободить.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True, slots=True)
+class BandRecord:
+    """Данные группы"""
+
+    id: str
+    url: str
+    name: str
+    country: str
+    location: str
+    status: str
+    formed_in: str
+    years_active: str
+    genres: Tuple[str, ...]
+    themes: Tuple[str, ...]
+    label: str
+    logo: Optional[str]
+    photo: Optional[str]
+    added: Optional[datetime.datetime]
+    modified: Optional[datetime.datetime]
+
+
+@dataclass(frozen=True, slots=True)
+class TrackRecord:
+    """Данные трека"""
+
+    id: str
+    number: int
+    overall_number: int
+    disc_number: int
+    title: str
+    full_title: str
+    duration: int
+    band_id: Optional[str]
+
+
+@dataclass(frozen=True, slots=True)
+class AlbumRecord:
+    """Данные альбома вместе со списком треков"""
+
+    id: str
+    url: str
+    title: str
+    type: str
+    band_ids: Tuple[str, ...]
+    band_names: Tuple[str, ...]
+    added: Optional[datetime.datetime]
+    modified: Optional[datetime.datetime]
+    duration: int
+    date: Optional[datetime.datetime]
+    year: Optional[int]
+    label: str
+    score: Optional[int]
+    review_count: Optional[int]
+    cover: Optional[str]
+    tracks: Tuple[TrackRecord, ...]
+
+
+@dataclass(frozen=True, slots=True)
+class SongRecord:
+    """Трек вместе с названиями группы и альбома (результат поиска песни)"""
+
+    id: str
+    title: str
+    duration: int
+    band_id: Optional[str]
+    band_name: str
+    album_id: str
+    album_title: str
+    album_type: str
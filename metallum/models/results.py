@@ -3,36 +3,33 @@
 import re
 from typing import List
 
-from pyquery import PyQuery
-
-from metallum.models import Album, AlbumWrapper, Band, _get_bands_list
+from metallum.models import Album, AlbumWrapper, Band, BandRef
+from metallum.models.fragments import ResultRow
 from metallum.models.lyrics import Lyrics
 from metallum.models.metallum import Metallum
 from metallum.utils import split_genres
 
 
-class SearchResult(list):
+class SearchResult(ResultRow):
     """
     Представляет результат поиска в расширенном поиске
 
+    Текст, ссылки и ID каждой ячейки извлекаются один раз при создании;
+    исходный HTML не сохраняется.
+
     Атрибуты:
         _resultType: Тип результата
     """
 
+    __slots__ = ()
+
     _resultType = None
 
     def __init__(self, details):
-        super().__init__()
-        for detail in details:
-            if re.match("^<a href.*", detail):
-                lyrics_link = re.search(r'id="lyricsLink_(\d+)"', detail)
-                if lyrics_link is not None:
-                    self.append(lyrics_link[1])
-                else:
-                    d = PyQuery(detail)
-                    self.append(d("a").text())
-            else:
-                self.append(detail)
+        super().__init__(*self._from_cells(details))
+
+    def _bands(self) -> List["BandRef"]:
+        return [BandRef(band_id, name) for band_id, name in self._links[0]]
 
     def __repr__(self):
         s = " | ".join(self)
@@ -40,18 +37,17 @@ class SearchResult(list):
 
     def get(self) -> "Metallum":
         """Return the result as a Metallum object"""
-        # ! E1102: self._resultType is not callable (not-callable)
-        # ! E1101: Instance of 'SearchResult' has no 'url' member (no-member)
-        return self._resultType(self.url)
+        # ! E1101: self._resultType has no 'for_id' member (no-member)
+        # ! E1101: Instance of 'SearchResult' has no 'id' member (no-member)
+        return self._resultType.for_id(self.id)
 
 
 class BandResult(SearchResult):
     """Представляет результат поиска группы"""
 
-    def __init__(self, details):
-        super().__init__(details)
-        self._details = details
-        self._resultType = Band
+    __slots__ = ()
+
+    _resultType = Band
 
     @property
     def id(self) -> str:
@@ -62,8 +58,7 @@ class BandResult(SearchResult):
             >>> search_results[0].id
             '125'
         """
-        url = PyQuery(self._details[0])("a").attr("href")
-        return re.search(r"\d+$", url).group(0)
+        return self._link_id(0)
 
     @property
     def url(self) -> str:
@@ -124,10 +119,9 @@ class BandResult(SearchResult):
 class AlbumResult(SearchResult):
     """Представляет результат поиска альбома"""
 
-    def __init__(self, details):
-        super().__init__(details)
-        self._details = details
-        self._resultType = AlbumWrapper
+    __slots__ = ()
+
+    _resultType = AlbumWrapper
 
     @property
     def id(self) -> str:
@@ -138,8 +132,7 @@ class AlbumResult(SearchResult):
             >>> album.id
             '1'
         """
-        url = PyQuery(self._details[1])("a").attr("href")
-        return re.search(r"\d+$", url).group(0)
+        return self._link_id(1)
 
     @property
     def url(self) -> str:
@@ -175,7 +168,7 @@ class AlbumResult(SearchResult):
         return self[2]
 
     @property
-    def bands(self) -> List["Band"]:
+    def bands(self) -> List["BandRef"]:
         """
         Список групп, выпустивших альбом
 
@@ -183,8 +176,7 @@ class AlbumResult(SearchResult):
             >>> album.bands
             [Amorphis]
         """
-        page = PyQuery(self._details[0]).wrap("<div></div>")
-        return _get_bands_list(page)
+        return self._bands()
 
     @property
     def band_name(self) -> str:
@@ -201,10 +193,9 @@ class AlbumResult(SearchResult):
 class SongResult(SearchResult):
     """Представляет результат поиска песни"""
 
-    def __init__(self, details):
-        super().__init__(details)
-        self._details = details
-        self._resultType = None
+    __slots__ = ()
+
+    _resultType = None
 
     def get(self) -> "SongResult":
         """Return the result as a SongResult object"""
@@ -244,7 +235,7 @@ class SongResult(SearchResult):
         return self[2]
 
     @property
-    def bands(self) -> List["Band"]:
+    def bands(self) -> List["BandRef"]:
         """
         Список групп, выпустивших песню
 
@@ -252,8 +243,7 @@ class SongResult(SearchResult):
             >>> song.bands
             [Iron Maiden]
         """
-        page = PyQuery(self._details[0]).wrap("<div></div>")
-        return _get_bands_list(page)
+        return self._bands()
 
     @property
     def band_name(self) -> str:
@@ -275,9 +265,7 @@ class SongResult(SearchResult):
             >>> song.album
             <Album: albums/_/_/1>
         """
-        url = PyQuery(self._details[1]).attr("href")
-        album_id = re.search(r"\d+$", url).group(0)
-        return Album(f"albums/_/_/{album_id}")
+        return Album.for_id(self._link_id(1))
 
     @property
     def album_name(self) -> str:
@@ -8,10 +8,10 @@ from metallum.models.metallum import Metallum
 class Search(Metallum, list):
     """Представляет результат поиска"""
 
-    def __init__(self, url, result_handler):
-        super().__init__(url)
+    def __init__(self, url, result_handler, content=None):
+        super().__init__(url, content)
 
-        data = json.loads(self._content)
+        data = json.loads(self.content)
         results = data["aaData"]
         for result in results:
             self.append(result_handler(result))
@@ -1,27 +1,56 @@
 """Вкладка похожих артистов на странице группы"""
 
-from pyquery import PyQuery
+import re
+from typing import Iterator, List
 
+from metallum.models.fragments import fragment_text, parse_cell
 from metallum.models.metallum import Metallum
 
+_ROW = re.compile(r"<tr[^>]*>(.*?)</tr>", re.S)
+_CELL = re.compile(r"<td[^>]*>(.*?)</td>", re.S)
 
-class SimilarArtists(Metallum, list):
-    """Записи во вкладке похожих артистов"""
 
-    def __init__(self, url, result_handler):
-        super().__init__(url)
-        data = self._content
+def _rows(content: str) -> Iterator[List[str]]:
+    """
+    Строки таблицы похожих групп за один проход по HTML: ссылка на группу,
+    затем тексты ячеек (название, страна, жанры, оценка). Заголовок и
+    строка "Show more" пропускаются.
+
+    Examples:
+        >>> next(_rows('<tr><td><a href="bands/Megadeth/138">Megadeth</a></td>'
+        ...            '<td>United States</td><td>Thrash Metal</td>'
+        ...            '<td><span id="score_138">488</span></td></tr>'))
+        ['bands/Megadeth/138', 'Megadeth', 'United States', 'Thrash Metal', '488']
+    """
+    for row in _ROW.finditer(content):
+        cells = _CELL.findall(row[1])
+        if len(cells) < 4:
+            continue
+        links = parse_cell(cells[0].strip()).links
+        if not links:
+            continue
+        yield [links[0].href, *map(fragment_text, cells)]
+
 
-        links_list = PyQuery(data)("a")
-        values_list = PyQuery(data)("tr")
+class SimilarArtists(Metallum, list):
+    """Записи во вкладке похожих артистов"""
 
-        # assert(len(links_list) == len(values_list) - 1)
-        for i in range(0, len(links_list) - 1):
-            details = [links_list[i].attrib.get("href")]
-            details.extend(values_list[i + 1].text_content().split("\n")[1:-1])
+    def __init__(self, url, result_handler, content=None):
+        super().__init__(url, content)
+        for i, details in enumerate(_rows(self.content)):
             self.append(result_handler(details))
             self.result_count = i
 
+    @property
+    def band_id(self) -> str:
+        """
+        ID группы, для которой найдены похожие
+
+        >>> band.similar_artists.band_id
+        '125'
+        """
+        return re.search(r"/id/(\d+)", self._url).group(1)
+
     def __repr__(self):
         def similar_artist_str(similar_artists_result):
             return f"{similar_artists_result.name} ({similar_artists_result.score})"
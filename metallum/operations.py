@@ -1,10 +1,16 @@
 """Модуль операций для API Metallum."""
 
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple, Union
 from urllib.parse import urlencode
 
-from metallum.models import AlbumWrapper, Band
+from metallum.consts import POOL_SIZE
+
+from metallum.models import Album, AlbumWrapper, Band
 from metallum.models.lyrics import Lyrics
-from metallum.models.results import AlbumResult, BandResult, SongResult
+from metallum.models.records import AlbumRecord, BandRecord
+from metallum.models.results import AlbumResult, BandResult, SearchResult, SongResult
 from metallum.models.search import Search
 from metallum.utils import map_params
 
@@ -19,7 +25,21 @@ def band_for_id(band_id: str) -> "Band":
     Returns:
         Band: Группа с указанным ID.
     """
-    return Band(f"bands/_/{band_id}")
+    return Band.for_id(band_id)
+
+
+def band_record_for_id(band_id: str) -> "BandRecord":
+    """
+    Получить данные группы по её ID в виде неизменяемой записи.
+    Разобранная страница группы не сохраняется.
+
+    Args:
+        band_id: ID группы.
+
+    Returns:
+        BandRecord: Данные группы.
+    """
+    return band_for_id(band_id).to_record()
 
 
 def band_search(
@@ -56,8 +76,20 @@ def band_search(
     Returns:
         Search: Результаты поиска.
     """
-    # Создать словарь из аргументов метода
-    params = locals()
+    return Search(band_search_url(locals()), BandResult)
+
+
+def band_search_url(params: dict) -> str:
+    """
+    Сформировать URL расширенного поиска группы
+
+    Args:
+        params: Аргументы ``band_search``.
+
+    Returns:
+        str: Относительный URL поиска.
+    """
+    params = dict(params)
 
     # Преобразовать булево значение в целое число
     params["strict"] = str(int(params["strict"]))
@@ -79,9 +111,7 @@ def band_search(
     )
 
     # Сформировать URL поиска
-    url = "search/ajax-advanced/searching/bands/?" + urlencode(params, True)
-
-    return Search(url, BandResult)
+    return "search/ajax-advanced/searching/bands/?" + urlencode(params, True)
 
 
 def album_for_id(album_id: str) -> "AlbumWrapper":
@@ -94,7 +124,21 @@ def album_for_id(album_id: str) -> "AlbumWrapper":
     Returns:
         AlbumWrapper: Альбом с указанным ID.
     """
-    return AlbumWrapper(url=f"albums/_/_/{album_id}")
+    return AlbumWrapper.for_id(album_id)
+
+
+def album_record_for_id(album_id: str) -> "AlbumRecord":
+    """
+    Получить данные альбома вместе с треками по его ID в виде неизменяемой
+    записи. Разобранная страница альбома не сохраняется.
+
+    Args:
+        album_id: ID альбома.
+
+    Returns:
+        AlbumRecord: Данные альбома.
+    """
+    return Album.for_id(album_id).to_record()
 
 
 def album_search(
@@ -149,8 +193,20 @@ def album_search(
     Returns:
         Search: Результаты поиска.
     """
-    # Создать словарь из аргументов метода
-    params = locals()
+    return Search(album_search_url(locals()), AlbumResult)
+
+
+def album_search_url(params: dict) -> str:
+    """
+    Сформировать URL расширенного поиска альбома
+
+    Args:
+        params: Аргументы ``album_search``.
+
+    Returns:
+        str: Относительный URL поиска.
+    """
+    params = dict(params)
 
     # Преобразовать булево значение в целое число
     params["strict"] = str(int(params["strict"]))
@@ -158,9 +214,9 @@ def album_search(
     params["indie_label"] = str(int(params["indie_label"]))
 
     # Значения месяцев должны быть указаны, если указан год
-    if year_from and not month_from:
+    if params["year_from"] and not params["month_from"]:
         params["month_from"] = "1"
-    if year_to and not month_to:
+    if params["year_to"] and not params["month_to"]:
         params["month_to"] = "12"
 
     # Сопоставить аргументы метода с их эквивалентами в строке запроса URL
@@ -190,9 +246,7 @@ def album_search(
     )
 
     # Сформировать URL поиска
-    url = "search/ajax-advanced/searching/albums/?" + urlencode(params, True)
-
-    return Search(url, AlbumResult)
+    return "search/ajax-advanced/searching/albums/?" + urlencode(params, True)
 
 
 def song_search(
@@ -225,8 +279,20 @@ def song_search(
     Returns:
         Search: Результаты поиска.
     """
-    # Создать словарь из аргументов метода
-    params = locals()
+    return Search(song_search_url(locals()), SongResult)
+
+
+def song_search_url(params: dict) -> str:
+    """
+    Сформировать URL расширенного поиска песни
+
+    Args:
+        params: Аргументы ``song_search``.
+
+    Returns:
+        str: Относительный URL поиска.
+    """
+    params = dict(params)
 
     # Преобразовать булево значение в целое число
     params["strict"] = str(int(params["strict"]))
@@ -254,9 +320,7 @@ def song_search(
     )
 
     # Сформировать URL поиска
-    url = "search/ajax-advanced/searching/songs/?" + urlencode(params, True)
-
-    return Search(url, SongResult)
+    return "search/ajax-advanced/searching/songs/?" + urlencode(params, True)
 
 
 def lyrics_for_id(lyrics_id: int) -> "Lyrics":
@@ -270,3 +334,224 @@ def lyrics_for_id(lyrics_id: int) -> "Lyrics":
         Lyrics: Текст песни с указанным ID.
     """
     return Lyrics(lyrics_id)
+
+
+def iter_search(
+    search, args, kwargs, limit: Optional[int], prefetch: bool
+) -> Iterator["SearchResult"]:
+    """
+    Перебрать результаты поиска по всем страницам
+
+    Args:
+        search: Функция поиска (``band_search``, ``album_search``...) или
+            функция с той же сигнатурой, возвращающая страницы результатов.
+        args: Позиционные аргументы функции поиска.
+        kwargs: Именованные аргументы функции поиска.
+        limit: Максимальное количество результатов.
+        prefetch: Загружать ли следующую страницу в фоне, пока
+            обрабатывается текущая.
+
+    Returns:
+        Iterator[SearchResult]: Результаты поиска.
+    """
+    start = kwargs.pop("page_start", 0)
+    remaining = limit
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+    try:
+        page = search(*args, page_start=start, **kwargs)
+        while page and (remaining is None or remaining > 0):
+            start += len(page)
+            has_more = start < page.result_count and (
+                remaining is None or remaining > len(page)
+            )
+            next_page = None
+            if has_more and executor is not None:
+                next_page = executor.submit(search, *args, page_start=start, **kwargs)
+
+            for result in page if remaining is None else page[:remaining]:
+                yield result
+            if remaining is not None:
+                remaining -= len(page)
+
+            if not has_more:
+                break
+            if next_page is not None:
+                page = next_page.result()
+            else:
+                page = search(*args, page_start=start, **kwargs)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_band_search(
+    name, limit: Optional[int] = None, prefetch: bool = True, **kwargs
+) -> Iterator["BandResult"]:
+    """
+    Перебрать результаты поиска группы по всем страницам. В памяти
+    одновременно хранится не больше двух страниц результатов.
+
+    Args:
+        name: Название группы.
+        limit: Максимальное количество результатов.
+        prefetch: Загружать ли следующую страницу в фоне.
+        **kwargs: Остальные аргументы ``band_search``.
+
+    Returns:
+        Iterator[BandResult]: Результаты поиска.
+    """
+    return iter_search(band_search, (name,), kwargs, limit, prefetch)
+
+
+def iter_album_search(
+    title, limit: Optional[int] = None, prefetch: bool = True, **kwargs
+) -> Iterator["AlbumResult"]:
+    """
+    Перебрать результаты поиска альбома по всем страницам. В памяти
+    одновременно хранится не больше двух страниц результатов.
+
+    Args:
+        title: Название альбома.
+        limit: Максимальное количество результатов.
+        prefetch: Загружать ли следующую страницу в фоне.
+        **kwargs: Остальные аргументы ``album_search``.
+
+    Returns:
+        Iterator[AlbumResult]: Результаты поиска.
+    """
+    return iter_search(album_search, (title,), kwargs, limit, prefetch)
+
+
+def iter_song_search(
+    title, limit: Optional[int] = None, prefetch: bool = True, **kwargs
+) -> Iterator["SongResult"]:
+    """
+    Перебрать результаты поиска песни по всем страницам. В памяти
+    одновременно хранится не больше двух страниц результатов.
+
+    Args:
+        title: Название песни.
+        limit: Максимальное количество результатов.
+        prefetch: Загружать ли следующую страницу в фоне.
+        **kwargs: Остальные аргументы ``song_search``.
+
+    Returns:
+        Iterator[SongResult]: Результаты поиска.
+    """
+    return iter_search(song_search, (title,), kwargs, limit, prefetch)
+
+
+def _fetch_many(
+    loader: Callable[[Any], Any], ids: Iterable, max_workers: int, ordered: bool
+) -> Union[List[Any], Iterator[Tuple[Any, Any]]]:
+    """
+    Загрузить несколько сущностей параллельно
+
+    Страница каждой сущности загружается и разбирается сразу, в рабочем
+    потоке. Повторяющиеся ID загружаются один раз. Ошибка загрузки отдельной
+    сущности не прерывает загрузку остальных: вместо результата
+    возвращается исключение.
+
+    Args:
+        loader: Функция, создающая сущность по ID.
+        ids: ID сущностей.
+        max_workers: Максимальное количество одновременных загрузок.
+        ordered: Вернуть список в порядке ``ids`` (True) или итератор пар
+            (ID, результат) в порядке завершения загрузок (False).
+
+    Returns:
+        Union[List, Iterator[Tuple]]: Результаты загрузки.
+    """
+    ids = list(ids)
+    unique_ids = list(dict.fromkeys(ids))
+
+    def load(entity_id):
+        # Сущности создаются лениво, поэтому страница загружается явно,
+        # чтобы запрос и разбор выполнялись в рабочем потоке
+        try:
+            return loader(entity_id).load()
+        except Exception as error:  # pylint: disable=broad-exception-caught
+            return error
+
+    def submit(executor, entity_id):
+        # Загрузка выполняется в контексте вызывающего кода, чтобы рабочие
+        # потоки использовали ту же карту идентичности
+        context = contextvars.copy_context()
+        return executor.submit(context.run, load, entity_id)
+
+    if ordered:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [submit(executor, entity_id) for entity_id in unique_ids]
+            results = dict(zip(unique_ids, (f.result() for f in futures)))
+        return [results[entity_id] for entity_id in ids]
+
+    def iterate():
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                submit(executor, entity_id): entity_id for entity_id in unique_ids
+            }
+            try:
+                for future in as_completed(futures):
+                    yield futures[future], future.result()
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    return iterate()
+
+
+def bands_for_ids(
+    band_ids: Iterable[str], max_workers: int = POOL_SIZE, ordered: bool = True
+) -> Union[List[Union["Band", Exception]], Iterator[Tuple[str, Any]]]:
+    """
+    Получить несколько групп по их ID параллельно, соблюдая общий лимит
+    частоты запросов.
+
+    Args:
+        band_ids: ID групп (повторы загружаются один раз).
+        max_workers: Максимальное количество одновременных загрузок.
+        ordered: Вернуть список в порядке ``band_ids`` или итератор пар
+            (ID, результат) по мере загрузки.
+
+    Returns:
+        Группы или исключения, возникшие при загрузке отдельных групп.
+    """
+    return _fetch_many(band_for_id, band_ids, max_workers, ordered)
+
+
+def albums_for_ids(
+    album_ids: Iterable[str], max_workers: int = POOL_SIZE, ordered: bool = True
+) -> Union[List[Union["AlbumWrapper", Exception]], Iterator[Tuple[str, Any]]]:
+    """
+    Получить несколько альбомов по их ID параллельно, соблюдая общий лимит
+    частоты запросов.
+
+    Args:
+        album_ids: ID альбомов (повторы загружаются один раз).
+        max_workers: Максимальное количество одновременных загрузок.
+        ordered: Вернуть список в порядке ``album_ids`` или итератор пар
+            (ID, результат) по мере загрузки.
+
+    Returns:
+        Альбомы или исключения, возникшие при загрузке отдельных альбомов.
+    """
+    return _fetch_many(album_for_id, album_ids, max_workers, ordered)
+
+
+def lyrics_for_ids(
+    lyrics_ids: Iterable, max_workers: int = POOL_SIZE, ordered: bool = True
+) -> Union[List[Union["Lyrics", Exception]], Iterator[Tuple[Any, Any]]]:
+    """
+    Получить несколько текстов песен по их ID параллельно, соблюдая общий
+    лимит частоты запросов.
+
+    Args:
+        lyrics_ids: ID текстов песен (повторы загружаются один раз).
+        max_workers: Максимальное количество одновременных загрузок.
+        ordered: Вернуть список в порядке ``lyrics_ids`` или итератор пар
+            (ID, результат) по мере загрузки.
+
+    Returns:
+        Тексты песен или исключения, возникшие при загрузке отдельных текстов.
+    """
+    return _fetch_many(lyrics_for_id, lyrics_ids, max_workers, ordered)
@@ -0,0 +1,196 @@
+"""Ограничение частоты запросов к Metal Archives"""
+
+import asyncio
+import datetime
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+from metallum.consts import RATE_LIMIT_BURST, REQUEST_TIMEOUT
+
+# Во сколько раз снижается частота запросов после ответа 429/503
+THROTTLE_FACTOR = 0.5
+
+# Во сколько раз частота восстанавливается после каждого успешного запроса
+RECOVERY_FACTOR = 1.1
+
+# Пауза после 429/503, если сервер не прислал Retry-After, в секундах
+DEFAULT_BACKOFF = 5.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Разобрать заголовок Retry-After
+
+    Args:
+        value: Значение заголовка: количество секунд или HTTP-дата
+
+    Returns:
+        float: Пауза в секундах или None, если заголовок пуст или некорректен
+
+    Examples:
+        >>> parse_retry_after('120')
+        120.0
+        >>> parse_retry_after(None) is None
+        True
+        >>> parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT')
+        0.0
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = datetime.datetime.now(datetime.timezone.utc)
+    return max(0.0, (date - now).total_seconds())
+
+
+class RateLimiter:
+    """
+    Ограничитель частоты запросов по алгоритму token bucket.
+
+    Каждый запрос расходует один токен; токены пополняются со скоростью
+    ``rate`` в секунду и накапливаются не больше ``burst``. Запрос ждёт
+    только тогда, когда токенов не осталось, поэтому время, потраченное
+    вызывающим кодом на разбор страниц или чтение кеша, не теряется.
+    Ограничитель потокобезопасен и может одновременно использоваться
+    синхронным и асинхронным транспортом.
+
+    Атрибуты:
+        rate: Текущая допустимая частота запросов в секунду
+        burst: Максимальное количество запросов подряд без ожидания
+    """
+
+    def __init__(
+        self,
+        rate: float = 1 / REQUEST_TIMEOUT,
+        burst: int = RATE_LIMIT_BURST,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be at least 1")
+        self.rate = rate
+        self.burst = burst
+        self._base_rate = rate
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        # Момент, с которого идёт пополнение токенов; после 429/503 он
+        # переносится в будущее на время паузы
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def _reserve(self) -> float:
+        """
+        Забрать токен и вернуть время, которое нужно подождать до запроса.
+
+        Токенов может стать меньше нуля: так параллельные запросы встают
+        в очередь, а не соревнуются за один и тот же токен.
+
+        Returns:
+            float: Время ожидания в секундах
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._tokens -= 1
+            wait = max(0.0, self._updated - now)
+            if self._tokens < 0:
+                wait += -self._tokens / self.rate
+            return wait
+
+    def acquire(self) -> float:
+        """
+        Дождаться разрешения на запрос
+
+        Returns:
+            float: Сколько секунд пришлось ждать
+        """
+        wait = self._reserve()
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    async def aacquire(self) -> float:
+        """
+        Асинхронный вариант ``acquire``
+
+        Returns:
+            float: Сколько секунд пришлось ждать
+        """
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+    def throttle(self, retry_after: Optional[float] = None) -> None:
+        """
+        Замедлиться после ответа 429/503: приостановить запросы на время
+        ``retry_after`` и снизить частоту.
+
+        Args:
+            retry_after: Пауза из заголовка Retry-After, в секундах
+        """
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            pause = DEFAULT_BACKOFF if retry_after is None else retry_after
+            self._updated = max(self._updated, now + pause)
+            self.rate = max(self._base_rate / 64, self.rate * THROTTLE_FACTOR)
+            self._tokens = min(self._tokens, 1.0)
+
+    def record_success(self) -> None:
+        """Постепенно вернуть исходную частоту после успешного запроса"""
+        if self.rate < self._base_rate:
+            with self._lock:
+                self.rate = min(self._base_rate, self.rate * RECOVERY_FACTOR)
+
+
+_rate_limiter: Optional[RateLimiter] = None
+_rate_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """
+    Получить общий для процесса ограничитель частоты запросов.
+
+    Returns:
+        RateLimiter: Текущий ограничитель
+    """
+    global _rate_limiter
+    if _rate_limiter is None:
+        with _rate_limiter_lock:
+            if _rate_limiter is None:
+                _rate_limiter = RateLimiter()
+    return _rate_limiter
+
+
+def set_rate_limiter(limiter: Optional[RateLimiter]) -> Optional[RateLimiter]:
+    """
+    Заменить общий ограничитель (например, чтобы изменить частоту запросов).
+
+    Args:
+        limiter: Новый ограничитель или None, чтобы вернуться к ограничителю
+            по умолчанию
+
+    Returns:
+        RateLimiter: Предыдущий ограничитель
+    """
+    global _rate_limiter
+    with _rate_limiter_lock:
+        previous, _rate_limiter = _rate_limiter, limiter
+    return previous
@@ -0,0 +1,668 @@
+"""Локальное хранилище сущностей Metal Archives
+
+Хранилище сохраняет в SQLite уже разобранные группы, альбомы, треки,
+тексты песен и связи "похожие группы" и отвечает на вопросы в духе
+``band_search``, ``album_search`` и ``song_search`` без обращения к сайту
+и без разбора HTML. Поиск по текстам песен выполняется полнотекстовым
+индексом FTS5. Хранилище можно наполнять обходчиком и поддерживать в
+актуальном состоянии синхронизацией::
+
+    store = Store("mirror.sqlite3")
+    Crawler(follow=(ALBUMS, TRACKS, LYRICS)).run(on_entity=store.on_entity)
+    Sync(on_change=store.apply_change).sync_known_bands()
+    store.search_albums(band="Metallica", types=["Full-length"])
+"""
+
+import datetime
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from metallum.consts import STORE_DB
+from metallum.crawler import ALBUM, BAND, LYRICS, SIMILAR_ARTISTS
+from metallum.models.records import AlbumRecord, BandRecord, SongRecord, TrackRecord
+from metallum.sync import REMOVED, Change
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS bands ("
+    "id TEXT PRIMARY KEY, name TEXT NOT NULL, country TEXT, location TEXT, "
+    "status TEXT, formed_in TEXT, years_active TEXT, genres TEXT, themes TEXT, "
+    "label TEXT, logo TEXT, photo TEXT, added TEXT, modified TEXT)",
+    "CREATE INDEX IF NOT EXISTS bands_name ON bands (name COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS bands_country ON bands (country)",
+    "CREATE TABLE IF NOT EXISTS band_genres ("
+    "band_id TEXT NOT NULL, genre TEXT NOT NULL COLLATE NOCASE, "
+    "PRIMARY KEY (band_id, genre))",
+    "CREATE INDEX IF NOT EXISTS band_genres_genre ON band_genres (genre)",
+    "CREATE TABLE IF NOT EXISTS albums ("
+    "id TEXT PRIMARY KEY, url TEXT, title TEXT NOT NULL, type TEXT, "
+    "year INTEGER, date TEXT, label TEXT, score INTEGER, review_count INTEGER, "
+    "cover TEXT, duration INTEGER, added TEXT, modified TEXT)",
+    "CREATE INDEX IF NOT EXISTS albums_title ON albums (title COLLATE NOCASE)",
+    "CREATE INDEX IF NOT EXISTS albums_year ON albums (year)",
+    "CREATE INDEX IF NOT EXISTS albums_type ON albums (type)",
+    "CREATE TABLE IF NOT EXISTS album_bands ("
+    "album_id TEXT NOT NULL, position INTEGER NOT NULL, band_id TEXT NOT NULL, "
+    "band_name TEXT NOT NULL, PRIMARY KEY (album_id, position))",
+    "CREATE INDEX IF NOT EXISTS album_bands_band ON album_bands (band_id)",
+    "CREATE TABLE IF NOT EXISTS tracks ("
+    "id TEXT PRIMARY KEY, album_id TEXT NOT NULL, position INTEGER NOT NULL, "
+    "number INTEGER, overall_number INTEGER, disc_number INTEGER, title TEXT, "
+    "full_title TEXT, duration INTEGER, band_id TEXT)",
+    "CREATE INDEX IF NOT EXISTS tracks_album ON tracks (album_id, position)",
+    "CREATE INDEX IF NOT EXISTS tracks_title ON tracks (title COLLATE NOCASE)",
+    # Тексты хранятся в обычной таблице (поиск и удаление по track_id идут по
+    # индексу), а FTS5 индексирует их как внешнее содержимое по rowid
+    "CREATE TABLE IF NOT EXISTS lyrics ("
+    "id INTEGER PRIMARY KEY, track_id TEXT NOT NULL UNIQUE, text TEXT NOT NULL)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS lyrics_fts USING fts5("
+    "text, content='lyrics', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_insert AFTER INSERT ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts (rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_delete AFTER DELETE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts (lyrics_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); END",
+    "CREATE TRIGGER IF NOT EXISTS lyrics_update AFTER UPDATE ON lyrics BEGIN "
+    "INSERT INTO lyrics_fts (lyrics_fts, rowid, text) "
+    "VALUES ('delete', old.id, old.text); "
+    "INSERT INTO lyrics_fts (rowid, text) VALUES (new.id, new.text); END",
+    "CREATE TABLE IF NOT EXISTS similar_artists ("
+    "band_id TEXT NOT NULL, similar_id TEXT NOT NULL, name TEXT, score INTEGER, "
+    "PRIMARY KEY (band_id, similar_id))",
+)
+
+# Разделитель элементов списков (жанров, тем) в одной ячейке
+_SEPARATOR = "\n"
+
+
+def _date(value: Optional[datetime.datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def _parse_date(value: Optional[str]) -> Optional[datetime.datetime]:
+    return datetime.datetime.fromisoformat(value) if value else None
+
+
+def _split(value: Optional[str]) -> Tuple[str, ...]:
+    return tuple(value.split(_SEPARATOR)) if value else ()
+
+
+def _match(column: str, value: str, strict: bool) -> Tuple[str, str]:
+    """Условие сравнения строки без учёта регистра: точное или по подстроке"""
+    if strict:
+        return f"{column} = ? COLLATE NOCASE", value
+    return f"{column} LIKE ?", f"%{value}%"
+
+
+def _in(column: str, values: Sequence) -> Tuple[str, list]:
+    return f"{column} IN ({', '.join('?' * len(values))})", list(values)
+
+
+class Store:
+    """
+    Хранилище разобранных сущностей в SQLite.
+
+    Как и ``SQLiteCache``, база работает в режиме WAL и у каждого потока
+    своё соединение, поэтому запросы можно выполнять из нескольких потоков
+    (например, из обработчиков веб-сервиса).
+
+    Атрибуты:
+        path: Путь к базе
+    """
+
+    def __init__(self, path: str = STORE_DB, timeout: float = 30.0):
+        self.path = str(path)
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._connection() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def close(self) -> None:
+        """Закрыть соединение текущего потока"""
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    # Запись
+
+    def save_band(self, band: Union[BandRecord, Any]) -> BandRecord:
+        """
+        Сохранить группу
+
+        Args:
+            band: Запись группы или объект с методом ``to_record`` (Band)
+
+        Returns:
+            BandRecord: Сохранённая запись
+        """
+        record = band if isinstance(band, BandRecord) else band.to_record()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO bands VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.id,
+                    record.name,
+                    record.country,
+                    record.location,
+                    record.status,
+                    record.formed_in,
+                    record.years_active,
+                    _SEPARATOR.join(record.genres),
+                    _SEPARATOR.join(record.themes),
+                    record.label,
+                    record.logo,
+                    record.photo,
+                    _date(record.added),
+                    _date(record.modified),
+                ),
+            )
+            connection.execute(
+                "DELETE FROM band_genres WHERE band_id = ?", (record.id,)
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO band_genres VALUES (?, ?)",
+                [(record.id, genre) for genre in record.genres],
+            )
+        return record
+
+    def save_album(self, album: Union[AlbumRecord, Any]) -> AlbumRecord:
+        """
+        Сохранить альбом вместе с треками
+
+        Args:
+            album: Запись альбома или объект с методом ``to_record``
+                (Album, AlbumWrapper)
+
+        Returns:
+            AlbumRecord: Сохранённая запись
+        """
+        record = album if isinstance(album, AlbumRecord) else album.to_record()
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO albums VALUES "
+                "(?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    record.id,
+                    record.url,
+                    record.title,
+                    record.type,
+                    record.year,
+                    _date(record.date),
+                    record.label,
+                    record.score,
+                    record.review_count,
+                    record.cover,
+                    record.duration,
+                    _date(record.added),
+                    _date(record.modified),
+                ),
+            )
+            connection.execute(
+                "DELETE FROM album_bands WHERE album_id = ?", (record.id,)
+            )
+            connection.executemany(
+                "INSERT INTO album_bands VALUES (?, ?, ?, ?)",
+                [
+                    (record.id, position, band_id, name)
+                    for position, (band_id, name) in enumerate(
+                        zip(record.band_ids, record.band_names)
+                    )
+                ],
+            )
+            connection.execute("DELETE FROM tracks WHERE album_id = ?", (record.id,))
+            connection.executemany(
+                "INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        track.id,
+                        record.id,
+                        position,
+                        track.number,
+                        track.overall_number,
+                        track.disc_number,
+                        track.title,
+                        track.full_title,
+                        track.duration,
+                        track.band_id,
+                    )
+                    for position, track in enumerate(record.tracks)
+                ],
+            )
+        return record
+
+    def save_lyrics(self, track_id: str, lyrics: Any) -> None:
+        """
+        Сохранить текст песни
+
+        Args:
+            track_id: ID трека (он же ID текста)
+            lyrics: Текст или объект ``Lyrics``
+        """
+        # Триггеры обновляют полнотекстовый индекс только для этой строки
+        with self._connection() as connection:
+            connection.execute(
+                "INSERT INTO lyrics (track_id, text) VALUES (?, ?) "
+                "ON CONFLICT (track_id) DO UPDATE SET text = excluded.text",
+                (track_id, str(lyrics)),
+            )
+
+    def save_similar_artists(self, band_id: str, similar_artists: Iterable) -> None:
+        """
+        Сохранить похожие группы
+
+        Args:
+            band_id: ID группы
+            similar_artists: Результаты ``Band.similar_artists``
+        """
+        with self._connection() as connection:
+            connection.execute(
+                "DELETE FROM similar_artists WHERE band_id = ?", (band_id,)
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO similar_artists VALUES (?, ?, ?, ?)",
+                [
+                    (band_id, similar.id, similar.name, similar.score)
+                    for similar in similar_artists
+                ],
+            )
+
+    def delete(self, kind: str, entity_id: str) -> None:
+        """
+        Удалить сущность
+
+        Args:
+            kind: Вид сущности (``BAND``, ``ALBUM``, ``LYRICS``)
+            entity_id: ID сущности
+        """
+        with self._connection() as connection:
+            if kind == BAND:
+                connection.execute("DELETE FROM bands WHERE id = ?", (entity_id,))
+                connection.execute(
+                    "DELETE FROM band_genres WHERE band_id = ?", (entity_id,)
+                )
+                connection.execute(
+                    "DELETE FROM similar_artists WHERE band_id = ?", (entity_id,)
+                )
+            elif kind == ALBUM:
+                for table, column in (
+                    ("albums", "id"),
+                    ("album_bands", "album_id"),
+                    ("tracks", "album_id"),
+                ):
+                    connection.execute(
+                        f"DELETE FROM {table} WHERE {column} = ?", (entity_id,)
+                    )
+            elif kind == LYRICS:
+                connection.execute(
+                    "DELETE FROM lyrics WHERE track_id = ?", (entity_id,)
+                )
+
+    def on_entity(self, kind: str, entity: Any) -> None:
+        """
+        Сохранить сущность, найденную обходчиком (подходит как
+        ``on_entity`` для ``Crawler.run``). Треки сохраняются вместе с
+        альбомом, похожие группы - если обход идёт по ``SIMILAR_ARTISTS``.
+
+        Args:
+            kind: Вид сущности
+            entity: Сущность
+        """
+        if kind == BAND:
+            self.save_band(entity)
+        elif kind == ALBUM:
+            self.save_album(entity)
+        elif kind == LYRICS:
+            self.save_lyrics(entity.id, entity)
+        elif kind == SIMILAR_ARTISTS:
+            self.save_similar_artists(entity.band_id, entity)
+
+    def apply_change(self, change: Change, entity: Any) -> None:
+        """
+        Применить изменение из синхронизации (подходит как ``on_change``
+        для ``Sync``)
+
+        Args:
+            change: Изменение
+            entity: Изменившаяся сущность (None для удалённых)
+        """
+        if change.change == REMOVED:
+            self.delete(change.kind, change.id)
+        else:
+            self.on_entity(change.kind, entity)
+
+    # Чтение
+
+    def _band_records(
+        self, where: str, params: list, limit, offset
+    ) -> List[BandRecord]:
+        rows = self._connection().execute(
+            f"SELECT * FROM bands {where} ORDER BY name COLLATE NOCASE, id "
+            "LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, offset],
+        )
+        return [
+            BandRecord(
+                id=row[0],
+                url=f"bands/_/{row[0]}",
+                name=row[1],
+                country=row[2],
+                location=row[3],
+                status=row[4],
+                formed_in=row[5],
+                years_active=row[6],
+                genres=_split(row[7]),
+                themes=_split(row[8]),
+                label=row[9],
+                logo=row[10],
+                photo=row[11],
+                added=_parse_date(row[12]),
+                modified=_parse_date(row[13]),
+            )
+            for row in rows
+        ]
+
+    def _tracks(self, album_ids: Sequence[str]) -> Dict[str, List[TrackRecord]]:
+        tracks: Dict[str, List[TrackRecord]] = {album_id: [] for album_id in album_ids}
+        if not album_ids:
+            return tracks
+        condition, params = _in("album_id", album_ids)
+        rows = self._connection().execute(
+            "SELECT album_id, id, number, overall_number, disc_number, title, "
+            f"full_title, duration, band_id FROM tracks WHERE {condition} "
+            "ORDER BY album_id, position",
+            params,
+        )
+        for album_id, *fields in rows:
+            tracks[album_id].append(TrackRecord(*fields))
+        return tracks
+
+    def _album_records(
+        self, where: str, params: list, limit, offset
+    ) -> List[AlbumRecord]:
+        connection = self._connection()
+        rows = connection.execute(
+            f"SELECT * FROM albums {where} ORDER BY year, title COLLATE NOCASE, id "
+            "LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, offset],
+        ).fetchall()
+        album_ids = [row[0] for row in rows]
+        bands: Dict[str, List[Tuple[str, str]]] = {
+            album_id: [] for album_id in album_ids
+        }
+        if album_ids:
+            condition, in_params = _in("album_id", album_ids)
+            for album_id, band_id, name in connection.execute(
+                "SELECT album_id, band_id, band_name FROM album_bands "
+                f"WHERE {condition} ORDER BY album_id, position",
+                in_params,
+            ):
+                bands[album_id].append((band_id, name))
+        tracks = self._tracks(album_ids)
+        return [
+            AlbumRecord(
+                id=row[0],
+                url=row[1],
+                title=row[2],
+                type=row[3],
+                band_ids=tuple(band_id for band_id, _ in bands[row[0]]),
+                band_names=tuple(name for _, name in bands[row[0]]),
+                added=_parse_date(row[11]),
+                modified=_parse_date(row[12]),
+                duration=row[10],
+                date=_parse_date(row[5]),
+                year=row[4],
+                label=row[6],
+                score=row[7],
+                review_count=row[8],
+                cover=row[9],
+                tracks=tuple(tracks[row[0]]),
+            )
+            for row in rows
+        ]
+
+    def band_for_id(self, band_id: str) -> Optional[BandRecord]:
+        """
+        Получить сохранённую группу
+
+        Args:
+            band_id: ID группы
+
+        Returns:
+            BandRecord: Группа или None
+        """
+        records = self._band_records("WHERE id = ?", [str(band_id)], 1, 0)
+        return records[0] if records else None
+
+    def album_for_id(self, album_id: str) -> Optional[AlbumRecord]:
+        """
+        Получить сохранённый альбом вместе с треками
+
+        Args:
+            album_id: ID альбома
+
+        Returns:
+            AlbumRecord: Альбом или None
+        """
+        records = self._album_records("WHERE id = ?", [str(album_id)], 1, 0)
+        return records[0] if records else None
+
+    def lyrics_for_id(self, track_id: str) -> Optional[str]:
+        """
+        Получить сохранённый текст песни
+
+        Args:
+            track_id: ID трека
+
+        Returns:
+            str: Текст или None
+        """
+        row = (
+            self._connection()
+            .execute("SELECT text FROM lyrics WHERE track_id = ?", (str(track_id),))
+            .fetchone()
+        )
+        return row[0] if row else None
+
+    def similar_artists(self, band_id: str) -> List[Tuple[str, str, int]]:
+        """
+        Похожие группы в порядке убывания оценки
+
+        Args:
+            band_id: ID группы
+
+        Returns:
+            List[Tuple[str, str, int]]: ID, название и оценка
+        """
+        return (
+            self._connection()
+            .execute(
+                "SELECT similar_id, name, score FROM similar_artists "
+                "WHERE band_id = ? ORDER BY score DESC",
+                (str(band_id),),
+            )
+            .fetchall()
+        )
+
+    def search_bands(
+        self,
+        name: Optional[str] = None,
+        strict: bool = True,
+        genre: Optional[str] = None,
+        countries: Optional[Sequence[str]] = None,
+        status: Optional[str] = None,
+        label: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[BandRecord]:
+        """
+        Найти сохранённые группы (аналог ``band_search``)
+
+        Args:
+            name: Название группы
+            strict: Точное совпадение названия (иначе - по подстроке)
+            genre: Подстрока жанра
+            countries: Страны
+            status: Статус группы
+            label: Лейбл
+            limit: Максимальное количество результатов
+            offset: Сколько результатов пропустить
+
+        Returns:
+            List[BandRecord]: Группы, упорядоченные по названию
+        """
+        conditions, params = [], []
+        if name is not None:
+            condition, param = _match("name", name, strict)
+            conditions.append(condition)
+            params.append(param)
+        if genre is not None:
+            conditions.append(
+                "id IN (SELECT band_id FROM band_genres WHERE genre LIKE ?)"
+            )
+            params.append(f"%{genre}%")
+        if countries:
+            condition, in_params = _in("country", countries)
+            conditions.append(condition)
+            params.extend(in_params)
+        for column, value in (("status", status), ("label", label)):
+            if value is not None:
+                conditions.append(f"{column} = ? COLLATE NOCASE")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._band_records(where, params, limit, offset)
+
+    def search_albums(
+        self,
+        title: Optional[str] = None,
+        strict: bool = True,
+        band: Optional[str] = None,
+        band_id: Optional[str] = None,
+        year_from: Optional[int] = None,
+        year_to: Optional[int] = None,
+        types: Optional[Sequence[str]] = None,
+        label: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[AlbumRecord]:
+        """
+        Найти сохранённые альбомы (аналог ``album_search``)
+
+        Args:
+            title: Название альбома
+            strict: Точное совпадение названий (иначе - по подстроке)
+            band: Название группы
+            band_id: ID группы
+            year_from: Год выпуска (от)
+            year_to: Год выпуска (до)
+            types: Типы альбома
+            label: Лейбл
+            limit: Максимальное количество результатов
+            offset: Сколько результатов пропустить
+
+        Returns:
+            List[AlbumRecord]: Альбомы с треками, упорядоченные по году
+        """
+        conditions, params = [], []
+        if title is not None:
+            condition, param = _match("title", title, strict)
+            conditions.append(condition)
+            params.append(param)
+        if band is not None:
+            condition, param = _match("band_name", band, strict)
+            conditions.append(
+                f"id IN (SELECT album_id FROM album_bands WHERE {condition})"
+            )
+            params.append(param)
+        if band_id is not None:
+            conditions.append(
+                "id IN (SELECT album_id FROM album_bands WHERE band_id = ?)"
+            )
+            params.append(str(band_id))
+        if year_from is not None:
+            conditions.append("year >= ?")
+            params.append(year_from)
+        if year_to is not None:
+            conditions.append("year <= ?")
+            params.append(year_to)
+        if types:
+            condition, in_params = _in("type", types)
+            conditions.append(condition)
+            params.extend(in_params)
+        if label is not None:
+            conditions.append("label = ? COLLATE NOCASE")
+            params.append(label)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        return self._album_records(where, params, limit, offset)
+
+    def search_songs(
+        self,
+        title: Optional[str] = None,
+        strict: bool = True,
+        band: Optional[str] = None,
+        release: Optional[str] = None,
+        lyrics: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> List[SongRecord]:
+        """
+        Найти сохранённые песни (аналог ``song_search``)
+
+        Args:
+            title: Название песни
+            strict: Точное совпадение названий (иначе - по подстроке)
+            band: Название группы
+            release: Название альбома
+            lyrics: Запрос полнотекстового поиска FTS5 по текстам песен,
+                например ``'"fear of the dark"'`` или ``'walk* NEAR alone'``
+            limit: Максимальное количество результатов
+            offset: Сколько результатов пропустить
+
+        Returns:
+            List[SongRecord]: Песни; при поиске по тексту - по релевантности
+        """
+        conditions, params = [], []
+        for column, value in (
+            ("t.title", title),
+            ("b.band_name", band),
+            ("a.title", release),
+        ):
+            if value is not None:
+                condition, param = _match(column, value, strict)
+                conditions.append(condition)
+                params.append(param)
+        join = ""
+        order = "b.band_name COLLATE NOCASE, a.year, t.album_id, t.position"
+        if lyrics is not None:
+            join = (
+                "JOIN lyrics l ON l.track_id = t.id "
+                "JOIN lyrics_fts ON lyrics_fts.rowid = l.id "
+            )
+            conditions.append("lyrics_fts MATCH ?")
+            params.append(lyrics)
+            order = "lyrics_fts.rank"
+        where = f"WHERE {' AND '.join(conditions)} " if conditions else ""
+        rows = self._connection().execute(
+            "SELECT t.id, t.title, t.duration, b.band_id, b.band_name, "
+            "a.id, a.title, a.type FROM tracks t "
+            "JOIN albums a ON a.id = t.album_id "
+            "JOIN album_bands b ON b.album_id = t.album_id AND b.band_id = "
+            "COALESCE(t.band_id, (SELECT band_id FROM album_bands "
+            "WHERE album_id = t.album_id AND position = 0)) "
+            f"{join}{where}ORDER BY {order} LIMIT ? OFFSET ?",
+            [*params, -1 if limit is None else limit, offset],
+        )
+        return [SongRecord(*row) for row in rows]
@@ -0,0 +1,413 @@
+"""Инкрементальная синхронизация по времени последнего изменения
+
+Страницы групп и альбомов содержат отметку "Last modified on" в
+``#auditTrail``. Синхронизация запоминает её для каждой сущности и при
+следующей проверке загружает страницу заново, но читает только эту
+отметку, без разбора документа. Если отметка не изменилась, страница не
+разбирается, а дискография, треки и тексты песен не проверяются. Все
+обнаруженные изменения записываются в ленту, которую можно читать с
+любого места. Например::
+
+    with Sync("mirror.sqlite3") as sync:
+        last_seq = sync.last_seq
+        sync.sync_known_bands()
+        for change in sync.changes(since=last_seq):
+            ...
+"""
+
+import contextvars
+import datetime
+import hashlib
+import re
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Tuple
+
+from metallum.consts import POOL_SIZE, SYNC_DB
+from metallum.crawler import ALBUM, ALBUMS, BAND, LYRICS
+from metallum.models import AlbumWrapper, Band
+from metallum.models.lyrics import Lyrics
+from metallum.models.metallum import Metallum
+from metallum.utils import make_absolute, offset_time
+
+# Виды изменений
+ADDED = "added"
+MODIFIED = "modified"
+REMOVED = "removed"
+
+_LAST_MODIFIED = re.compile(
+    r"Last modified on:\s*(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})"
+)
+
+
+def parse_modified(content: str) -> Optional[datetime.datetime]:
+    """
+    Прочитать время последнего изменения сущности из HTML страницы без
+    построения дерева документа
+
+    Args:
+        content: Содержимое страницы группы или альбома
+
+    Returns:
+        datetime.datetime: Время изменения (UTC) или None
+
+    Examples:
+        >>> parse_modified('<td>Last modified on: 2024-05-13 13:15:47</td>')
+        datetime.datetime(2024, 5, 13, 16, 15, 47)
+        >>> parse_modified('<td>Last modified on: N/A</td>') is None
+        True
+    """
+    match = _LAST_MODIFIED.search(content)
+    if match is None:
+        return None
+    return offset_time(datetime.datetime.strptime(match[1], "%Y-%m-%d %H:%M:%S"))
+
+
+def _version(content: str, modified: Optional[datetime.datetime]) -> str:
+    """
+    Версия сущности: время изменения, а если его нет на странице -
+    контрольная сумма содержимого
+    """
+    if modified is not None:
+        return modified.isoformat()
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+class Change(NamedTuple):
+    """Запись ленты изменений"""
+
+    seq: int
+    kind: str
+    id: str
+    change: str
+    version: Optional[str]
+    recorded: float
+
+
+class Sync:
+    """
+    Инкрементальная синхронизация с состоянием и лентой изменений в SQLite.
+
+    Атрибуты:
+        path: Путь к базе состояния
+        follow: Дочерние сущности, которые проверяются при изменении
+            родителя: ``ALBUMS`` (альбомы группы) и ``LYRICS`` (тексты
+            песен альбома)
+        on_change: Функция, которая получает каждое изменение и
+            соответствующую сущность (None для удалённых), например, чтобы
+            обновить локальное хранилище
+        failures: Сущности, которые не удалось проверить при последнем
+            вызове: (вид, ID, исключение)
+    """
+
+    def __init__(
+        self,
+        path: str = SYNC_DB,
+        follow: Iterable[str] = (ALBUMS, LYRICS),
+        on_change: Optional[Callable[[Change, Any], None]] = None,
+    ):
+        self.path = str(path)
+        self.follow = frozenset(follow)
+        self.on_change = on_change
+        self.failures: List[Tuple[str, str, BaseException]] = []
+        self._connection = sqlite3.connect(self.path)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entities ("
+                "kind TEXT NOT NULL, "
+                "id TEXT NOT NULL, "
+                "parent TEXT, "
+                "version TEXT, "
+                "checked REAL NOT NULL, "
+                "PRIMARY KEY (kind, id))"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS entities_parent "
+                "ON entities (kind, parent)"
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS changes ("
+                "seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "kind TEXT NOT NULL, "
+                "id TEXT NOT NULL, "
+                "change TEXT NOT NULL, "
+                "version TEXT, "
+                "recorded REAL NOT NULL)"
+            )
+
+    def close(self) -> None:
+        """Закрыть базу состояния"""
+        self._connection.close()
+
+    def __enter__(self) -> "Sync":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _fresh_content(entity: Metallum) -> str:
+        """Загрузить страницу сущности с сайта, минуя кеш"""
+        return entity.refresh().content
+
+    def _stored_version(self, kind: str, entity_id: str) -> Optional[str]:
+        """Сохранённая версия сущности или None, если сущность ещё не известна"""
+        row = self._connection.execute(
+            "SELECT version FROM entities WHERE kind = ? AND id = ?",
+            (kind, entity_id),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _record(
+        self, kind: str, entity_id: str, parent: Optional[str], version: Optional[str]
+    ) -> Optional[Change]:
+        """
+        Сравнить версию сущности с сохранённой и записать изменение
+
+        Returns:
+            Change: Изменение или None, если версия не изменилась
+        """
+        now = time.time()
+        with self._connection:
+            row = self._connection.execute(
+                "SELECT version FROM entities WHERE kind = ? AND id = ?",
+                (kind, entity_id),
+            ).fetchone()
+            if row is not None and row[0] == version:
+                self._connection.execute(
+                    "UPDATE entities SET checked = ? WHERE kind = ? AND id = ?",
+                    (now, kind, entity_id),
+                )
+                return None
+            self._connection.execute(
+                "INSERT OR REPLACE INTO entities (kind, id, parent, version, checked) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, entity_id, parent, version, now),
+            )
+            change = ADDED if row is None else MODIFIED
+            cursor = self._connection.execute(
+                "INSERT INTO changes (kind, id, change, version, recorded) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (kind, entity_id, change, version, now),
+            )
+        return Change(cursor.lastrowid, kind, entity_id, change, version, now)
+
+    def _record_removed(
+        self, kind: str, parent: str, current_ids: Iterable[str]
+    ) -> List[Change]:
+        """Записать удаление дочерних сущностей, которых больше нет у родителя"""
+        now = time.time()
+        changes = []
+        current_ids = set(current_ids)
+        with self._connection:
+            known = self._connection.execute(
+                "SELECT id FROM entities WHERE kind = ? AND parent = ?",
+                (kind, parent),
+            ).fetchall()
+            for (entity_id,) in known:
+                if entity_id in current_ids:
+                    continue
+                self._connection.execute(
+                    "DELETE FROM entities WHERE kind = ? AND id = ?", (kind, entity_id)
+                )
+                cursor = self._connection.execute(
+                    "INSERT INTO changes (kind, id, change, version, recorded) "
+                    "VALUES (?, ?, ?, NULL, ?)",
+                    (kind, entity_id, REMOVED, now),
+                )
+                changes.append(
+                    Change(cursor.lastrowid, kind, entity_id, REMOVED, None, now)
+                )
+        return changes
+
+    def _record_parent(
+        self,
+        kind: str,
+        entity_id: str,
+        parent: Optional[str],
+        version: str,
+        entity: Any,
+    ) -> List[Change]:
+        """
+        Записать изменение сущности после проверки её дочерних сущностей:
+        если одну из них не удалось проверить, версия сущности не
+        сохраняется, и повторная синхронизация не продублирует изменение
+        в ленте и в ``on_change``
+
+        Returns:
+            List[Change]: Изменение сущности (пустой список, если её версию
+            уже записали)
+        """
+        change = self._record(kind, entity_id, parent, version)
+        if change is None:
+            return []
+        self._notify([change], entity)
+        return [change]
+
+    def _notify(self, changes: List[Change], entity: Any = None) -> None:
+        if self.on_change is not None:
+            for change in changes:
+                self.on_change(change, entity if change.change != REMOVED else None)
+
+    def sync_band(self, band_id: str, content: Optional[str] = None) -> List[Change]:
+        """
+        Проверить группу и, если она изменилась, её альбомы. Изменение
+        группы записывается в ленту после изменений альбомов; если альбом
+        не удалось проверить, оно не записывается вовсе, и следующая
+        синхронизация проверит альбомы снова.
+
+        Args:
+            band_id: ID группы
+            content: Уже загруженная свежая страница группы
+
+        Returns:
+            List[Change]: Изменения, обнаруженные при этой проверке
+        """
+        band_id = str(band_id)
+        band = Band.for_id(band_id)
+        if content is None:
+            content = self._fresh_content(band)
+        version = _version(content, parse_modified(content))
+        if self._stored_version(BAND, band_id) == version:
+            self._record(BAND, band_id, None, version)
+            return []
+
+        changes = []
+        if ALBUMS in self.follow:
+            # Дискография тоже могла измениться: её копия в кеше устарела
+            Metallum._invalidate_cache(make_absolute(band._albums_url))
+            album_ids = [album.id for album in band.albums]
+            removed = self._record_removed(ALBUM, band_id, album_ids)
+            self._notify(removed)
+            changes.extend(removed)
+            for album_id in album_ids:
+                changes.extend(self.sync_album(album_id, band_id))
+        return changes + self._record_parent(BAND, band_id, None, version, band)
+
+    def sync_album(self, album_id: str, band_id: Optional[str] = None) -> List[Change]:
+        """
+        Проверить альбом и, если он изменился, тексты его песен. Изменение
+        альбома записывается в ленту после изменений текстов; если текст не
+        удалось загрузить, оно не записывается вовсе.
+
+        Args:
+            album_id: ID альбома
+            band_id: ID группы, в дискографии которой находится альбом
+
+        Returns:
+            List[Change]: Изменения, обнаруженные при этой проверке
+        """
+        album_id = str(album_id)
+        album = AlbumWrapper.for_id(album_id)
+        content = self._fresh_content(album)
+        version = _version(content, parse_modified(content))
+        if self._stored_version(ALBUM, album_id) == version:
+            self._record(ALBUM, album_id, band_id, version)
+            return []
+
+        changes = []
+        if LYRICS in self.follow:
+            track_ids = [track.id for track in album.tracks]
+            removed = self._record_removed(LYRICS, album_id, track_ids)
+            self._notify(removed)
+            changes.extend(removed)
+            for track_id in track_ids:
+                lyrics = Lyrics(track_id)
+                lyrics_content = self._fresh_content(lyrics)
+                lyrics_change = self._record(
+                    LYRICS, track_id, album_id, _version(lyrics_content, None)
+                )
+                if lyrics_change is not None:
+                    self._notify([lyrics_change], lyrics)
+                    changes.append(lyrics_change)
+        return changes + self._record_parent(ALBUM, album_id, band_id, version, album)
+
+    def sync_bands(
+        self, band_ids: Iterable[str], max_workers: int = POOL_SIZE
+    ) -> List[Change]:
+        """
+        Проверить несколько групп. Страницы групп загружаются параллельно,
+        дочерние сущности проверяются только у изменившихся групп.
+        Ошибки загрузки отдельных групп не прерывают синхронизацию и
+        сохраняются в ``failures``.
+
+        Args:
+            band_ids: ID групп
+            max_workers: Максимальное количество одновременных загрузок
+
+        Returns:
+            List[Change]: Изменения, обнаруженные при этой проверке
+        """
+        self.failures = []
+        changes = []
+
+        def fetch(band_id):
+            return self._fresh_content(Band.for_id(band_id))
+
+        def submit(executor, band_id):
+            # Рабочие потоки используют карту идентичности вызывающего кода
+            return executor.submit(contextvars.copy_context().run, fetch, band_id)
+
+        band_ids = iter(dict.fromkeys(map(str, band_ids)))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Заранее загружается не больше max_workers страниц: следующая
+            # загрузка начинается, когда очередная группа взята в обработку
+            pending = deque(
+                (band_id, submit(executor, band_id))
+                for band_id in islice(band_ids, max_workers)
+            )
+            while pending:
+                band_id, future = pending.popleft()
+                for next_id in islice(band_ids, 1):
+                    pending.append((next_id, submit(executor, next_id)))
+                try:
+                    changes.extend(self.sync_band(band_id, future.result()))
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    self.failures.append((BAND, band_id, error))
+        return changes
+
+    def sync_known_bands(self, max_workers: int = POOL_SIZE) -> List[Change]:
+        """
+        Проверить все группы, уже известные синхронизации
+
+        Args:
+            max_workers: Максимальное количество одновременных загрузок
+
+        Returns:
+            List[Change]: Изменения, обнаруженные при этой проверке
+        """
+        band_ids = [
+            row[0]
+            for row in self._connection.execute(
+                "SELECT id FROM entities WHERE kind = ? ORDER BY checked", (BAND,)
+            )
+        ]
+        return self.sync_bands(band_ids, max_workers)
+
+    @property
+    def last_seq(self) -> int:
+        """Номер последней записи ленты изменений"""
+        row = self._connection.execute("SELECT MAX(seq) FROM changes").fetchone()
+        return row[0] or 0
+
+    def changes(self, since: int = 0, limit: Optional[int] = None) -> List[Change]:
+        """
+        Прочитать ленту изменений
+
+        Args:
+            since: Номер последней уже обработанной записи
+            limit: Максимальное количество записей
+
+        Returns:
+            List[Change]: Изменения в порядке их обнаружения
+        """
+        rows = self._connection.execute(
+            "SELECT seq, kind, id, change, version, recorded FROM changes "
+            "WHERE seq > ? ORDER BY seq LIMIT ?",
+            (since, -1 if limit is None else limit),
+        ).fetchall()
+        return [Change(*row) for row in rows]
@@ -0,0 +1,375 @@
+"""Общий HTTP-транспорт для всех моделей Metallum"""
+
+import asyncio
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Iterator, Optional
+
+from metallum import hooks
+from metallum.consts import MAX_RETRIES, POOL_SIZE
+from metallum.ratelimit import RateLimiter, get_rate_limiter, parse_retry_after
+from metallum.utils import get_user_agent
+
+if TYPE_CHECKING:
+    from curl_cffi import requests as curl_requests
+
+# Ответы, после которых нужно замедлиться и повторить запрос
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def default_headers() -> Dict[str, str]:
+    """
+    Заголовки, которые транспорт отправляет с каждым запросом.
+
+    Returns:
+        dict: Заголовки запроса.
+    """
+    return {
+        "User-Agent": get_user_agent(),
+        "Accept-Encoding": "gzip, deflate",
+        "Accept": "application/json, text/javascript, */*; q=0.01",
+        "Accept-Language": "en-US,en;q=0.9",
+        "Referer": "https://www.metal-archives.com/",
+        "X-Requested-With": "XMLHttpRequest",
+        "Connection": "keep-alive",
+    }
+
+
+class Transport:
+    """
+    Пул сессий curl_cffi с общими заголовками.
+
+    curl_cffi импортируется, а заголовки по умолчанию (вместе с
+    User-Agent) определяются только при первом запросе.
+
+    Сессии создаются по мере необходимости (не больше ``pool_size``) и
+    переиспользуются между запросами, поэтому keep-alive соединения и
+    TLS-сессии не теряются при обходе нескольких страниц. Сессия curl_cffi
+    не потокобезопасна, поэтому каждый поток на время запроса берёт из пула
+    собственную сессию.
+
+    Перед каждым запросом транспорт ждёт разрешения ограничителя частоты;
+    на ответы 429/503 он замедляется с учётом Retry-After и повторяет
+    запрос до ``max_retries`` раз.
+
+    Атрибуты:
+        pool_size: Максимальное количество одновременно открытых сессий
+        headers: Заголовки, общие для всех сессий пула
+        max_retries: Количество повторов после ответа 429/503
+    """
+
+    def __init__(
+        self,
+        pool_size: int = POOL_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = MAX_RETRIES,
+        **session_kwargs,
+    ):
+        if pool_size < 1:
+            raise ValueError("pool_size must be at least 1")
+        self.pool_size = pool_size
+        self._headers = headers
+        self.max_retries = max_retries
+        self._limiter = limiter
+        self._session_kwargs = session_kwargs
+        self._pool: "queue.LifoQueue[curl_requests.Session]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Заголовки запросов: заданные явно или ``default_headers()``"""
+        if self._headers is None:
+            self._headers = default_headers()
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers: Dict[str, str]) -> None:
+        self._headers = headers
+
+    @property
+    def limiter(self) -> RateLimiter:
+        """Ограничитель частоты: заданный явно или общий для процесса"""
+        return self._limiter or get_rate_limiter()
+
+    def _new_session(self) -> "curl_requests.Session":
+        from curl_cffi import requests as curl_requests  # pylint: disable=C0415
+
+        return curl_requests.Session(**self._session_kwargs)
+
+    @contextmanager
+    def session(self) -> Iterator["curl_requests.Session"]:
+        """
+        Взять сессию из пула на время запроса.
+
+        Если свободных сессий нет и лимит пула исчерпан, поток ждёт,
+        пока другая сессия не вернётся в пул.
+
+        Returns:
+            Session: Сессия curl_cffi
+        """
+        try:
+            session = self._pool.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_create = self._created < self.pool_size
+                if can_create:
+                    self._created += 1
+            session = self._new_session() if can_create else self._pool.get()
+        try:
+            yield session
+        finally:
+            self._pool.put(session)
+
+    def get(self, url: str) -> str:
+        """
+        Выполнить GET-запрос
+
+        Args:
+            url: Абсолютный URL-адрес
+
+        Returns:
+            str: Тело ответа
+        """
+        limiter = self.limiter
+        for attempt in range(self.max_retries + 1):
+            wait = limiter.acquire()
+            if wait > 0:
+                hooks.emit(hooks.RATE_LIMIT_WAIT, url, duration=wait)
+            start = time.perf_counter()
+            with self.session() as session:
+                response = session.get(url, headers=self.headers)
+            _emit_response(url, response, start)
+            if not _should_retry(response, attempt, self.max_retries, limiter):
+                break
+        response.raise_for_status()
+        limiter.record_success()
+        return response.text
+
+    def close(self) -> None:
+        """Закрыть все сессии пула"""
+        while True:
+            try:
+                session = self._pool.get_nowait()
+            except queue.Empty:
+                break
+            session.close()
+            with self._lock:
+                self._created -= 1
+
+
+_transport: Optional[Transport] = None
+_transport_lock = threading.Lock()
+
+
+def get_transport() -> Transport:
+    """
+    Получить общий для процесса транспорт, создав его при первом обращении.
+
+    Returns:
+        Transport: Текущий транспорт
+    """
+    global _transport
+    if _transport is None:
+        with _transport_lock:
+            if _transport is None:
+                _transport = Transport()
+    return _transport
+
+
+def set_transport(transport: Optional[Transport]) -> Optional[Transport]:
+    """
+    Заменить общий транспорт (например, на транспорт с другим размером пула
+    или на заглушку в тестах).
+
+    Args:
+        transport: Новый транспорт или None, чтобы вернуться к транспорту
+            по умолчанию
+
+    Returns:
+        Transport: Предыдущий транспорт
+    """
+    global _transport
+    with _transport_lock:
+        previous, _transport = _transport, transport
+    return previous
+
+
+def _emit_response(url: str, response, start: float) -> None:
+    """Сообщить обработчикам событий о полученном HTTP-ответе"""
+    if hooks.get_hooks() is not None:
+        # Размер тела ответа в байтах, без декодирования в текст
+        hooks.emit(
+            hooks.RESPONSE,
+            url,
+            duration=time.perf_counter() - start,
+            status=response.status_code,
+            size=len(response.content),
+        )
+
+
+def _should_retry(response, attempt: int, max_retries: int, limiter) -> bool:
+    """
+    Замедлиться и решить, нужно ли повторить запрос после ответа сервера
+
+    Args:
+        response: Ответ сервера
+        attempt: Номер текущей попытки, начиная с нуля
+        max_retries: Максимальное количество повторов
+        limiter: Ограничитель частоты запросов
+
+    Returns:
+        bool: True, если запрос нужно повторить
+    """
+    if response.status_code not in THROTTLE_STATUSES:
+        return False
+    limiter.throttle(parse_retry_after(response.headers.get("Retry-After")))
+    return attempt < max_retries
+
+
+class AsyncTransport:
+    """
+    Асинхронный транспорт на основе AsyncSession из curl_cffi.
+
+    Как и у ``Transport``, curl_cffi и заголовки по умолчанию загружаются
+    только при первом запросе.
+
+    Одна сессия держит до ``max_clients`` соединений, так что в одном
+    цикле событий можно выполнять несколько запросов одновременно. Частоту
+    запросов ограничивает тот же ограничитель, что и у синхронного
+    транспорта, поэтому оба укладываются в общий лимит.
+
+    Атрибуты:
+        max_clients: Максимальное количество одновременных соединений
+        headers: Заголовки, отправляемые с каждым запросом
+        max_retries: Количество повторов после ответа 429/503
+    """
+
+    def __init__(
+        self,
+        max_clients: int = POOL_SIZE,
+        headers: Optional[Dict[str, str]] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_retries: int = MAX_RETRIES,
+        **session_kwargs,
+    ):
+        if max_clients < 1:
+            raise ValueError("max_clients must be at least 1")
+        self.max_clients = max_clients
+        self._headers = headers
+        self.max_retries = max_retries
+        self._limiter = limiter
+        self._session_kwargs = session_kwargs
+        self._session: Optional["curl_requests.AsyncSession"] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        """Заголовки запросов: заданные явно или ``default_headers()``"""
+        if self._headers is None:
+            self._headers = default_headers()
+        return self._headers
+
+    @headers.setter
+    def headers(self, headers: Dict[str, str]) -> None:
+        self._headers = headers
+
+    @property
+    def limiter(self) -> RateLimiter:
+        """Ограничитель частоты: заданный явно или общий для процесса"""
+        return self._limiter or get_rate_limiter()
+
+    def _new_session(self) -> "curl_requests.AsyncSession":
+        from curl_cffi import requests as curl_requests  # pylint: disable=C0415
+
+        return curl_requests.AsyncSession(
+            max_clients=self.max_clients, **self._session_kwargs
+        )
+
+    async def _bind_loop(self) -> None:
+        # AsyncSession привязана к циклу событий, поэтому при смене цикла
+        # (например, повторный asyncio.run) создаётся заново, а прежняя
+        # закрывается, чтобы не оставлять её соединения и дескрипторы curl
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        previous, self._loop = self._session, loop
+        self._session = self._new_session()
+        if previous is not None:
+            try:
+                await previous.close()
+            except Exception:  # pylint: disable=broad-exception-caught
+                # Прежний цикл уже мог освободить часть ресурсов сессии
+                pass
+
+    async def get(self, url: str) -> str:
+        """
+        Выполнить GET-запрос
+
+        Args:
+            url: Абсолютный URL-адрес
+
+        Returns:
+            str: Тело ответа
+        """
+        await self._bind_loop()
+        limiter = self.limiter
+        for attempt in range(self.max_retries + 1):
+            wait = await limiter.aacquire()
+            if wait > 0:
+                hooks.emit(hooks.RATE_LIMIT_WAIT, url, duration=wait)
+            start = time.perf_counter()
+            response = await self._session.get(url, headers=self.headers)
+            _emit_response(url, response, start)
+            if not _should_retry(response, attempt, self.max_retries, limiter):
+                break
+        response.raise_for_status()
+        limiter.record_success()
+        return response.text
+
+    async def close(self) -> None:
+        """Закрыть сессию"""
+        if self._session is not None:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+
+_async_transport: Optional[AsyncTransport] = None
+
+
+def get_async_transport() -> AsyncTransport:
+    """
+    Получить общий для процесса асинхронный транспорт.
+
+    Returns:
+        AsyncTransport: Текущий асинхронный транспорт
+    """
+    global _async_transport
+    if _async_transport is None:
+        with _transport_lock:
+            if _async_transport is None:
+                _async_transport = AsyncTransport()
+    return _async_transport
+
+
+def set_async_transport(
+    transport: Optional[AsyncTransport],
+) -> Optional[AsyncTransport]:
+    """
+    Заменить общий асинхронный транспорт.
+
+    Args:
+        transport: Новый транспорт или None, чтобы вернуться к транспорту
+            по умолчанию
+
+    Returns:
+        AsyncTransport: Предыдущий транспорт
+    """
+    global _async_transport
+    with _transport_lock:
+        previous, _async_transport = _async_transport, transport
+    return previous
@@ -1,13 +1,13 @@
 """Вспомогательные функции для пакета Metallum."""
 
 import datetime
+import importlib
+import inspect
 import re
-from functools import lru_cache
-from typing import List
+from types import ModuleType
+from typing import Callable, List, Optional
 
-from fake_useragent import UserAgent
-
-from metallum.consts import BASE_URL, UTC_OFFSET
+from metallum.consts import BASE_URL, DEFAULT_USER_AGENT, UTC_OFFSET
 
 
 def map_params(params, m):
@@ -28,6 +28,44 @@ def map_params(params, m):
     return res
 
 
+def bind_arguments(func: Callable, args: tuple, kwargs: dict) -> dict:
+    """
+    Сопоставить аргументы с сигнатурой функции, подставив значения по
+    умолчанию.
+
+    Args:
+        func: Функция, например из ``metallum.operations``.
+        args: Позиционные аргументы.
+        kwargs: Именованные аргументы.
+
+    Returns:
+        dict: Все аргументы функции.
+    """
+    bound = inspect.signature(func).bind(*args, **kwargs)
+    bound.apply_defaults()
+    return dict(bound.arguments)
+
+
+def import_optional(name: str) -> ModuleType:
+    """
+    Импортировать необязательную зависимость (NumPy, pyarrow, SciPy) с
+    понятной ошибкой, если она не установлена.
+
+    Args:
+        name: Имя модуля, например ``scipy.sparse``.
+
+    Returns:
+        ModuleType: Модуль.
+    """
+    try:
+        return importlib.import_module(name)
+    except ImportError as error:
+        package = name.split(".")[0]
+        raise ImportError(
+            f"{package} is required for this export format: pip install {package}"
+        ) from error
+
+
 def split_genres(s: str) -> List[str]:
     """
     Разделить строку жанров на список жанров.
@@ -112,7 +150,45 @@ def parse_duration(s: str) -> int:
     return seconds
 
 
-@lru_cache
-def get_user_agent():
-    """Получить случайного юзер агента."""
-    return UserAgent().getSafari["useragent"]
+_user_agent: Optional[str] = None
+
+
+def _random_user_agent() -> str:
+    """Случайный User-Agent Safari или ``DEFAULT_USER_AGENT``"""
+    try:
+        # Набор данных fake_useragent загружается только при первом запросе
+        from fake_useragent import UserAgent  # pylint: disable=C0415
+
+        return UserAgent().getSafari["useragent"]
+    except Exception:  # pylint: disable=broad-exception-caught
+        return DEFAULT_USER_AGENT
+
+
+def get_user_agent() -> str:
+    """
+    Получить User-Agent для запросов: заданный через ``set_user_agent``
+    или случайный, выбранный один раз при первом обращении.
+
+    Returns:
+        str: User-Agent
+    """
+    global _user_agent
+    if _user_agent is None:
+        _user_agent = _random_user_agent()
+    return _user_agent
+
+
+def set_user_agent(user_agent: Optional[str]) -> Optional[str]:
+    """
+    Задать User-Agent для запросов. Действует на транспорты, которые ещё не
+    выполнили ни одного запроса.
+
+    Args:
+        user_agent: User-Agent или None, чтобы снова выбрать случайный
+
+    Returns:
+        str: Предыдущий User-Agent
+    """
+    global _user_agent
+    previous, _user_agent = _user_agent, user_agent
+    return previous
@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import pytest
+
+from metallum.cache import MemoryCache, SQLiteCache, set_cache, set_memory_cache
+from metallum.consts import BASE_URL
+from metallum.models.identity import identity_scope
+from metallum.transport import Transport, set_transport
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# Относительный URL страницы (без параметров запроса) -> файл с её содержимым
+PAGES = {
+    "bands/_/125": "band_125.html",
+    "bands/_/12": "band_12.html",
+    "bands/_/25": "band_25.html",
+    "bands/_/2405": "band_2405.html",
+    "bands/_/3453": "band_3453.html",
+    "band/discography/id/125/tab/all": "discography_125.html",
+    "band/ajax-recommendations/id/125/showMoreSimilar/1": "similar_125.html",
+    "albums/_/_/1": "album_1.html",
+    "albums/_/_/547": "album_547.html",
+    "albums/_/_/1429": "album_1429.html",
+    "albums/_/_/42682": "album_42682.html",
+    "albums/_/_/338756": "album_338756.html",
+    "release/ajax-view-lyrics/id/5018A": "lyrics_5018A.html",
+    "search/ajax-advanced/searching/bands/": "band_search.json",
+    "search/ajax-advanced/searching/albums/": "album_search.json",
+    "search/ajax-advanced/searching/songs/": "song_search.json",
+}
+
+
+class FixtureTransport(Transport):
+    """Транспорт, который отдаёт записанные страницы вместо запросов к сайту"""
+
+    def __init__(self, pages=None):
+        super().__init__(headers={})
+        self.pages = dict(PAGES if pages is None else pages)
+        self.requested = []
+
+    def get(self, url):
+        self.requested.append(url)
+        path = url[len(BASE_URL) + 1 :].split("?")[0]
+        page = self.pages[path]
+        if callable(page):
+            return page(url)
+        if isinstance(page, str) and page.endswith((".html", ".json")):
+            return (FIXTURES_DIR / page).read_text(encoding="utf-8")
+        return page
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """Изолированный кеш страниц, чтобы тесты не трогали общий кеш"""
+    cache = SQLiteCache(tmp_path / "cache.sqlite3")
+    previous = set_cache(cache)
+    previous_memory = set_memory_cache(MemoryCache())
+    yield cache
+    set_cache(previous)
+    set_memory_cache(previous_memory)
+
+
+@pytest.fixture
+def site(cache):
+    """Записанные страницы Metal Archives вместо сетевых запросов"""
+    transport = FixtureTransport()
+    previous = set_transport(transport)
+    with identity_scope():
+        yield transport
+    set_transport(previous)
@@ -0,0 +1,61 @@
+import asyncio
+import json
+
+import pytest
+
+from metallum.async_operations import aband_search, alyrics_for_id
+from metallum.transport import AsyncTransport, set_async_transport
+
+BAND_SEARCH = json.dumps(
+    {
+        "iTotalRecords": 1,
+        "aaData": [
+            [
+                '<a href="https://www.metal-archives.com/bands/Metallica/125">'
+                "Metallica</a>",
+                "Thrash Metal (early), Hard Rock (mid)",
+                "United States",
+            ]
+        ],
+    }
+)
+
+LYRICS = "<p>Lashing out the action, returning the reaction<br/><br/>Weak</p>"
+
+
+class FakeAsyncTransport(AsyncTransport):
+    def __init__(self, pages):
+        super().__init__(headers={})
+        self.pages = pages
+        self.requested = []
+
+    async def get(self, url):
+        self.requested.append(url)
+        return self.pages[url.split("?")[0]]
+
+
+@pytest.fixture
+def transport(cache):
+    fake = FakeAsyncTransport(
+        {
+            "https://www.metal-archives.com/search/ajax-advanced/searching/bands/": BAND_SEARCH,
+            "https://www.metal-archives.com/release/ajax-view-lyrics/id/5018A": LYRICS,
+        }
+    )
+    previous = set_async_transport(fake)
+    yield fake
+    set_async_transport(previous)
+
+
+def test_aband_search(transport):
+    results = asyncio.run(aband_search("metallica", genre="thrash"))
+    assert results.result_count == 1
+    assert results[0].name == "Metallica"
+    assert results[0].id == "125"
+    assert "bandName=metallica" in transport.requested[0]
+    assert "genre=thrash" in transport.requested[0]
+
+
+def test_alyrics_for_id(transport):
+    lyrics = asyncio.run(alyrics_for_id("5018A"))
+    assert str(lyrics).split("\n")[0] == "Lashing out the action, returning the reaction"
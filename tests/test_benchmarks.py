@@ -0,0 +1,43 @@
+import importlib.util
+import json
+from pathlib import Path
+
+import pytest
+
+from metallum.cache import get_cache
+from metallum.transport import get_transport
+
+ROOT = Path(__file__).resolve().parent.parent
+BENCH_OFFLINE = ROOT / "benchmarks" / "bench_offline.py"
+
+
+@pytest.fixture(scope="module")
+def bench():
+    spec = importlib.util.spec_from_file_location("bench_offline", BENCH_OFFLINE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_quick_run_is_offline_and_serializable(bench):
+    transport, cache = get_transport(), get_cache()
+    report = bench.run(("parse", "search", "memory"), quick=True)
+    assert get_transport() is transport and get_cache() is cache
+
+    report = json.loads(json.dumps(report))
+    assert report["meta"]["python"]
+    names = {(r["group"], r["name"]) for r in report["results"]}
+    assert ("parse", "album_multi_disc_tracks") in names
+    assert ("search", "exact_indexed[100]") in names
+    memory = [r for r in report["results"] if r["group"] == "memory"]
+    assert memory and all(r["bytes_per_item"] > 0 for r in memory)
+
+    (row,) = [
+        r
+        for r in bench.compare(report, report)
+        if (r["group"], r["name"]) == ("parse", "band")
+    ]
+    assert row["ratio"] == 1.0
+
+    with pytest.raises(ValueError):
+        bench.run(("network",))
@@ -0,0 +1,32 @@
+from metallum.models import Band
+from metallum.operations import albums_for_ids, bands_for_ids, lyrics_for_ids
+
+
+def test_results_follow_input_order_and_ids_are_deduplicated(site):
+    bands = bands_for_ids(["125", "25", "125", "12"], max_workers=3)
+    assert [band.name for band in bands] == [
+        "Metallica",
+        "Iron Maiden",
+        "Metallica",
+        "Amorphis",
+    ]
+    assert bands[0] is bands[2]
+    assert sum("bands/_/125" in url for url in site.requested) == 1
+
+
+def test_errors_are_returned_as_results(site):
+    albums = albums_for_ids(["547", "999999", "1"])
+    assert albums[0].title == "Master of Puppets"
+    assert isinstance(albums[1], Exception)
+    assert albums[2].title == "Tuonela"
+
+
+def test_unordered_yields_as_completed(site):
+    results = dict(bands_for_ids(["125", "25", "25"], ordered=False))
+    assert set(results) == {"125", "25"}
+    assert all(isinstance(band, Band) for band in results.values())
+
+
+def test_lyrics_for_ids(site):
+    (lyrics,) = lyrics_for_ids(["5018A"])
+    assert str(lyrics).startswith("Lashing out the action")
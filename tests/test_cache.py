@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from metallum.cache import FileCache, MemoryCache, SQLiteCache, get_memory_cache
+from metallum.models.metallum import Metallum
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "file":
+        return FileCache(tmp_path / "pages")
+    return SQLiteCache(tmp_path / "pages.sqlite3")
+
+
+def test_roundtrip(backend):
+    assert backend.get("https://example.com/a") is None
+    backend.set("https://example.com/a", "<html/>", 60)
+    assert backend.get("https://example.com/a") == "<html/>"
+    backend.delete("https://example.com/a")
+    assert backend.get("https://example.com/a") is None
+
+
+def test_expired_entries_are_ignored(backend):
+    backend.set("https://example.com/a", "old", -1)
+    assert backend.get("https://example.com/a") is None
+
+
+def test_sqlite_purge_expired(tmp_path):
+    cache = SQLiteCache(tmp_path / "pages.sqlite3")
+    for i in range(10):
+        cache.set(f"https://example.com/{i}", "x", -1 if i % 2 else 60)
+    assert cache.purge_expired() == 5
+    assert cache.get("https://example.com/0") == "x"
+
+
+def test_sqlite_is_shared_between_threads(tmp_path):
+    cache = SQLiteCache(tmp_path / "pages.sqlite3")
+
+    def writer(n):
+        for i in range(50):
+            cache.set(f"https://example.com/{n}/{i}", str(i), 60)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert cache.get("https://example.com/3/49") == "49"
+    # Вторая база на том же файле видит записи первой
+    other = SQLiteCache(tmp_path / "pages.sqlite3")
+    assert other.get("https://example.com/0/0") == "0"
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", "1", 60)
+    cache.set("b", "2", 60)
+    assert cache.get("a") == "1"
+    cache.set("c", "3", 60)
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.stats()["evictions"] == 1
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_memory_cache_respects_byte_limit():
+    cache = MemoryCache(max_bytes=200)
+    cache.set("a", "x" * 100, 60)
+    cache.set("b", "y" * 100, 60)
+    assert len(cache) == 1
+    assert cache.get("b") is not None
+    assert cache.size <= 200
+
+
+def test_memory_cache_uses_shortest_ttl():
+    cache = MemoryCache(ttl=-1)
+    cache.set("a", "1", 60)
+    assert cache.get("a") is None
+
+
+def test_memory_tier_is_filled_from_persistent_cache(cache):
+    cache.set("https://example.com/a", "page", 60)
+    assert Metallum._load_from_cache("https://example.com/a") == "page"
+    cache.delete("https://example.com/a")
+    assert Metallum._load_from_cache("https://example.com/a") == "page"
+
+
+def test_memory_tier_keeps_persistent_expiry(cache):
+    cache.set("https://example.com/a", "page", 5)
+    _, expires = cache.get_with_expiry("https://example.com/a")
+    assert Metallum._load_from_cache("https://example.com/a") == "page"
+    _, memory_expires = get_memory_cache().get_with_expiry("https://example.com/a")
+    assert memory_expires <= expires + 0.01
+    assert memory_expires - time.time() < 5
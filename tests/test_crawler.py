@@ -0,0 +1,70 @@
+import pytest
+
+from metallum.crawler import ALBUM, ALBUMS, BAND, LYRICS, TRACK, TRACKS, Crawler
+from metallum.models import Band
+
+
+def test_crawl_band_albums_and_tracks(site, tmp_path):
+    seen = []
+    with Crawler(tmp_path / "crawl.sqlite3", follow=(ALBUMS, TRACKS)) as crawler:
+        crawler.add_band("125")
+        crawler.add_band("125")
+        stats = crawler.run(on_entity=lambda kind, entity: seen.append(kind))
+        # Из восьми альбомов дискографии в записанных страницах есть только один
+        assert stats == {"pending": 0, "running": 0, "done": 2, "failed": 7}
+        assert seen.count(BAND) == 1 and seen.count(ALBUM) == 1
+        assert seen.count(TRACK) == 8
+        assert ("album", "544") in [failure[:2] for failure in crawler.failures()]
+        assert crawler.retry_failed() == 7
+        assert crawler.stats()["pending"] == 7
+
+
+def test_crawl_uses_callers_identity_map(site, tmp_path):
+    bands = []
+    with Crawler(tmp_path / "crawl.sqlite3") as crawler:
+        crawler.add_band("125")
+        crawler.run(
+            on_entity=lambda kind, entity: kind == BAND and bands.append(entity)
+        )
+    assert len(bands) == 1 and bands[0] is Band.for_id("125")
+
+
+def test_failed_pages_are_retried_before_giving_up(site, tmp_path):
+    with Crawler(tmp_path / "crawl.sqlite3", max_attempts=3) as crawler:
+        crawler.add_album("404")
+        crawler.run()
+    assert site.requested.count(site.requested[0]) == 3
+
+
+def test_crawl_resumes_after_a_crash(site, tmp_path):
+    path = tmp_path / "crawl.sqlite3"
+    site.pages.update({f"albums/_/_/{i}": "album_547.html" for i in (20371, 544)})
+
+    def crash(kind, entity):
+        if kind == ALBUM:
+            raise RuntimeError("crash")
+
+    with Crawler(path, follow=(ALBUMS,), max_workers=1) as crawler:
+        crawler.add_band("125")
+        with pytest.raises(RuntimeError):
+            crawler.run(on_entity=crash)
+        assert crawler.stats()["done"] == 1
+        assert crawler.stats()["running"] == 0
+
+    requested = len(site.requested)
+    seen = []
+    with Crawler(path, follow=(ALBUMS,), max_workers=1) as crawler:
+        stats = crawler.run(on_entity=lambda kind, entity: seen.append(kind))
+    assert BAND not in seen and seen.count(ALBUM) == 3
+    assert stats["done"] == 4
+    assert not any("bands/" in url for url in site.requested[requested:])
+
+
+def test_depth_and_edges_are_configurable(site, tmp_path):
+    with pytest.raises(ValueError):
+        Crawler(tmp_path / "crawl.sqlite3", follow=("reviews",))
+    with Crawler(
+        tmp_path / "crawl.sqlite3", follow=(TRACKS, LYRICS), max_depth=0
+    ) as crawler:
+        crawler.add_album("547")
+        assert crawler.run() == {"pending": 0, "running": 0, "done": 1, "failed": 0}
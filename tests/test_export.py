@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+
+from metallum.export import (
+    export_album_search,
+    export_albums,
+    export_band_search,
+    export_song_search,
+    export_tracks,
+)
+from metallum.operations import album_for_id, band_for_id
+
+
+def test_band_search_columns(site):
+    table = export_band_search("Metallica")
+    assert len(table) == 2
+    assert list(table["id"].values) == [125, 3540400817]
+    assert table["country"] == ["United States", "Brazil"]
+
+
+def test_album_and_song_search_columns(site):
+    albums = export_album_search("Tuonela")
+    assert list(albums.rows()) == [
+        (1, "Tuonela", 12, "Amorphis", "Full-length", "1999-03-29", 1999)
+    ]
+    songs = export_song_search("Fear of the Dark")
+    assert songs["lyrics_id"][0] == 3449
+    assert (songs["album_id"][0], songs["band_id"][0]) == (1429, 25)
+
+
+def test_collections_and_text_formats(site):
+    albums = export_albums(band_for_id("125").albums)
+    assert list(albums["year"].values)[:3] == [1982, 1983, 1984]
+    assert list(albums["score"])[:5] == [76, 82, 89, 79, None]
+    assert list(albums["review_count"])[:5] == [9, 40, 39, 39, None]
+
+    tracks = export_tracks(album_for_id("42682").tracks)
+    assert tracks["band_id"][2] == 2405
+    assert tracks["title"][2] == "A haudiga Fluag"
+
+    output = io.StringIO()
+    albums.to_csv(output)
+    lines = output.getvalue().splitlines()
+    assert lines[0] == "id,title,type,year,score,review_count"
+    assert len(lines) == len(albums) + 1
+
+    output = io.StringIO()
+    tracks.to_ndjson(output)
+    first = json.loads(output.getvalue().splitlines()[0])
+    assert first["disc_number"] == 1 and first["full_title"].startswith("Paysage")
+
+
+def test_missing_values_are_kept(site):
+    table = export_albums(band_for_id("125").albums)
+    table["year"].append(None)
+    table["id"].append(None)
+    table["title"].append("x")
+    table["type"].append("Demo")
+    table["score"].append(None)
+    table["review_count"].append(0)
+    assert list(table.rows())[-1] == (None, "x", "Demo", None, None, 0)
+
+
+def test_numpy_and_arrow(site):
+    numpy = pytest.importorskip("numpy")
+    pyarrow = pytest.importorskip("pyarrow")
+    table = export_albums(band_for_id("125").albums)
+    assert table.to_numpy()["year"].dtype == numpy.int64
+    assert table.to_arrow().column("year").to_pylist()[0] == 1982
@@ -0,0 +1,47 @@
+from metallum.models.fragments import Cell, parse_cell
+from metallum.models.results import BandResult
+from metallum.operations import album_search, band_search
+
+
+def test_split_cell_keeps_every_link():
+    cell = parse_cell(
+        '<a href="https://www.metal-archives.com/bands/Lunar_Aurora/2405">'
+        'Lunar Aurora</a> / <a href="https://www.metal-archives.com/bands/'
+        'Paysage_d%27Hiver/3453" title="x">Paysage d&#039;Hiver</a>'
+    )
+    assert cell.text == "Lunar Aurora Paysage d'Hiver"
+    assert [link.id for link in cell.links] == ["2405", "3453"]
+    assert cell.id == "2405"
+
+
+def test_plain_cells_are_kept_as_is():
+    assert parse_cell("March 29th, 1999 <!-- 1999-03-29 -->") == Cell(
+        "March 29th, 1999 <!-- 1999-03-29 -->"
+    )
+
+
+def test_search_results_use_parsed_cells(site):
+    result = album_search("Tuonela")[0]
+    assert (result.id, result.title, result.band_name) == ("1", "Tuonela", "Amorphis")
+    assert [(band.id, band.name) for band in result.bands] == [("12", "Amorphis")]
+
+
+def test_search_results_are_compact_rows(site):
+    result = band_search("Metallica")[0]
+    assert not hasattr(result, "__dict__")
+    assert result[0] == "Metallica" and result[1:] == (
+        "Thrash Metal (early), Hard Rock (mid), Heavy/Thrash Metal (later)",
+        "United States",
+    )
+    assert list(result) == ["Metallica", *result[1:]]
+    assert result.id == "125"
+    assert len({result, band_search("Metallica")[0]}) == 1
+
+
+def test_rows_with_same_text_and_different_links_differ():
+    cells = ["Black Metal", "Norway"]
+    first = BandResult(['<a href="bands/Darkness/1">Darkness</a>', *cells])
+    second = BandResult(['<a href="bands/Darkness/2">Darkness</a>', *cells])
+    assert first == ("Darkness", *cells) == second
+    assert first != second
+    assert len({first, second}) == 2
@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+from metallum.graph import SimilarArtistsGraph, build_similar_artists_graph
+
+SIMILAR_IDS = ("138", "68", "64", "119")
+
+
+def _similar_url(band_id):
+    return f"band/ajax-recommendations/id/{band_id}/showMoreSimilar/1"
+
+
+def test_graph_expands_breadth_first_without_refetching(site):
+    # У каждой соседней группы те же похожие, что и у Metallica
+    site.pages.update({_similar_url(i): "similar_125.html" for i in SIMILAR_IDS})
+    graph = build_similar_artists_graph(["125"], max_depth=1)
+
+    assert graph.ids == ["125", *SIMILAR_IDS]
+    assert graph.names[1] == "Megadeth"
+    assert graph.edge_count == 20
+    assert graph.top_k("125", 2) == [("138", 488), ("68", 420)]
+    assert graph.neighbours("64")[-1] == ("119", 182)
+    assert len(site.requested) == 5
+    assert not any("bands/_/" in url for url in site.requested)
+
+
+def test_graph_node_budget_and_failures(site):
+    graph = build_similar_artists_graph(["125"], max_nodes=3)
+    assert len(site.requested) == 3
+    assert graph.neighbours("68") == []
+    assert [band_id for band_id, _ in graph.failures] == ["138", "68"]
+    assert len(graph) == 5
+
+
+def test_graph_export_round_trip(site):
+    graph = build_similar_artists_graph(["125"], max_depth=0)
+    assert list(graph.to_table()["score"]) == [488, 420, 212, 182]
+
+    file = io.StringIO()
+    graph.save(file)
+    file.seek(0)
+    loaded = SimilarArtistsGraph.load(file)
+    assert list(loaded.edges()) == list(graph.edges())
+
+
+def test_graph_to_numpy(site):
+    pytest.importorskip("numpy")
+    graph = build_similar_artists_graph(["125"], max_depth=0)
+    assert graph.to_numpy()["indptr"].tolist() == [0, 4, 4, 4, 4, 4]
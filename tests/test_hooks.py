@@ -0,0 +1,115 @@
+import pytest
+
+from metallum.hooks import (
+    CACHE_HIT,
+    CACHE_MISS,
+    PARSE,
+    RATE_LIMIT_WAIT,
+    REQUEST_END,
+    RESPONSE,
+    REQUEST_START,
+    Event,
+    Hooks,
+    LatencyAggregator,
+    set_hooks,
+)
+from metallum.models import Band
+from metallum.operations import band_for_id
+from metallum.ratelimit import RateLimiter
+from metallum.transport import Transport
+
+
+@pytest.fixture
+def recorded():
+    """Все события и их агрегатор на время теста"""
+    events = []
+    aggregator = LatencyAggregator()
+    hooks = Hooks(on_event=events.append)
+    hooks.add_all(aggregator)
+    previous = set_hooks(hooks)
+    yield events, aggregator
+    set_hooks(previous)
+
+
+def test_page_load_events(site, recorded):
+    events, aggregator = recorded
+    assert band_for_id("125").name == "Metallica"
+    assert [event.name for event in events] == [
+        CACHE_MISS,
+        REQUEST_START,
+        REQUEST_END,
+        PARSE,
+    ]
+    end = events[2]
+    assert end.entity == "Band"
+    assert end.endpoint == "bands"
+    assert end.size > 0 and end.duration >= 0 and end.error is None
+
+    # Новый объект той же группы берёт страницу из кеша
+    Band(Band.url_for_id("125")).load()
+    assert events[-2].name == CACHE_HIT
+    assert aggregator.cache_hit_ratio("bands") == 0.5
+    assert set(aggregator.percentiles(PARSE, "bands")) == {50, 90, 99}
+    assert aggregator.summary()[0]["count"] >= 1
+
+
+def test_failed_request_event(site, recorded):
+    events, _ = recorded
+    with pytest.raises(KeyError):
+        band_for_id("999999").load()
+    assert events[-1].name == REQUEST_END
+    assert isinstance(events[-1].error, KeyError)
+
+
+def test_rate_limit_wait_event(recorded):
+    events, _ = recorded
+
+    class Response:
+        status_code = 200
+        text = "Äö"
+        content = text.encode("utf-8")
+
+        def raise_for_status(self):
+            pass
+
+    class Session:
+        def get(self, url, headers=None):
+            return Response()
+
+    transport = Transport(headers={}, limiter=RateLimiter(rate=1000, burst=1))
+    transport._new_session = Session
+    transport.get("https://www.metal-archives.com/bands/_/1")
+    transport.get("https://www.metal-archives.com/bands/_/1")
+    (wait,) = [event for event in events if event.name == RATE_LIMIT_WAIT]
+    assert wait.duration > 0
+    assert [event.size for event in events if event.name == RESPONSE] == [4, 4]
+
+
+def test_page_size_is_computed_only_when_read(site):
+    encoded = []
+
+    class Page(str):
+        def encode(self, *args, **kwargs):
+            encoded.append(self)
+            return super().encode(*args, **kwargs)
+
+    events = []
+    previous = set_hooks(Hooks(on_parse=events.append))
+    try:
+        Band(Band.url_for_id("125"), content=Page("<p>Äö</p>")).load()
+    finally:
+        set_hooks(previous)
+    (event,) = events
+    assert encoded == []
+    assert event.size == 11 and event.size == 11
+    assert len(encoded) == 1
+
+
+def test_aggregator_percentiles():
+    aggregator = LatencyAggregator(max_samples=50)
+    for i in range(1, 101):
+        aggregator(Event(REQUEST_END, "albums/_/_/1", duration=float(i)))
+    assert aggregator.count(REQUEST_END, "albums") == 100
+    assert len(aggregator.percentiles(REQUEST_END, "albums", (50,))) == 1
+    assert aggregator.summary()[0]["total"] > 0
+    assert aggregator.cache_hit_ratio() is None
@@ -0,0 +1,58 @@
+import gc
+
+from metallum.models import Album, AlbumWrapper, Band
+from metallum.models.identity import IdentityMap, get_identity_map, identity_scope
+from metallum.operations import album_for_id, band_for_id, bands_for_ids, song_search
+
+
+def test_same_band_is_returned_once_loaded(site):
+    band = band_for_id("125")
+    assert band.name == "Metallica"
+    assert band_for_id("125") is band
+    assert band_for_id("125").name == "Metallica"
+    assert site.requested.count(site.requested[0]) == 1
+
+
+def test_refs_resolve_to_loaded_entities(site):
+    band = band_for_id("25")
+    song = song_search("Fear of the Dark")[0]
+    assert song.bands[0].get() is band
+    assert song.album is song.album
+
+
+def test_albums_and_bands_do_not_collide(site):
+    album = album_for_id("1")
+    assert album_for_id("1") is album
+    assert get_identity_map().get(Band, "1") is None
+
+
+def test_bulk_loading_shares_the_callers_scope(site):
+    with identity_scope() as identity_map:
+        bands = bands_for_ids(["125", "12"])
+        assert all(band_for_id(band.id) is band for band in bands)
+        assert len(identity_map) == 2
+
+
+def test_scopes_are_isolated(site):
+    band = band_for_id("125")
+    with identity_scope():
+        assert band_for_id("125") is not band
+    assert band_for_id("125") is band
+
+
+def test_entities_are_released_when_unreferenced():
+    identity_map = IdentityMap()
+    band = identity_map.get_or_create(Band, "1", lambda: Band("bands/_/1", "<html/>"))
+    assert identity_map.get(Band, 1) is band
+    del band
+    gc.collect()
+    assert identity_map.get(Band, "1") is None
+
+
+def test_album_wrapper_shares_the_mapped_album(site):
+    album = Album.for_id("547")
+    wrapper = album_for_id("547")
+    assert wrapper._album is album
+    assert AlbumWrapper(url="albums/Metallica/Master_of_Puppets/547")._album is album
+    assert wrapper.title == album.title
+    assert len(site.requested) == 1
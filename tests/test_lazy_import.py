@@ -0,0 +1,37 @@
+import subprocess
+import sys
+
+import pytest
+
+import metallum
+from metallum.consts import DEFAULT_USER_AGENT
+from metallum.operations import album_search
+from metallum.utils import get_user_agent, set_user_agent
+
+
+def test_import_does_not_load_dependencies():
+    code = (
+        "import sys, metallum; "
+        "print(sorted(m for m in ('curl_cffi', 'pyquery', 'fake_useragent', "
+        "'metallum.operations') if m in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert output.stdout.strip() == "[]"
+
+
+def test_lazy_attributes():
+    assert metallum.album_search is album_search
+    assert "band_search" in dir(metallum)
+    with pytest.raises(AttributeError, match="missing"):
+        metallum.missing  # pylint: disable=pointless-statement
+
+
+def test_user_agent_falls_back_without_fake_useragent(monkeypatch):
+    monkeypatch.setitem(sys.modules, "fake_useragent", None)
+    previous = set_user_agent(None)
+    try:
+        assert get_user_agent() == DEFAULT_USER_AGENT
+    finally:
+        set_user_agent(previous)
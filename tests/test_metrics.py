@@ -0,0 +1,73 @@
+import urllib.request
+
+import pytest
+
+from metallum import hooks
+from metallum.hooks import Event
+from metallum.metrics import (
+    disable_metrics,
+    enable_metrics,
+    get_metrics,
+    start_http_server,
+)
+from metallum.models import Band
+from metallum.operations import band_for_id
+
+
+@pytest.fixture
+def metrics():
+    metrics = enable_metrics()
+    yield metrics
+    disable_metrics()
+
+
+def test_metrics_are_not_installed_by_default():
+    assert get_metrics() is None
+    assert hooks.get_hooks() is None
+
+
+def test_page_load_metrics(site, metrics):
+    assert band_for_id("125").name == "Metallica"
+    Band(Band.url_for_id("125")).load()
+    text = metrics.render()
+    assert 'metallum_requests_total{type="bands",outcome="ok"} 1' in text
+    assert 'metallum_cache_lookups_total{type="bands",result="miss",tier=""} 1' in text
+    assert 'metallum_parse_duration_seconds_count{model="Band"} 2' in text
+    assert "# TYPE metallum_request_duration_seconds histogram" in text
+    assert metrics.cache_hit_ratio() == 0.5
+
+
+def test_response_and_wait_metrics(metrics):
+    url = "https://www.metal-archives.com/search/ajax-advanced/searching/bands/"
+    metrics(Event(hooks.RESPONSE, url, size=100, duration=0.2, status=429))
+    metrics(Event(hooks.RESPONSE, url, size=50, duration=0.1, status=200))
+    metrics(Event(hooks.RATE_LIMIT_WAIT, url, duration=1.5))
+    text = metrics.render()
+    assert 'metallum_http_responses_total{type="search",status="429"} 1' in text
+    assert 'metallum_response_bytes_total{type="search"} 150' in text
+    assert 'metallum_rate_limit_wait_seconds_bucket{le="2.5"} 1' in text
+    assert 'metallum_rate_limit_wait_seconds_bucket{le="1"} 0' in text
+
+
+def test_disable_keeps_user_hooks():
+    user_hooks = hooks.Hooks(on_parse=print)
+    previous = hooks.set_hooks(user_hooks)
+    try:
+        enable_metrics()
+        assert disable_metrics() is not None
+        assert hooks.get_hooks() is user_hooks and not user_hooks.empty
+    finally:
+        hooks.set_hooks(previous)
+
+
+def test_http_endpoint(metrics):
+    server = start_http_server(0, "127.0.0.1")
+    try:
+        url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+        with urllib.request.urlopen(url) as response:
+            body = response.read().decode("utf-8")
+            assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# HELP metallum_requests_total" in body
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,202 @@
+import datetime
+
+import pytest
+
+from metallum.models import AlbumCollection, AlbumTypes
+from metallum.models.metallum import Metallum
+from metallum.models.records import AlbumRecord, BandRecord
+from metallum.operations import (
+    album_for_id,
+    album_record_for_id,
+    band_for_id,
+    band_record_for_id,
+    song_search,
+)
+
+
+def test_band_fields(site):
+    band = band_for_id("125")
+    assert band.name == "Metallica"
+    assert band.country == "United States"
+    assert band.genres == [
+        "Thrash Metal (early)",
+        "Hard Rock (mid)",
+        "Heavy/Thrash Metal (later)",
+    ]
+    assert band.label == "Blackened Recordings"
+    assert band.years_active == "1981-present"
+    assert band.logo == "https://www.metal-archives.com/images/1/2/5/125_logo.png"
+
+
+def test_album_fields(site):
+    album = album_for_id("547")
+    assert album.title == "Master of Puppets"
+    assert album.type == "Full-length"
+    assert album.date == datetime.datetime(1986, 3, 3)
+    assert album.label == "Elektra Records"
+    assert (album.score, album.review_count) == (79, 39)
+    assert album.added is None
+
+
+def test_band_record(site):
+    record = band_record_for_id("125")
+    assert isinstance(record, BandRecord)
+    assert record.name == "Metallica"
+    assert record.themes[0] == "Introspection"
+    assert record.modified == datetime.datetime(2024, 5, 13, 16, 15, 47)
+    assert not hasattr(record, "__dict__")
+
+
+def test_album_record_with_tracks(site):
+    record = album_record_for_id("547")
+    assert isinstance(record, AlbumRecord)
+    assert record.year == 1986
+    assert record.band_ids == ("125",)
+    assert len(record.tracks) == 8
+    assert record.tracks[0].title == "Battery"
+    assert record.tracks[0].duration == 313
+
+
+def test_split_album_record_attributes_tracks_without_band_pages(site):
+    record = album_record_for_id("42682")
+    track = record.tracks[2]
+    assert track.title == "A haudiga Fluag"
+    assert track.band_id == "2405"
+    assert not any("bands/" in url for url in site.requested)
+
+
+def test_split_album_tracks_are_attributed_once(site):
+    tracks = album_for_id("42682").tracks
+    assert [track.band.name for track in tracks] == [
+        "Paysage d'Hiver",
+        "Paysage d'Hiver",
+        "Lunar Aurora",
+        "Lunar Aurora",
+    ]
+    assert tracks[2].title == "A haudiga Fluag"
+    assert tracks[2].band.id == "2405"
+    assert not any("bands/" in url for url in site.requested)
+
+
+def test_multi_disc_album_record(site):
+    record = album_record_for_id("338756")
+    assert record.tracks[-1].disc_number == 2
+    assert record.tracks[-1].number == 4
+    assert record.tracks[-1].overall_number == 8
+
+
+def test_band_refs_do_not_load_band_pages(site):
+    album = album_for_id("42682")
+    bands = album.bands
+    assert [band.name for band in bands] == ["Lunar Aurora", "Paysage d'Hiver"]
+    assert [band.id for band in bands] == ["2405", "3453"]
+    assert not any("bands/" in url for url in site.requested)
+
+
+def test_band_ref_loads_band_on_demand(site):
+    (band,) = album_for_id("547").bands
+    assert repr(band) == "<Band: Metallica>"
+    assert band.label == "Blackened Recordings"
+    assert band == band_for_id("125")
+    assert sum("bands/_/125" in url for url in site.requested) == 1
+
+
+def test_song_result_bands_are_refs(site):
+    song = song_search("Fear of the Dark")[0]
+    assert song.bands[0].name == "Iron Maiden"
+    assert song.bands[0].url == "bands/_/25"
+    assert not any("bands/" in url for url in site.requested)
+
+
+def test_entities_are_loaded_on_first_access(site):
+    band = band_for_id("125")
+    assert (band.id, band.url) == ("125", "bands/_/125")
+    assert not band.loaded and not site.requested
+    assert band.name == "Metallica"
+    assert band.loaded and len(site.requested) == 1
+
+
+def test_album_fields_and_tracks_share_one_page(site, monkeypatch):
+    parsed = []
+    original = Metallum.load
+
+    def load(self):
+        if self._parsed_page is None:
+            parsed.append(self._url)
+        return original(self)
+
+    monkeypatch.setattr(Metallum, "load", load)
+    album = album_for_id("547")
+    assert not site.requested
+    assert album.title == "Master of Puppets"
+    assert album.tracks[0].title == "Battery"
+    assert album.disc_count == 1
+    assert len(site.requested) == 1
+    assert parsed == ["albums/_/_/547"]
+
+
+def test_collections_are_memoized(site):
+    band = band_for_id("125")
+    assert band.albums is band.albums
+    assert band.similar_artists is band.similar_artists
+    album = album_for_id("547")
+    assert album.tracks is album.tracks
+    assert album.disc_count == 1
+    assert len(site.requested) == 3
+
+
+def test_refresh_fetches_again(site, cache):
+    band = band_for_id("125")
+    albums = band.albums
+    assert band.name == "Metallica"
+    requests = len(site.requested)
+    assert band.refresh() is band
+    assert cache.get(site.requested[0]) is None
+    assert band.albums is not albums
+    assert band.name == "Metallica"
+    assert len(site.requested) == requests + 2
+
+
+def test_collection_search_lookups(site):
+    albums = band_for_id("125").albums
+    full_length = albums.search(type=AlbumTypes.FULL_LENGTH)
+    assert isinstance(full_length, AlbumCollection)
+    assert [album.year for album in full_length] == [1983, 1984, 1986, 1988]
+    assert len(albums.search(title="master of puppets")) == 2
+    assert len(albums.search(type__in=["Demo", "Single"])) == 2
+    assert len(albums.search(type="Full-length", year__gte=1984, year__lt=1988)) == 2
+    assert len(albums.search(title__icontains="LIVE")) == 1
+    assert len(albums.search(title__contains="live")) == 0
+    assert len(albums.search(title__regex=r"^(Kill|Ride)")) == 2
+    assert len(albums.search(year=lambda year: year % 2 == 0)) == 6
+    assert len(full_length.search(title="master of puppets")) == 1
+
+
+def test_collection_index_follows_length_changes(site):
+    albums = band_for_id("125").albums
+    assert len(albums.search(type="Demo")) == 1
+    albums.append(albums[0])
+    assert len(albums.search(type="Demo")) == 2
+
+
+def test_collection_index_follows_reordering(site):
+    albums = band_for_id("125").albums
+    assert albums.search(type="Demo")[0].type == "Demo"
+    albums[0], albums[-1] = albums[-1], albums[0]
+    assert [album.type for album in albums.search(type="Demo")] == ["Demo"]
+    albums.reverse()
+    assert [album.type for album in albums.search(type="Demo")] == ["Demo"]
+    albums.sort(key=lambda album: album.title)
+    assert [album.type for album in albums.search(type="Demo")] == ["Demo"]
+
+
+def test_collection_in_lookup_rejects_strings(site):
+    albums = band_for_id("125").albums
+    with pytest.raises(ValueError):
+        albums.search(type__in="Demo")
+
+
+def test_collection_range_lookup_rejects_incomparable_values(site):
+    albums = band_for_id("125").albums
+    with pytest.raises(ValueError):
+        albums.search(year__gte="1990")
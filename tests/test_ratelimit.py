@@ -0,0 +1,55 @@
+from metallum.ratelimit import RateLimiter, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def make_limiter(rate=1.0, burst=2):
+    clock = FakeClock()
+    return RateLimiter(rate=rate, burst=burst, clock=clock, sleep=clock.sleep), clock
+
+
+def test_burst_does_not_wait():
+    limiter, _ = make_limiter(burst=2)
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 0
+    assert limiter.acquire() == 1.0
+
+
+def test_idle_time_refills_tokens():
+    limiter, clock = make_limiter(burst=1)
+    limiter.acquire()
+    # Время, потраченное на разбор страницы, засчитывается
+    clock.now += 1.0
+    assert limiter.acquire() == 0
+
+
+def test_concurrent_reservations_queue_up():
+    limiter, _ = make_limiter(rate=2.0, burst=1)
+    waits = [limiter._reserve() for _ in range(4)]
+    assert waits == [0.0, 0.5, 1.0, 1.5]
+
+
+def test_throttle_honours_retry_after_and_slows_down():
+    limiter, clock = make_limiter(rate=1.0, burst=2)
+    limiter.throttle(retry_after=10)
+    assert limiter.rate == 0.5
+    assert limiter.acquire() == 10
+    assert limiter.acquire() == 2.0
+    for _ in range(20):
+        limiter.record_success()
+    assert limiter.rate == 1.0
+
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("") is None
+    assert parse_retry_after("soon") is None
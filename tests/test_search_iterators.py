@@ -0,0 +1,65 @@
+import json
+import threading
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from metallum.operations import iter_band_search, iter_song_search
+
+TOTAL = 450
+PAGE_SIZE = 200
+
+
+def band_search_page(url):
+    start = int(parse_qs(urlparse(url).query)["iDisplayStart"][0])
+    rows = [
+        [
+            f'<a href="https://www.metal-archives.com/bands/Band_{i}/{i}">Band {i}</a>',
+            "Black Metal",
+            "Norway",
+        ]
+        for i in range(start, min(start + PAGE_SIZE, TOTAL))
+    ]
+    return json.dumps({"iTotalRecords": TOTAL, "aaData": rows})
+
+
+@pytest.fixture
+def paged_site(site):
+    site.pages["search/ajax-advanced/searching/bands/"] = band_search_page
+    return site
+
+
+@pytest.mark.parametrize("prefetch", [True, False])
+def test_iterates_all_pages(paged_site, prefetch):
+    ids = [result.id for result in iter_band_search("band", prefetch=prefetch)]
+    assert ids == [str(i) for i in range(TOTAL)]
+    assert len(paged_site.requested) == 3
+
+
+def test_stops_at_limit(paged_site):
+    results = list(iter_band_search("band", limit=250))
+    assert len(results) == 250
+    assert results[-1].name == "Band 249"
+    assert len(paged_site.requested) == 2
+
+
+def test_limit_within_first_page_fetches_one_page(paged_site):
+    assert len(list(iter_band_search("band", limit=10))) == 10
+    assert len(paged_site.requested) == 1
+
+
+def test_next_page_is_prefetched_in_background(paged_site):
+    results = iter_band_search("band")
+    next(results)
+    # Пока обрабатывается первая страница, вторая уже загружается
+    for _ in range(50):
+        if len(paged_site.requested) == 2:
+            break
+        threading.Event().wait(0.01)
+    assert len(paged_site.requested) == 2
+    results.close()
+
+
+def test_single_page(site):
+    songs = list(iter_song_search("fear of the dark"))
+    assert [song.title for song in songs] == ["Fear of the Dark"]
@@ -0,0 +1,39 @@
+import inspect
+from urllib.parse import parse_qs, urlparse
+
+from metallum.operations import album_search_url, album_search
+
+
+def album_query(title, **kwargs):
+    arguments = inspect.signature(album_search).bind(title, **kwargs)
+    arguments.apply_defaults()
+    url = album_search_url(arguments.arguments)
+    assert url.startswith("search/ajax-advanced/searching/albums/?")
+    return parse_qs(urlparse(url).query, keep_blank_values=True)
+
+
+def test_album_search_url_defaults():
+    query = album_query("Tuonela")
+    assert query["releaseTitle"] == ["Tuonela"]
+    assert query["exactReleaseMatch"] == ["1"]
+    assert query["indieLabel"] == ["0"]
+    assert query["iDisplayStart"] == ["0"]
+    for key in ("releaseMonthFrom", "releaseMonthTo"):
+        assert query.get(key, [""]) == [""]
+
+
+def test_album_search_url_years_default_months():
+    query = album_query("Tuonela", strict=False, year_from=1999, year_to=2001)
+    assert query["exactReleaseMatch"] == ["0"]
+    assert query["releaseYearFrom"] == ["1999"]
+    assert query["releaseYearTo"] == ["2001"]
+    assert query["releaseMonthFrom"] == ["1"]
+    assert query["releaseMonthTo"] == ["12"]
+
+
+def test_album_search_url_explicit_months():
+    query = album_query(
+        "Tuonela", year_from=1999, month_from=3, year_to=1999, month_to=5
+    )
+    assert query["releaseMonthFrom"] == ["3"]
+    assert query["releaseMonthTo"] == ["5"]
@@ -0,0 +1,86 @@
+from metallum.crawler import ALBUM, BAND, LYRICS, SIMILAR_ARTISTS, Crawler
+from metallum.models.lyrics import Lyrics
+from metallum.operations import album_for_id, band_for_id
+from metallum.store import Store
+from metallum.sync import REMOVED, Change
+
+
+def _fill(tmp_path):
+    store = Store(tmp_path / "store.sqlite3")
+    band = band_for_id("125")
+    store.save_band(band)
+    store.save_similar_artists("125", band.similar_artists)
+    store.on_entity(ALBUM, album_for_id("547"))
+    store.on_entity(ALBUM, album_for_id("42682"))
+    store.on_entity(LYRICS, Lyrics("5018A"))
+    return store
+
+
+def test_store_answers_queries_offline(site, tmp_path):
+    store = _fill(tmp_path)
+    requested = len(site.requested)
+
+    band = store.band_for_id("125")
+    assert band == band_for_id("125").to_record()
+    assert store.search_bands("metallica") == [band]
+    assert store.search_bands(genre="thrash", countries=["United States"]) == [band]
+    assert store.search_bands("metal", strict=False) == [band]
+    assert store.search_bands(countries=["Finland"]) == []
+    assert store.similar_artists("125")[0][2] >= store.similar_artists("125")[-1][2]
+
+    album = store.album_for_id("547")
+    assert album == album_for_id("547").to_record()
+    assert store.search_albums(band="Metallica", year_from=1980) == [album]
+    assert store.search_albums(band_id="2405")[0].tracks[2].band_id == "2405"
+    assert store.search_albums(types=["Demo"]) == []
+
+    songs = store.search_songs(band="Lunar Aurora")
+    assert [song.title for song in songs][:1] == ["A haudiga Fluag"]
+    assert len(site.requested) == requested
+
+
+def test_store_lyrics_full_text_search(site, tmp_path):
+    store = _fill(tmp_path)
+    assert store.lyrics_for_id("5018A").startswith("Lashing out the action")
+
+    (song,) = store.search_songs(lyrics='"battery is here"')
+    assert (song.id, song.title, song.band_name) == ("5018A", "Battery", "Metallica")
+    assert song.album_title == "Master of Puppets"
+    assert store.search_songs(lyrics="battery", title="Orion") == []
+
+
+def test_store_lyrics_are_replaced_by_track_id(site, tmp_path):
+    store = _fill(tmp_path)
+    store.save_lyrics("5018A", "Smashing through the boundaries")
+    assert store.lyrics_for_id("5018A") == "Smashing through the boundaries"
+    assert store.search_songs(lyrics='"battery is here"') == []
+    assert [song.id for song in store.search_songs(lyrics="boundaries")] == ["5018A"]
+
+    store.delete(LYRICS, "5018A")
+    assert store.lyrics_for_id("5018A") is None
+    assert store.search_songs(lyrics="boundaries") == []
+    (plan,) = store._connection().execute(
+        "EXPLAIN QUERY PLAN SELECT text FROM lyrics WHERE track_id = ?", ("5018A",)
+    )
+    assert "USING INDEX" in plan[-1]
+
+
+def test_store_applies_removals(site, tmp_path):
+    store = _fill(tmp_path)
+    store.apply_change(Change(1, ALBUM, "547", REMOVED, None, 0.0), None)
+    store.apply_change(Change(2, BAND, "125", REMOVED, None, 0.0), None)
+    assert store.album_for_id("547") is None
+    assert store.band_for_id("125") is None
+    assert store.search_songs(band="Metallica") == []
+    assert store.album_for_id("42682") is not None
+
+
+def test_store_fills_similar_artists_from_a_crawl(site, tmp_path):
+    store = Store(tmp_path / "store.sqlite3")
+    with Crawler(
+        tmp_path / "crawl.sqlite3", follow=(SIMILAR_ARTISTS,), max_depth=1
+    ) as crawler:
+        crawler.add_band("125")
+        crawler.run(on_entity=store.on_entity)
+    assert store.band_for_id("125").name == "Metallica"
+    assert len(store.similar_artists("125")) == len(band_for_id("125").similar_artists)
@@ -0,0 +1,97 @@
+from pathlib import Path
+
+from metallum.crawler import ALBUM, ALBUMS, BAND, LYRICS
+from metallum.sync import ADDED, MODIFIED, REMOVED, Sync
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+ALBUM_IDS = ("20371", "544", "545", "547", "1076", "548", "7064", "1081")
+
+
+def test_unchanged_bands_are_not_expanded(site, tmp_path):
+    band_page = (FIXTURES_DIR / "band_125.html").read_text(encoding="utf-8")
+    discography = (FIXTURES_DIR / "discography_125.html").read_text(encoding="utf-8")
+    pages = {"band": band_page, "discography": discography}
+    site.pages["bands/_/125"] = lambda url: pages["band"]
+    site.pages["band/discography/id/125/tab/all"] = lambda url: pages["discography"]
+    site.pages.update({f"albums/_/_/{i}": "album_547.html" for i in ALBUM_IDS})
+
+    with Sync(tmp_path / "sync.sqlite3", follow=(ALBUMS,)) as sync:
+        changes = sync.sync_band("125")
+        # Изменение группы записывается после изменений её альбомов
+        assert [(c.kind, c.change) for c in changes[-2:]] == [
+            (ALBUM, ADDED),
+            (BAND, ADDED),
+        ]
+        assert len(changes) == 1 + len(ALBUM_IDS)
+
+        # Время изменения группы прежнее: загружается только её страница
+        requested = len(site.requested)
+        assert sync.sync_band("125") == []
+        assert len(site.requested) == requested + 1
+
+        last_seq = sync.last_seq
+        pages["band"] = band_page.replace("2024-05-13 13:15:47", "2024-06-01 10:00:00")
+        pages["discography"] = discography.replace("/1081", "/99999")
+        site.pages["albums/_/_/99999"] = "album_547.html"
+        changes = sync.sync_bands(["125"])
+        assert not sync.failures
+        assert [(c.kind, c.id, c.change) for c in changes] == [
+            (ALBUM, "1081", REMOVED),
+            (ALBUM, "99999", ADDED),
+            (BAND, "125", MODIFIED),
+        ]
+        assert sync.changes(since=last_seq) == changes
+
+
+def test_changed_album_lyrics_are_checked(site, tmp_path):
+    seen = []
+    with Sync(
+        tmp_path / "sync.sqlite3",
+        follow=(LYRICS,),
+        on_change=lambda change, entity: seen.append((change.kind, entity)),
+    ) as sync:
+        site.pages.update(
+            {
+                f"release/ajax-view-lyrics/id/{5018 + i}A": "lyrics_5018A.html"
+                for i in range(8)
+            }
+        )
+        changes = sync.sync_album("547")
+        assert [c.kind for c in changes].count(LYRICS) == 8
+        assert seen[-1][1].title == "Master of Puppets"
+        assert sync.sync_album("547") == []
+        assert len(sync.changes()) == 9
+
+
+def test_failed_album_is_retried_on_next_sync(site, tmp_path):
+    site.pages.update({f"albums/_/_/{i}": "album_547.html" for i in ALBUM_IDS})
+
+    def unavailable(url):
+        raise ConnectionError(url)
+
+    site.pages["albums/_/_/547"] = unavailable
+    with Sync(tmp_path / "sync.sqlite3", follow=(ALBUMS,)) as sync:
+        assert sync.sync_bands(["125"]) == []
+        assert sync.failures and sync.failures[0][:2] == (BAND, "125")
+        assert BAND not in [c.kind for c in sync.changes()]
+
+        site.pages["albums/_/_/547"] = "album_547.html"
+        changes = sync.sync_bands(["125"])
+        assert not sync.failures
+        assert (ALBUM, "547", ADDED) in [(c.kind, c.id, c.change) for c in changes]
+        assert [c.kind for c in sync.changes()].count(BAND) == 1
+        assert sync.sync_band("125") == []
+
+
+def test_band_pages_are_fetched_in_a_bounded_window(site, tmp_path):
+    band_ids = ["125", "12", "25", "2405", "3453"]
+    in_flight = []
+
+    def on_change(change, entity):
+        fetched = sum("/bands/" in url for url in site.requested)
+        in_flight.append(fetched - len(in_flight))
+
+    with Sync(tmp_path / "sync.sqlite3", follow=(), on_change=on_change) as sync:
+        changes = sync.sync_bands(band_ids, max_workers=2)
+    assert [c.id for c in changes] == band_ids
+    assert max(in_flight) <= 3
@@ -0,0 +1,147 @@
+import asyncio
+import threading
+
+from metallum.ratelimit import RateLimiter
+from metallum.transport import (
+    AsyncTransport,
+    Transport,
+    get_transport,
+    set_transport,
+)
+
+
+class FakeResponse:
+    def __init__(self, text, status_code=200, headers=None):
+        self.text = text
+        self.content = text.encode("utf-8")
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, responses=None):
+        self.requests = []
+        self.responses = responses or []
+
+    def get(self, url, headers=None):
+        self.requests.append((url, headers))
+        if self.responses:
+            return self.responses.pop(0)
+        return FakeResponse(url)
+
+    def close(self):
+        pass
+
+
+class FakeTransport(Transport):
+    def __init__(self, pool_size=2, responses=None, limiter=None):
+        super().__init__(
+            pool_size=pool_size,
+            headers={"User-Agent": "test"},
+            limiter=limiter or RateLimiter(rate=1000, burst=100),
+        )
+        self.sessions = []
+        self.responses = responses
+
+    def _new_session(self):
+        session = FakeSession(self.responses)
+        self.sessions.append(session)
+        return session
+
+
+def test_sessions_are_reused():
+    transport = FakeTransport()
+    for i in range(5):
+        assert transport.get(f"https://example.com/{i}") == f"https://example.com/{i}"
+    assert len(transport.sessions) == 1
+    assert transport.sessions[0].requests[0][1] == {"User-Agent": "test"}
+
+
+def test_pool_size_is_respected():
+    transport = FakeTransport(pool_size=2)
+    barrier = threading.Barrier(2)
+
+    def worker():
+        with transport.session():
+            barrier.wait()
+
+    threads = [threading.Thread(target=worker) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with transport.session(), transport.session():
+        pass
+    assert len(transport.sessions) == 2
+
+
+def test_throttled_response_is_retried():
+    slept = []
+    limiter = RateLimiter(rate=1000, burst=100, sleep=slept.append)
+    transport = FakeTransport(
+        responses=[FakeResponse("", 429, {"Retry-After": "7"})], limiter=limiter
+    )
+    assert transport.get("https://example.com/") == "https://example.com/"
+    assert len(transport.sessions[0].requests) == 2
+    assert slept and slept[0] >= 6.9
+    assert limiter.rate < 1000
+
+
+def test_set_transport():
+    transport = FakeTransport()
+    previous = set_transport(transport)
+    try:
+        assert get_transport() is transport
+    finally:
+        set_transport(previous)
+
+
+def test_user_agent_is_resolved_on_first_request(monkeypatch):
+    import metallum.transport
+    from metallum.utils import set_user_agent
+
+    calls = []
+    monkeypatch.setattr(
+        metallum.transport, "get_user_agent", lambda: calls.append(1) or "custom"
+    )
+    transport = Transport()
+    assert calls == []
+    assert transport.headers["User-Agent"] == "custom"
+    assert transport.headers is transport.headers
+    assert calls == [1]
+
+    previous = set_user_agent("override")
+    try:
+        monkeypatch.undo()
+        assert Transport().headers["User-Agent"] == "override"
+    finally:
+        set_user_agent(previous)
+
+
+def test_async_session_is_replaced_and_closed_per_event_loop():
+    sessions = []
+
+    class AsyncSession:
+        closed = False
+
+        async def get(self, url, headers=None):
+            return FakeResponse(url)
+
+        async def close(self):
+            self.closed = True
+
+    class Transport(AsyncTransport):
+        def _new_session(self):
+            sessions.append(AsyncSession())
+            return sessions[-1]
+
+    transport = Transport(headers={}, limiter=RateLimiter(rate=1000, burst=10))
+    url = "https://www.metal-archives.com/bands/_/1"
+    asyncio.run(transport.get(url))
+    asyncio.run(transport.get(url))
+    assert [session.closed for session in sessions] == [True, False]
+    asyncio.run(transport.close())
+    assert sessions[-1].closed